@@ -4,4 +4,15 @@ setup(
     name='visualizing-sparql',
     version='0.1.0',
     packages=find_packages(include=['source.*']),
+    python_requires='>=3.9',
+    install_requires=[
+        'numpy>=1.26',
+        'pandas>=2.2',
+    ],
+    extras_require={
+        # Local RDF backend, dump ingestion and query validation.
+        'local': ['rdflib>=7.1'],
+        # Columnar result store and Arrow/Parquet exports.
+        'arrow': ['pyarrow>=18.1'],
+    },
 )
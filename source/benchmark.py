@@ -0,0 +1,70 @@
+import argparse
+import logging
+import sys
+from source.util.benchmark import (
+    PipelineBenchmark,
+    SyntheticEndpoint,
+    compare_results,
+    save_results,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the query, conversion and display pipeline against a synthetic endpoint."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+        help="Result sizes in bindings. Sizes in the millions need several GiB of memory.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory measurement.")
+    parser.add_argument("--output", default="files/benchmarks", help="Directory for saved results.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Saved results to compare against.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression."
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main entry point for the benchmark command.
+
+    Returns:
+        int: 1 if a regression against the baseline was found, else 0.
+    """
+    args = parse_args()
+    with SyntheticEndpoint() as endpoint:
+        benchmark = PipelineBenchmark(endpoint.url, repeat=args.repeat, memory=not args.no_memory)
+        results = benchmark.run(args.sizes)
+    path = save_results(results, args.output)
+    logger.info(f"Benchmark results saved to {path}")
+
+    if not args.compare:
+        return 0
+    comparison = compare_results(results, args.compare, args.threshold)
+    for entry in comparison:
+        flag = "REGRESSED" if entry["regressed"] else ""
+        logger.info(
+            f"{entry['rows']:>10} rows  {entry['stage']:<30} "
+            f"{entry['baseline_seconds'] * 1000:>10.1f} ms -> {entry['seconds'] * 1000:>10.1f} ms "
+            f"({entry['ratio']:.2f}x) {flag}"
+        )
+    return 1 if any(entry["regressed"] for entry in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CONFIG_PATH = Path(__file__).with_name("config.json")
+
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Loads the application configuration.
+
+    Args:
+        path (Optional[str]): Path to a JSON configuration file. Defaults to
+            `source/config/config.json`.
+
+    Returns:
+        Dict[str, Any]: The configuration.
+
+    Raises:
+        RuntimeError: If the file is not found or contains invalid JSON.
+    """
+    config_path = Path(path) if path else DEFAULT_CONFIG_PATH
+    try:
+        with open(config_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        logging.error(f"Configuration file not found: {config_path}")
+        raise RuntimeError(f"Configuration file not found: {config_path}")
+    except json.JSONDecodeError as e:
+        logging.error(f"Error decoding configuration file: {e}")
+        raise RuntimeError(f"Invalid JSON in configuration file: {e}") from e
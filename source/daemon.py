@@ -0,0 +1,185 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+from source.config.config import load_config
+from source.sparql.daemon import DEFAULT_QUERY_FILE, DaemonClient, QueryDaemon
+from source.sparql.prefixes import URICompactor
+from source.sparql.registry import load_prefix_map
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _parse_value(text: str) -> Any:
+    """Reads a command line value as JSON if possible, e.g. numbers and lists, else as text."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parse_pairs(pairs: Optional[List[str]], option: str) -> Dict[str, Any]:
+    """
+    Parses repeated KEY=VALUE options.
+
+    Raises:
+        ValueError: If an option has no "=".
+    """
+    parsed = {}
+    for pair in pairs or []:
+        key, separator, value = pair.partition("=")
+        if not separator:
+            raise ValueError(f"{option} expects KEY=VALUE, got '{pair}'.")
+        parsed[key] = _parse_value(value)
+    return parsed
+
+
+def print_rows(rows: Iterator[Dict[str, Any]], compactor: URICompactor, as_json: bool) -> None:
+    """
+    Prints streamed result rows as they arrive.
+
+    Args:
+        rows (Iterator[Dict[str, Any]]): The response header, then one row at a time.
+        compactor (URICompactor): Shortens URIs in the table output.
+        as_json (bool): Prints the rows as JSON lines instead of a table.
+    """
+    header = next(rows)
+    variables = header.get("vars", [])
+    if not as_json:
+        print("\t".join(variables))
+    count = 0
+    for row in rows:
+        count += 1
+        if as_json:
+            print(json.dumps(row, ensure_ascii=False))
+            continue
+        values = []
+        for variable in variables:
+            value = row.get(variable)
+            # SPARQL bindings wrap each value; aggregated rows are plain values.
+            if isinstance(value, dict):
+                value = value.get("value")
+            if isinstance(value, str):
+                value = compactor.compact(value)
+            values.append("" if value is None else str(value))
+        print("\t".join(values))
+    logger.info(f"{count} rows.")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a local daemon that keeps the executor and caches warm, or send it requests."
+    )
+    parser.add_argument("--socket", help="Unix socket of the daemon. Defaults to config.json's daemon.socket.")
+    parser.add_argument("--config", help="Configuration file. Defaults to source/config/config.json.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Start the daemon in the foreground.")
+    serve.add_argument("--file", default=DEFAULT_QUERY_FILE, help="Query file used when a request names none.")
+    serve.add_argument("--debug", action="store_true", help="Enable debug logging.")
+    commands.add_parser("stop", help="Stop the running daemon.")
+    commands.add_parser("status", help="Show what the daemon holds and its endpoint's health.")
+
+    query = commands.add_parser("query", help="Run a named query from a query file.")
+    query.add_argument("name", help="The query name.")
+    query.add_argument("--param", action="append", metavar="NAME=VALUE", help="A query parameter.")
+    query.add_argument("--file", help="The query file. Defaults to the daemon's.")
+    query.add_argument("--refresh", action="store_true", help="Bypass the result cache.")
+
+    sparql = commands.add_parser("sparql", help="Run a SPARQL query given on the command line.")
+    sparql.add_argument("query", help="The full SPARQL query.")
+    sparql.add_argument("--refresh", action="store_true", help="Bypass the result cache.")
+
+    explore = commands.add_parser("explore", help="Call a schema lookup of the explorer.")
+    explore.add_argument("method", help="e.g. fetch_types, fetch_properties, get_max_types.")
+    explore.add_argument("args", nargs="*", help="Positional arguments, read as JSON where possible.")
+
+    aggregate = commands.add_parser("aggregate", help="Group and count a dataset held by the daemon.")
+    aggregate.add_argument("dataset", help="The dataset name.")
+    aggregate.add_argument("--by", action="append", required=True, metavar="COLUMN", help="Grouping column.")
+    aggregate.add_argument("--distinct", action="append", metavar="NAME=COLUMN", help="Distinct count per group.")
+    aggregate.add_argument("--contains", action="append", metavar="COLUMN=TEXT", help="Substring condition.")
+    aggregate.add_argument("--sort", metavar="COLUMN", help="Order the groups by COLUMN.")
+    aggregate.add_argument("--ascending", action="store_true", help="Sort the groups in ascending order.")
+    aggregate.add_argument("--limit", type=int, help="Maximum number of groups shown.")
+    aggregate.add_argument("--file", help="The query file. Defaults to the daemon's.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main entry point for the daemon and its client.
+
+    Returns:
+        int: The exit status.
+    """
+    args = parse_args()
+    config = load_config(args.config)
+    socket_path = args.socket or (config.get("daemon") or {}).get("socket")
+
+    if args.command == "serve":
+        try:
+            QueryDaemon(config, socket_path, query_file=args.file, debug=args.debug).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
+        return 0
+
+    client = DaemonClient(socket_path)
+    try:
+        if args.command == "stop":
+            logger.info(client.call("shutdown"))
+        elif args.command == "status":
+            print(json.dumps(client.call("stats"), indent=4))
+        elif args.command == "explore":
+            result = client.call("explore", method=args.method, args=[_parse_value(a) for a in args.args])
+            print(json.dumps(result, indent=4, ensure_ascii=False))
+        else:
+            query_file = getattr(args, "file", None)
+            compactor = URICompactor(load_prefix_map(query_file or DEFAULT_QUERY_FILE))
+            # The daemon may run in another directory.
+            query_file = os.path.abspath(query_file) if query_file else None
+            if args.command == "query":
+                rows = client.stream(
+                    "query",
+                    name=args.name,
+                    parameters=_parse_pairs(args.param, "--param"),
+                    file=query_file,
+                    refresh=args.refresh,
+                )
+            elif args.command == "sparql":
+                rows = client.stream("sparql", query=args.query, refresh=args.refresh)
+            else:
+                rows = client.stream(
+                    "aggregate",
+                    dataset=args.dataset,
+                    by=args.by,
+                    count_distinct=_parse_pairs(args.distinct, "--distinct"),
+                    contains=_parse_pairs(args.contains, "--contains"),
+                    sort=args.sort,
+                    ascending=args.ascending,
+                    limit=args.limit,
+                    file=query_file,
+                )
+            print_rows(rows, compactor, args.json)
+    except (RuntimeError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,29 @@
+import argparse
+import asyncio
 import logging
 from explorer.explorer import KnowledgeGraphExplorer
+from explorer.async_explorer import AsyncKnowledgeGraphExplorer
 from explorer.ui import select_type, select_property, handle_values
+from source.config.config import load_config
+from source.sparql.backend import SPARQLBackend, create_backend
+from source.sparql.tracing import get_tracer
+from typing import Optional
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-def knowledge_graph_explorer(endpoint: str) -> None:
+def knowledge_graph_explorer(endpoint: str, backend: Optional[SPARQLBackend] = None) -> None:
     """
     Main workflow for the Knowledge Graph Explorer.
 
     Args:
         endpoint (str): The SPARQL endpoint URL.
+        backend (Optional[SPARQLBackend]): Backend that answers the queries.
+            Defaults to querying the endpoint over HTTP.
     """
-    explorer = KnowledgeGraphExplorer(endpoint_url=endpoint, cache_enabled=True)
+    explorer = KnowledgeGraphExplorer(
+        endpoint_url=endpoint, cache_enabled=True, backend=backend, use_schema_index=True
+    )
     logger.info("Welcome to the Knowledge Graph Explorer!")
 
     while True:
@@ -31,9 +42,74 @@ def knowledge_graph_explorer(endpoint: str) -> None:
         logger.info("Returning to type selection.")
 
 
+async def async_knowledge_graph_explorer(
+    endpoint: str, backend: Optional[SPARQLBackend] = None
+) -> None:
+    """
+    Workflow for the Knowledge Graph Explorer that prefetches likely next steps.
+
+    While the user reads a list of types or properties, the properties of the
+    top types (or the values of the top properties) are fetched in the background.
+
+    Args:
+        endpoint (str): The SPARQL endpoint URL.
+        backend (Optional[SPARQLBackend]): Backend that answers the queries.
+            Defaults to querying the endpoint over HTTP.
+    """
+    explorer = KnowledgeGraphExplorer(
+        endpoint_url=endpoint, cache_enabled=True, backend=backend, use_schema_index=True
+    )
+    logger.info("Welcome to the Knowledge Graph Explorer!")
+
+    async with AsyncKnowledgeGraphExplorer(explorer) as prefetcher:
+        def types_shown(results):
+            types = [result["type"]["value"] for result in results]
+            prefetcher.schedule_prefetch(prefetcher.prefetch_properties, types)
+
+        while True:
+            selected_type = await asyncio.to_thread(select_type, explorer, types_shown)
+            prefetcher.cancel_prefetch(keep=selected_type)
+            if not selected_type:
+                logger.info("No type selected. Exiting application.")
+                print("Exiting.")
+                break
+
+            def properties_shown(results):
+                properties = [result["property"]["value"] for result in results]
+                prefetcher.schedule_prefetch(prefetcher.prefetch_values, selected_type, properties)
+
+            selected_property = await asyncio.to_thread(
+                select_property, explorer, selected_type, properties_shown
+            )
+            prefetcher.cancel_prefetch(keep=selected_property)
+            if not selected_property:
+                logger.info("No property selected. Returning to type selection.")
+                continue
+
+            await asyncio.to_thread(handle_values, explorer, selected_type, selected_property)
+            logger.info("Returning to type selection.")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explore the types and properties of a knowledge graph.")
+    parser.add_argument(
+        "--no-prefetch", action="store_true", help="Do not fetch likely next steps in the background."
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH", help="Write timing spans as JSON lines to PATH and log a profile report."
+    )
+    args = parser.parse_args()
+    get_tracer().enabled = bool(args.trace)
     try:
-        endpoint = "https://nfdi4culture.de/sparql"  # Replace with your endpoint
-        knowledge_graph_explorer(endpoint)
+        backend = create_backend(load_config())  # Select the endpoint in config.json
+        if args.no_prefetch:
+            knowledge_graph_explorer(backend.endpoint, backend)
+        else:
+            asyncio.run(async_knowledge_graph_explorer(backend.endpoint, backend))
     except Exception as e:
         logger.critical(f"An unrecoverable error occurred: {e}", exc_info=True)
+    finally:
+        if args.trace:
+            tracer = get_tracer()
+            logger.info(f"Wrote {tracer.export_jsonl(args.trace)} spans to {args.trace}.")
+            logger.info(f"Profile by explorer step:\n{tracer.report()}")
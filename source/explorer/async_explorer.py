@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .explorer import KnowledgeGraphExplorer
+
+
+class AsyncKnowledgeGraphExplorer:
+    """Asyncio front end for KnowledgeGraphExplorer that prefetches likely next steps."""
+
+    def __init__(
+        self,
+        explorer: KnowledgeGraphExplorer,
+        prefetch_top_n: int = 3,
+        max_concurrency: int = 4,
+    ):
+        """
+        Initializes the AsyncKnowledgeGraphExplorer.
+
+        Args:
+            explorer (KnowledgeGraphExplorer): The explorer whose caches are warmed.
+            prefetch_top_n (int): Number of top-ranked types or properties to prefetch.
+            max_concurrency (int): Maximum number of queries run at the same time.
+        """
+        self.explorer = explorer
+        self.prefetch_top_n = prefetch_top_n
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prefetches: Dict[Tuple[str, ...], "asyncio.Task[Any]"] = {}
+
+    async def __aenter__(self) -> "AsyncKnowledgeGraphExplorer":
+        self._loop = asyncio.get_running_loop()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def _run(self, method: Callable[..., Any], *args: Any) -> Any:
+        self._loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await self._loop.run_in_executor(self._pool, method, *args)
+
+    async def fetch_types(self, limit: int = 10) -> List[Dict]:
+        return await self._run(self.explorer.fetch_types, limit)
+
+    async def fetch_properties(self, rdf_type: str, limit: int = 10) -> List[Dict]:
+        return await self._run(self.explorer.fetch_properties, rdf_type, limit)
+
+    async def fetch_values(self, rdf_type: str, property_uri: str, limit: int = 10) -> List[Dict]:
+        return await self._run(self.explorer.fetch_values, rdf_type, property_uri, limit)
+
+    async def get_max_types(self) -> Optional[int]:
+        return await self._run(self.explorer.get_max_types)
+
+    async def get_max_properties(self, rdf_type: str) -> Optional[int]:
+        return await self._run(self.explorer.get_max_properties, rdf_type)
+
+    async def get_max_values(self, rdf_type: str, property_uri: str) -> Optional[int]:
+        return await self._run(self.explorer.get_max_values, rdf_type, property_uri)
+
+    async def _prefetch_type(self, rdf_type: str, limit: int) -> None:
+        await self.get_max_properties(rdf_type)
+        await self.fetch_properties(rdf_type, limit)
+
+    async def _prefetch_values(self, rdf_type: str, properties: List[str], limit: int) -> None:
+        await self._run(self.explorer.fetch_values_many, rdf_type, properties, limit)
+
+    def _schedule(self, key: Tuple[str, ...], coroutine: Any) -> None:
+        """Starts a prefetch task unless one for the same key is already running."""
+        task = self._prefetches.get(key)
+        if task is not None and not task.done():
+            coroutine.close()
+            return
+        task = asyncio.ensure_future(coroutine)
+        task.add_done_callback(self._log_failure)
+        self._prefetches[key] = task
+
+    def _log_failure(self, task: "asyncio.Task[Any]") -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.debug(f"Prefetch failed: {task.exception()}")
+
+    def prefetch_properties(self, types: List[str], limit: int = 10) -> None:
+        """
+        Starts prefetching the property counts and lists of the top-ranked types.
+
+        Must be called from the event loop thread.
+
+        Args:
+            types (List[str]): Types in display order.
+            limit (int): Number of properties to fetch per type.
+        """
+        for rdf_type in types[: self.prefetch_top_n]:
+            self._schedule(("properties", rdf_type), self._prefetch_type(rdf_type, limit))
+
+    def prefetch_values(self, rdf_type: str, properties: List[str], limit: int = 10) -> None:
+        """
+        Starts prefetching the values of the top-ranked properties of a type.
+
+        Must be called from the event loop thread.
+
+        Args:
+            rdf_type (str): The selected type.
+            properties (List[str]): Properties in display order.
+            limit (int): Number of values to fetch per property.
+        """
+        top = properties[: self.prefetch_top_n]
+        if top:
+            # One batched query answers all of them.
+            self._schedule(("values", rdf_type, *top), self._prefetch_values(rdf_type, top, limit))
+
+    def schedule_prefetch(self, method: Callable[..., None], *args: Any) -> None:
+        """
+        Thread-safe variant of calling one of the prefetch methods.
+
+        Lets blocking UI code running in a worker thread start prefetches
+        as soon as it has displayed a list.
+
+        Args:
+            method (Callable[..., None]): `prefetch_properties` or `prefetch_values`.
+            *args: Arguments passed to the method.
+        """
+        if self._loop is None:
+            raise RuntimeError("Use the explorer as `async with` before scheduling prefetches.")
+        self._loop.call_soon_threadsafe(method, *args)
+
+    def cancel_prefetch(self, keep: Optional[str] = None) -> int:
+        """
+        Cancels pending prefetches that do not involve the given type or property.
+
+        Queries that are already running finish in the background and still
+        populate the caches; only queued ones are dropped.
+
+        Args:
+            keep (Optional[str]): The type or property the user selected.
+
+        Returns:
+            int: The number of cancelled prefetches.
+        """
+        cancelled = 0
+        for key, task in list(self._prefetches.items()):
+            if task.done():
+                del self._prefetches[key]
+            elif keep is None or keep not in key:
+                task.cancel()
+                del self._prefetches[key]
+                cancelled += 1
+        if cancelled:
+            self.logger.debug(f"Cancelled {cancelled} prefetches.")
+        return cancelled
+
+    def close(self) -> None:
+        """Cancels all prefetches and shuts down the worker threads."""
+        self.cancel_prefetch()
+        self._pool.shutdown(wait=False, cancel_futures=True)
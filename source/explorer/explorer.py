@@ -1,22 +1,58 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from source.sparql.cache import LRUCache
+from source.sparql.backend import SPARQLBackend
+from source.sparql.normalize import canonicalize_query
+from source.sparql.singleflight import shared_flight
+from source.sparql.templates import QueryTemplate
+from source.sparql.tracing import span, traced
+from source.sparql.transport import get_transport
+from source.sparql.values import ValuesBatcher
+from .schema import SchemaIndex
 
 
 class KnowledgeGraphExplorer:
-    def __init__(self, endpoint_url: str, cache_enabled: bool = True):
+    def __init__(
+        self,
+        endpoint_url: str,
+        cache_enabled: bool = True,
+        cache: Optional[LRUCache] = None,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        backend: Optional[SPARQLBackend] = None,
+        use_schema_index: bool = False,
+        schema_index_path: Optional[str] = None,
+        batch_size: int = 50,
+    ):
         """
         Initializes the KnowledgeGraphExplorer.
 
         Args:
             endpoint_url (str): The SPARQL endpoint URL.
             cache_enabled (bool): Enables caching of query results.
+            cache (Optional[LRUCache]): Cache to store results in. Pass the same
+                instance to several explorers to share it between them.
+            cache_max_bytes (int): Size bound of the cache created when none is given.
+            backend (Optional[SPARQLBackend]): Backend that answers the queries, e.g.
+                a local RDF store. Defaults to the HTTP connection pool shared for
+                this endpoint.
+            use_schema_index (bool): Answers type and property lookups from a
+                persisted schema summary instead of aggregating on every step.
+            schema_index_path (Optional[str]): File the schema summary is kept in.
+            batch_size (int): Maximum number of invocations merged into one query
+                by the `*_many` methods.
         """
-        self.sparql = SPARQLWrapper(endpoint_url)
-        self.sparql.setReturnFormat(JSON)
+        self.backend = backend if backend is not None else get_transport(endpoint_url)
+        # Identical queries issued concurrently (e.g. by prefetching) share one request.
+        self.in_flight = shared_flight()
         self.cache_enabled = cache_enabled
-        self.cache = {}
+        self.cache = cache if cache is not None else LRUCache(max_bytes=cache_max_bytes)
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.schema_index = (
+            SchemaIndex(endpoint_url, self._fetch_bindings, schema_index_path)
+            if use_schema_index
+            else None
+        )
+        self.batcher = ValuesBatcher(self._fetch_bindings, chunk_size=batch_size)
 
     def execute_query(self, query: str):
         """
@@ -28,35 +64,120 @@ class KnowledgeGraphExplorer:
         Returns:
             List[Dict]: Query results as a list of bindings.
         """
-        if self.cache_enabled and query in self.cache:
-            self.logger.info("Returning cached results.")
-            return self.cache[query]
+        with span("explorer.query") as query_span:
+            canonical = canonicalize_query(query)
+            if self.cache_enabled:
+                cached = self.cache.get(canonical.key)
+                if cached is not None:
+                    self.logger.info("Returning cached results.")
+                    query_span.set(cache_hit=True, rows=len(cached))
+                    return canonical.bindings_from_canonical(cached)
 
-        self.sparql.setQuery(query)
-        try:
-            self.logger.info("Executing SPARQL query...")
-            results = self.sparql.query().convert()
-            bindings = results["results"]["bindings"]
+            query_span.set(cache_hit=False)
+            bindings = self._fetch_bindings(query)
+            query_span.set(rows=len(bindings))
             if self.cache_enabled:
-                self.cache[query] = bindings
+                self.cache.set(canonical.key, canonical.bindings_to_canonical(bindings))
             return bindings
+
+    def _fetch_bindings(self, query: str):
+        """Runs a query against the backend, bypassing the cache."""
+        try:
+            self.logger.info("Executing SPARQL query...")
+            text = canonicalize_query(query).text
+            results = self.in_flight.do(
+                (self.backend.endpoint, text), lambda: self.backend.query(text)
+            )
+            return results["results"]["bindings"]
         except Exception as e:
             self.logger.error(f"Query execution failed: {e}")
             raise RuntimeError(f"Query execution failed: {e}")
 
+    def execute_many(self, template: QueryTemplate, parameter_sets: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """
+        Executes a query template for many parameter sets, merging cache misses
+        into VALUES-batched queries.
+
+        Each invocation's results are cached as if it had been executed on its
+        own, so later single lookups are answered from the cache.
+
+        Args:
+            template (QueryTemplate): The query template.
+            parameter_sets (List[Dict[str, Any]]): The parameter values of each invocation.
+
+        Returns:
+            List[List[Dict]]: The bindings of each invocation, in order.
+        """
+        results: List[Optional[List[Dict]]] = [None] * len(parameter_sets)
+        canonicals = [canonicalize_query(template.bind(**parameters)) for parameters in parameter_sets]
+        missing = []
+        for index, canonical in enumerate(canonicals):
+            cached = self.cache.get(canonical.key) if self.cache_enabled else None
+            if cached is not None:
+                results[index] = canonical.bindings_from_canonical(cached)
+            else:
+                missing.append(index)
+        if missing:
+            self.logger.info(f"Executing {len(missing)} queries in batches of {self.batcher.chunk_size}...")
+            fetched = self.batcher.run(template, [parameter_sets[index] for index in missing])
+            for index, bindings in zip(missing, fetched):
+                results[index] = bindings
+                if self.cache_enabled:
+                    self.cache.set(canonicals[index].key, canonicals[index].bindings_to_canonical(bindings))
+        return results
+
+    @traced("explorer.fetch_types")
     def fetch_types(self, limit: int = 10):
+        if self.schema_index is not None:
+            try:
+                return self.schema_index.types(limit)
+            except Exception as e:
+                self.logger.warning(f"Schema index unavailable, querying the endpoint: {e}")
         from .queries import get_types_query
         return self.execute_query(get_types_query(limit))
 
+    @traced("explorer.fetch_properties")
     def fetch_properties(self, rdf_type: str, limit: int = 10):
+        if self.schema_index is not None:
+            try:
+                return self.schema_index.properties(rdf_type, limit)
+            except Exception as e:
+                self.logger.warning(f"Schema index unavailable, querying the endpoint: {e}")
         from .queries import get_properties_query
         return self.execute_query(get_properties_query(rdf_type, limit))
 
+    @traced("explorer.fetch_values")
     def fetch_values(self, rdf_type: str, property_uri: str, limit: int = 10):
         from .queries import query_property_values
         return self.execute_query(query_property_values(rdf_type, property_uri, limit))
 
+    @traced("explorer.fetch_properties_many")
+    def fetch_properties_many(self, rdf_types: List[str], limit: int = 10) -> List[List[Dict]]:
+        """Fetches the top properties of several types with batched queries."""
+        if self.schema_index is not None:
+            try:
+                return [self.schema_index.properties(rdf_type, limit) for rdf_type in rdf_types]
+            except Exception as e:
+                self.logger.warning(f"Schema index unavailable, querying the endpoint: {e}")
+        from .queries import PROPERTIES_TEMPLATE
+        return self.execute_many(
+            PROPERTIES_TEMPLATE, [{"rdf_type": rdf_type, "limit": limit} for rdf_type in rdf_types]
+        )
 
+    @traced("explorer.fetch_values_many")
+    def fetch_values_many(self, rdf_type: str, property_uris: List[str], limit: int = 10) -> List[List[Dict]]:
+        """Fetches the top values of several properties of a type with batched queries."""
+        from .queries import PROPERTY_VALUES_TEMPLATE
+        return self.execute_many(
+            PROPERTY_VALUES_TEMPLATE,
+            [
+                {"rdf_type": rdf_type, "property_uri": property_uri, "limit": limit}
+                for property_uri in property_uris
+            ],
+        )
+
+
+    @traced("explorer.get_max_types")
     def get_max_types(self) -> Optional[int]:
         """
         Queries the SPARQL endpoint for the maximum number of available types.
@@ -64,6 +185,11 @@ class KnowledgeGraphExplorer:
         Returns:
             Optional[int]: The maximum number of types or None if the query fails.
         """
+        if self.schema_index is not None:
+            try:
+                return self.schema_index.type_total()
+            except Exception as e:
+                self.logger.warning(f"Schema index unavailable, querying the endpoint: {e}")
         query = """
         SELECT (COUNT(DISTINCT ?type) AS ?count)
         WHERE {
@@ -77,6 +203,7 @@ class KnowledgeGraphExplorer:
             self.logger.error(f"Failed to fetch maximum number of types: {e}")
             return None
 
+    @traced("explorer.get_max_properties")
     def get_max_properties(self, rdf_type: str) -> Optional[int]:
         """
         Queries the SPARQL endpoint for the maximum number of properties for a given type.
@@ -87,6 +214,11 @@ class KnowledgeGraphExplorer:
         Returns:
             Optional[int]: The maximum number of properties or None if the query fails.
         """
+        if self.schema_index is not None:
+            try:
+                return self.schema_index.property_total(rdf_type)
+            except Exception as e:
+                self.logger.warning(f"Schema index unavailable, querying the endpoint: {e}")
         query = f"""
         SELECT (COUNT(DISTINCT ?property) AS ?count)
         WHERE {{
@@ -99,4 +231,43 @@ class KnowledgeGraphExplorer:
             return int(results[0]["count"]["value"]) if results else None
         except Exception as e:
             self.logger.error(f"Failed to fetch maximum number of properties for type '{rdf_type}': {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @traced("explorer.get_max_values")
+    def get_max_values(self, rdf_type: str, property_uri: str) -> Optional[int]:
+        """
+        Determines how many distinct values a property can offer for a type.
+
+        With a schema index this is the property's distinct value count across
+        the graph, an upper bound that is computed once. For properties the
+        index does not know, or without an index, the values used by instances
+        of the type are counted on the endpoint.
+
+        Args:
+            rdf_type (str): The RDF type.
+            property_uri (str): The property URI.
+
+        Returns:
+            Optional[int]: The maximum number of values or None if the query fails.
+        """
+        if self.schema_index is not None:
+            try:
+                total = self.schema_index.distinct_values(property_uri)
+                if total is not None:
+                    return total
+                # Not in the index, e.g. a property added since it was built.
+            except Exception as e:
+                self.logger.warning(f"Schema index unavailable, querying the endpoint: {e}")
+        query = f"""
+        SELECT (COUNT(DISTINCT ?value) AS ?count)
+        WHERE {{
+            ?s a <{rdf_type}> ;
+               <{property_uri}> ?value .
+        }}
+        """
+        try:
+            results = self.execute_query(query)
+            return int(results[0]["count"]["value"]) if results else None
+        except Exception as e:
+            self.logger.error(f"Failed to fetch maximum number of values for property '{property_uri}': {e}")
+            return None
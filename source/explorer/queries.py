@@ -1,34 +1,93 @@
-def get_types_query(limit: int = 10) -> str:
-    return f"""
+from source.sparql.templates import QueryTemplate
+
+TYPES_TEMPLATE = QueryTemplate(
+    """
     SELECT ?type (COUNT(?s) AS ?count)
-    WHERE {{
+    WHERE {
         ?s a ?type .
-    }}
+    }
     GROUP BY ?type
     ORDER BY DESC(?count)
-    LIMIT {limit}
-    """
+    LIMIT {{limit}}
+    """,
+    {"limit": {"type": "integer", "default": 10}},
+)
 
-def get_properties_query(rdf_type: str, limit: int = 10) -> str:
-    return f"""
+PROPERTIES_TEMPLATE = QueryTemplate(
+    """
     SELECT ?property (COUNT(?o) AS ?count)
-    WHERE {{
-        ?s a <{rdf_type}> ;
+    WHERE {
+        ?s a {{rdf_type}} ;
            ?property ?o .
-    }}
+    }
     GROUP BY ?property
     ORDER BY DESC(?count)
-    LIMIT {limit}
-    """
+    LIMIT {{limit}}
+    """,
+    {"rdf_type": {"type": "iri"}, "limit": {"type": "integer", "default": 10}},
+)
 
-def query_property_values(rdf_type: str, property_uri: str, limit: int = 10) -> str:
-    return f"""
+PROPERTY_VALUES_TEMPLATE = QueryTemplate(
+    """
     SELECT ?value (COUNT(?s) AS ?count)
-    WHERE {{
-        ?s a <{rdf_type}> ;
-           <{property_uri}> ?value .
-    }}
+    WHERE {
+        ?s a {{rdf_type}} ;
+           {{property_uri}} ?value .
+    }
     GROUP BY ?value
     ORDER BY DESC(?count)
-    LIMIT {limit}
+    LIMIT {{limit}}
+    """,
+    {
+        "rdf_type": {"type": "iri"},
+        "property_uri": {"type": "iri"},
+        "limit": {"type": "integer", "default": 10},
+    },
+)
+
+PROPERTY_COUNTS_TEMPLATE = QueryTemplate(
     """
+    SELECT ?property (COUNT(?o) AS ?count)
+    WHERE {
+        ?s a {{rdf_type}} ;
+           ?property ?o .
+    }
+    GROUP BY ?property
+    """,
+    {"rdf_type": {"type": "iri"}},
+)
+
+_TYPE_COUNTS = """
+    SELECT ?type (COUNT(?s) AS ?count)
+    WHERE {
+        ?s a ?type .
+    }
+    GROUP BY ?type
+    """
+
+_DISTINCT_VALUE_COUNTS = """
+    SELECT ?property (COUNT(DISTINCT ?o) AS ?count)
+    WHERE {
+        ?s ?property ?o .
+    }
+    GROUP BY ?property
+    """
+
+
+def get_types_query(limit: int = 10) -> str:
+    return TYPES_TEMPLATE.bind(limit=limit)
+
+def get_properties_query(rdf_type: str, limit: int = 10) -> str:
+    return PROPERTIES_TEMPLATE.bind(rdf_type=rdf_type, limit=limit)
+
+def query_property_values(rdf_type: str, property_uri: str, limit: int = 10) -> str:
+    return PROPERTY_VALUES_TEMPLATE.bind(rdf_type=rdf_type, property_uri=property_uri, limit=limit)
+
+def get_type_counts_query() -> str:
+    return _TYPE_COUNTS
+
+def get_property_counts_query(rdf_type: str) -> str:
+    return PROPERTY_COUNTS_TEMPLATE.bind(rdf_type=rdf_type)
+
+def get_distinct_value_counts_query() -> str:
+    return _DISTINCT_VALUE_COUNTS
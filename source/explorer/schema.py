@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .queries import (
+    get_distinct_value_counts_query,
+    get_property_counts_query,
+    get_type_counts_query,
+)
+
+
+def _to_bindings(counts: Dict[str, int], key: str, limit: int) -> List[Dict]:
+    """Formats the `limit` largest counts like the bindings of the explorer queries."""
+    top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [
+        {
+            key: {"type": "uri", "value": uri},
+            "count": {"type": "literal", "value": str(count)},
+        }
+        for uri, count in top
+    ]
+
+
+def _to_counts(bindings: List[Dict], key: str) -> Dict[str, int]:
+    return {binding[key]["value"]: int(binding["count"]["value"]) for binding in bindings}
+
+
+class SchemaIndex:
+    """Persistent summary of type and property statistics of a knowledge graph."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        execute_query: Callable[[str], List[Dict]],
+        path: Optional[str] = None,
+        max_age: Optional[float] = 24 * 60 * 60,
+    ):
+        """
+        Initializes the SchemaIndex and loads a previously saved summary.
+
+        Args:
+            endpoint (str): The SPARQL endpoint URL the summary describes.
+            execute_query (Callable[[str], List[Dict]]): Runs a query and returns its bindings.
+            path (Optional[str]): File the summary is persisted to. Defaults to
+                a file per endpoint under `files/schema/`.
+            max_age (Optional[float]): Age in seconds after which the type counts
+                are refreshed on load. None never refreshes automatically.
+        """
+        if path is None:
+            digest = hashlib.sha1(endpoint.encode("utf-8")).hexdigest()[:12]
+            path = f"files/schema/schema_{digest}.json"
+        self.endpoint = endpoint
+        self.execute_query = execute_query
+        self.path = Path(path)
+        self.max_age = max_age
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {
+            "endpoint": endpoint,
+            "updated": None,
+            "types": None,
+            "properties": {},
+            "distinct_values": None,
+        }
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable schema index {self.path}: {e}")
+            return
+        if data.get("endpoint") != self.endpoint:
+            self.logger.warning(f"Schema index {self.path} belongs to another endpoint; ignoring it.")
+            return
+        self._data = data
+        self.logger.info(f"Loaded schema index from {self.path}.")
+        updated = data.get("updated")
+        if self.max_age is not None and updated is not None and time.time() - updated > self.max_age:
+            # Refreshing queries the endpoint, which may be down or slow; the
+            # saved summary is served meanwhile.
+            threading.Thread(target=self._refresh_quietly, name="schema-refresh", daemon=True).start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            self.logger.warning(f"Could not refresh the schema index; serving the saved summary: {e}")
+
+    def save(self) -> None:
+        """Writes the summary to disk."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(self._data, file)
+            os.replace(temporary, self.path)
+
+    def _type_counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = self._data["types"]
+        if counts is None:
+            # Query without holding the lock so that concurrent lookups are not serialized.
+            self.logger.info("Building type summary...")
+            counts = _to_counts(self.execute_query(get_type_counts_query()), "type")
+            with self._lock:
+                self._data["types"] = counts
+                self._data["updated"] = time.time()
+                self.save()
+        return counts
+
+    def _property_counts(self, rdf_type: str) -> Dict[str, int]:
+        with self._lock:
+            counts = self._data["properties"].get(rdf_type)
+        if counts is None:
+            self.logger.info(f"Building property summary for type: {rdf_type}")
+            counts = _to_counts(self.execute_query(get_property_counts_query(rdf_type)), "property")
+            with self._lock:
+                self._data["properties"][rdf_type] = counts
+                self.save()
+        return counts
+
+    def types(self, limit: int = 10) -> List[Dict]:
+        """
+        Returns the most frequent types with their instance counts.
+
+        Args:
+            limit (int): Number of types to return.
+
+        Returns:
+            List[Dict]: Bindings with "type" and "count", largest count first.
+        """
+        return _to_bindings(self._type_counts(), "type", limit)
+
+    def properties(self, rdf_type: str, limit: int = 10) -> List[Dict]:
+        """
+        Returns the most frequent properties of a type with their triple counts.
+
+        Args:
+            rdf_type (str): The RDF type.
+            limit (int): Number of properties to return.
+
+        Returns:
+            List[Dict]: Bindings with "property" and "count", largest count first.
+        """
+        return _to_bindings(self._property_counts(rdf_type), "property", limit)
+
+    def type_total(self) -> int:
+        """Returns the number of distinct types."""
+        return len(self._type_counts())
+
+    def property_total(self, rdf_type: str) -> int:
+        """Returns the number of distinct properties used by instances of a type."""
+        return len(self._property_counts(rdf_type))
+
+    def distinct_values(self, property_uri: str) -> Optional[int]:
+        """
+        Returns the number of distinct values of a property across the graph.
+
+        Args:
+            property_uri (str): The property URI.
+
+        Returns:
+            Optional[int]: The distinct value count, or None if the property is unused.
+        """
+        with self._lock:
+            counts = self._data["distinct_values"]
+        if counts is None:
+            self.logger.info("Building distinct value summary...")
+            counts = _to_counts(self.execute_query(get_distinct_value_counts_query()), "property")
+            with self._lock:
+                self._data["distinct_values"] = counts
+                self.save()
+        return counts.get(property_uri)
+
+    def refresh(self) -> List[str]:
+        """
+        Re-counts the types and drops the property summaries of types whose counts changed.
+
+        Dropped summaries are rebuilt the next time they are requested.
+
+        Returns:
+            List[str]: The types that were added, removed or changed.
+        """
+        self.logger.info("Refreshing schema index...")
+        new = _to_counts(self.execute_query(get_type_counts_query()), "type")
+        with self._lock:
+            old = self._data["types"] or {}
+            changed = [t for t in set(old) | set(new) if old.get(t) != new.get(t)]
+            for rdf_type in changed:
+                self._data["properties"].pop(rdf_type, None)
+            if changed:
+                self._data["distinct_values"] = None
+            self._data["types"] = new
+            self._data["updated"] = time.time()
+            self.save()
+            self.logger.info(f"Schema index refreshed; {len(changed)} types changed.")
+            return changed
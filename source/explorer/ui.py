@@ -1,13 +1,19 @@
 import logging
-from source.util import display_results, export_results_to_json, get_user_selection
+from source.util import display_results, export_results_to_arrow, export_results_to_json, get_user_selection
 from typing import Callable, Dict, List, Optional
 
 
 
 logger = logging.getLogger(__name__)
+# Upper bound offered to the user when the number of available results cannot be queried.
+_DEFAULT_LIMIT = 10
 
 def fetch_and_select(
-    fetch_method: Callable[[int], List[Dict]], key: str, count_key: str, limit: int = 10
+    fetch_method: Callable[[int], List[Dict]],
+    key: str,
+    count_key: str,
+    limit: int = 10,
+    on_results: Optional[Callable[[List[Dict]], None]] = None,
 ) -> Optional[str]:
     """
     Fetches data using a provided method and allows the user to select an option.
@@ -17,6 +23,8 @@ def fetch_and_select(
         key (str): The key for the main value to display and select.
         count_key (str): The key for the count value to display.
         limit (int): Number of results to fetch.
+        on_results (Optional[Callable[[List[Dict]], None]]): Called with the
+            results once they are displayed, before waiting for the user.
 
     Returns:
         Optional[str]: The selected value or None if the user exits.
@@ -29,51 +37,75 @@ def fetch_and_select(
             return None
 
         display_results(results, key=key, count_key=count_key)
+        if on_results is not None:
+            on_results(results)
         return get_user_selection(results, key=key)
     except Exception as e:
         logger.error(f"Error during fetch and select for key '{key}': {e}")
         return None
     
 
-def select_type(explorer) -> Optional[str]:
+def select_type(
+    explorer, on_results: Optional[Callable[[List[Dict]], None]] = None
+) -> Optional[str]:
     """
     Prompts the user to select a type.
 
     Args:
         explorer (KnowledgeGraphExplorer): Explorer instance to fetch types.
+        on_results (Optional[Callable[[List[Dict]], None]]): Called with the
+            displayed types while the user is choosing.
 
     Returns:
         Optional[str]: The selected type or None if user exits.
     """
     logger.info("Starting type selection step.")
-    max_limit = explorer.get_max_types() or 10  # Default to 10 if the query fails
+    max_limit = explorer.get_max_types()
+    if max_limit is None:
+        max_limit = _DEFAULT_LIMIT
+        print(f"Could not determine the number of types; offering up to {max_limit}.")
+    elif max_limit == 0:
+        print("The graph has no typed resources to explore.")
+        return None
     limit = query_user_limit(max_limit, "Enter the number of types to fetch")
     return fetch_and_select(
         fetch_method=explorer.fetch_types,
         key="type",
         count_key="count",
         limit=limit,
+        on_results=on_results,
     )
 
-def select_property(explorer, rdf_type: str) -> Optional[str]:
+def select_property(
+    explorer, rdf_type: str, on_results: Optional[Callable[[List[Dict]], None]] = None
+) -> Optional[str]:
     """
     Prompts the user to select a property for a given type.
 
     Args:
         explorer (KnowledgeGraphExplorer): Explorer instance to fetch properties.
         rdf_type (str): RDF type for which properties are fetched.
+        on_results (Optional[Callable[[List[Dict]], None]]): Called with the
+            displayed properties while the user is choosing.
 
     Returns:
         Optional[str]: The selected property or None if user exits.
     """
     logger.info(f"Starting property selection step for type: {rdf_type}.")
-    max_limit = explorer.get_max_properties(rdf_type) or 10  # Default to 10 if the query fails
+    max_limit = explorer.get_max_properties(rdf_type)
+    if max_limit is None:
+        max_limit = _DEFAULT_LIMIT
+        print(f"Could not determine the number of properties; offering up to {max_limit}.")
+    elif max_limit == 0:
+        print(f"Resources of type {rdf_type} have no properties to explore.")
+        return None
     limit = query_user_limit(max_limit, "Enter the number of properties to fetch")
     return fetch_and_select(
         fetch_method=lambda limit: explorer.fetch_properties(rdf_type, limit),
         key="property",
         count_key="count",
         limit=limit,
+        on_results=on_results,
     )
 
 
@@ -85,7 +117,8 @@ def handle_values(explorer, rdf_type, property_uri, limit=10):
         explorer (KnowledgeGraphExplorer): Explorer instance to fetch values.
         rdf_type (str): RDF type.
         property_uri (str): Property URI.
-        limit (int): Limit for the number of values to fetch.
+        limit (int): Limit for the number of values to fetch. It matches the
+            limit values are prefetched with, so prefetched values are reused.
     """
     logger.info(f"Fetching values for property: {property_uri}.")
     values = explorer.fetch_values(rdf_type, property_uri, limit)
@@ -95,12 +128,28 @@ def handle_values(explorer, rdf_type, property_uri, limit=10):
         print(f"No values found for property: {property_uri}.")
         return
 
+    if len(values) == limit:
+        # Only a full page can leave values out; the total comes from the schema index if there is one.
+        total = explorer.get_max_values(rdf_type, property_uri)
+        if total is not None and total > limit:
+            print(f"Showing the top {limit} of {total} values.")
+
     logger.info("Displaying values for the selected property.")
     display_results(values, key="value", count_key="count")
 
     if input("Do you want to export the results? (y/n): ").strip().lower() == "y":
         logger.info("Exporting results.")
-        export_results_to_json(values)
+        metadata = {
+            "query_name": "property_values",
+            "endpoint": explorer.backend.endpoint,
+            "type": rdf_type,
+            "property": property_uri,
+        }
+        try:
+            export_results_to_arrow(values, metadata=metadata)
+        except RuntimeError:
+            logger.warning("pyarrow is not installed; exporting to JSON instead.")
+            export_results_to_json(values)
 
 def query_user_limit(max_limit: int, prompt: str) -> int:
     """
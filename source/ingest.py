@@ -0,0 +1,61 @@
+import argparse
+import logging
+from source.config.config import load_config
+from source.sparql.backend import LocalRDFBackend, create_backend
+from source.sparql.ingest import DumpIngester
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Load RDF dumps into the local store configured in config.json."
+    )
+    parser.add_argument("dumps", nargs="+", help="N-Triples (or other RDF) dump files.")
+    parser.add_argument("--workers", type=int, help="Number of parser processes.")
+    parser.add_argument(
+        "--chunk-mb", type=int, default=32, help="Size of the chunks parsed by each process."
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Main entry point for the ingestion command.
+    """
+    args = parse_args()
+    config = load_config()
+    local = config.get("local_store", {})
+    if not local.get("path") or local.get("store", "default") == "default":
+        raise RuntimeError(
+            "Ingested triples would be lost: set local_store.store to an on-disk rdflib store "
+            "(e.g. BerkeleyDB or Oxigraph) and local_store.path in config.json."
+        )
+    config["backend"] = "local"
+    backend = create_backend(config)
+    if not isinstance(backend, LocalRDFBackend):
+        raise RuntimeError("Dumps can only be ingested into a local store.")
+
+    try:
+        # DumpIngester refuses other in-memory stores, e.g. "Memory".
+        ingester = DumpIngester(
+            backend, max_workers=args.workers, chunk_bytes=args.chunk_mb * 1024 * 1024
+        )
+        written = ingester.ingest_all(args.dumps)
+        logger.info(f"Ingested {written} triples into {backend.endpoint}.")
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.critical(f"An unrecoverable error occurred: {e}", exc_info=True)
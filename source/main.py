@@ -1,20 +1,36 @@
+import argparse
 import logging
 from pathlib import Path
 from source.sparql.manager import QueryManager
+from source.sparql.aggregate import AggregationEngine
+from source.sparql.store import ResultStore
+from source.sparql.refresh import IncrementalRefresher
 from source.sparql.executor import SPARQLQueryExecutor
-from source.sparql.process import convert_bindings_to_dataframe
+from source.sparql.cache import create_cache
+from source.sparql.batch import BatchQueryRunner
+from source.sparql.backend import create_backend
+from source.config.config import load_config
+from source.sparql.process import convert_bindings_to_columns
+from source.sparql.tracing import get_tracer, span
 from source.util import (
     list_dir_files,
     list_and_select_query,
     display_sorted_results,
     select_from_list,
+    export_results_to_json,
+    get_dir,
+    get_timestamp,
 )
+from typing import List, Optional
 import traceback
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Query file of the non-interactive modes when --query-file is not given.
+DEFAULT_QUERY_FILE = "files/queries.json"
+
 
 def select_query_file(directory: str) -> Path:
     """
@@ -36,7 +52,7 @@ def select_query_file(directory: str) -> Path:
 
 
 def execute_and_display_query(
-    query_manager: QueryManager, sparql_executor: SPARQLQueryExecutor
+    query_manager: QueryManager, sparql_executor: SPARQLQueryExecutor, refresh: bool = False
 ):
     """
     Handles query selection, execution, and displaying results.
@@ -44,6 +60,7 @@ def execute_and_display_query(
     Args:
         query_manager (QueryManager): Instance of QueryManager to manage queries.
         sparql_executor (SPARQLQueryExecutor): Instance of SPARQLQueryExecutor to execute queries.
+        refresh (bool): Re-executes the query instead of using a cached result.
     """
     try:
         # List and select query
@@ -53,7 +70,8 @@ def execute_and_display_query(
         logger.info(f"Selected query: {query_name}")
 
         # Execute query
-        results = sparql_executor.execute_query(query)
+        with span("query", query_name=query_name):
+            results = sparql_executor.execute_query(query, refresh=refresh)
 
         # Extract and process bindings
         bindings = sparql_executor.extract_bindings(results)
@@ -62,11 +80,11 @@ def execute_and_display_query(
             return
 
         # Convert to DataFrame
-        df = convert_bindings_to_dataframe(bindings)
+        df = convert_bindings_to_columns(bindings, sparql_executor.extract_head(results).get("vars"))
 
         # Display sorted results as an example
         if "value" in df.columns and "count" in df.columns:
-            display_sorted_results(df.to_dict("records"), "value", "count")
+            display_sorted_results(df, "value", "count")
         else:
             logger.info("\nQuery Results Preview:")
             logger.info(f"\n{df.head()}")
@@ -76,26 +94,236 @@ def execute_and_display_query(
         logger.error(traceback.format_exc())
 
 
+def execute_batch(
+    query_manager: QueryManager,
+    sparql_executor: SPARQLQueryExecutor,
+    query_names: List[str],
+    max_workers: int,
+    rate_limit: Optional[float],
+    output: str = "files/results/batch",
+):
+    """
+    Executes several queries concurrently, writes each query's results and logs a timing summary.
+
+    Args:
+        query_manager (QueryManager): Instance of QueryManager to manage queries.
+        sparql_executor (SPARQLQueryExecutor): Instance of SPARQLQueryExecutor to execute queries.
+        query_names (List[str]): Names of the queries to run, or empty for all.
+        max_workers (int): Maximum number of concurrent queries.
+        rate_limit (Optional[float]): Maximum number of requests per second.
+        output (str): Directory the results are written to, one JSON file per query.
+    """
+    runner = BatchQueryRunner(
+        query_manager, sparql_executor, max_workers=max_workers, rate_limit=rate_limit
+    )
+    directory = get_dir(output)
+    timestamp = get_timestamp()
+    for result in runner.run(query_names):
+        if result.ok:
+            bindings = sparql_executor.extract_bindings(result.results)
+            export_results_to_json(bindings, f"{directory}/{result.name}_{timestamp}")
+            logger.info(f"{result.name:<45} {result.elapsed:>8.2f}s {len(bindings):>8} rows")
+        else:
+            logger.info(f"{result.name:<45} {result.elapsed:>8.2f}s failed: {result.error}")
+
+
+def execute_refresh(
+    query_manager: QueryManager,
+    sparql_executor: SPARQLQueryExecutor,
+    query_names: List[str],
+    force: bool,
+):
+    """
+    Refreshes stored query results, re-executing only queries whose inputs changed.
+
+    Args:
+        query_manager (QueryManager): Instance of QueryManager to manage queries.
+        sparql_executor (SPARQLQueryExecutor): Instance of SPARQLQueryExecutor to execute queries.
+        query_names (List[str]): Names of the queries to refresh, or empty for all.
+        force (bool): Re-executes every query.
+    """
+    refresher = IncrementalRefresher(query_manager, sparql_executor)
+    results = refresher.refresh(query_names, force=force)
+    for result in results:
+        status = "recomputed" if result.recomputed else "reused"
+        logger.info(f"{result.name:<45} {status:<10} {result.reason}")
+    recomputed = sum(result.recomputed for result in results)
+    logger.info(f"Refresh finished: {recomputed} of {len(results)} queries recomputed.")
+
+
+def _parse_pairs(pairs: Optional[List[str]], option: str) -> dict:
+    """Parses NAME=VALUE command line arguments into a dictionary."""
+    parsed = {}
+    for pair in pairs or []:
+        name, separator, value = pair.partition("=")
+        if not separator:
+            raise ValueError(f"Expected NAME=VALUE for {option}, got '{pair}'.")
+        parsed[name] = value
+    return parsed
+
+
+def execute_aggregate(
+    query_manager: QueryManager,
+    sparql_executor: SPARQLQueryExecutor,
+    args: argparse.Namespace,
+):
+    """
+    Groups and counts a raw dataset locally and logs the result table.
+
+    Args:
+        query_manager (QueryManager): Instance of QueryManager providing the dataset.
+        sparql_executor (SPARQLQueryExecutor): Instance of SPARQLQueryExecutor fetching it.
+        args (argparse.Namespace): The parsed `--aggregate` options.
+    """
+    if not args.by:
+        raise ValueError("--aggregate needs at least one --by column.")
+    engine = AggregationEngine(query_manager, sparql_executor, store=ResultStore("files/results/datasets"))
+    result = engine.group_by(
+        args.aggregate,
+        args.by,
+        count_distinct=_parse_pairs(args.distinct, "--distinct"),
+        contains=_parse_pairs(args.contains, "--contains"),
+        sort=args.sort,
+        ascending=args.ascending,
+        limit=args.limit,
+    )
+    logger.info(f"\n{result.to_string(index=False)}")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Run SPARQL queries from a query file.")
+    parser.add_argument(
+        "--query-file",
+        metavar="PATH",
+        help="The query file. Interactive mode asks for one in files/ if not given; "
+        f"the other modes default to {DEFAULT_QUERY_FILE}.",
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="*",
+        metavar="QUERY",
+        help="Run the named queries (or all queries if none are named) concurrently.",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent queries in batch mode.")
+    parser.add_argument(
+        "--output",
+        default="files/results/batch",
+        metavar="DIR",
+        help="Directory batch mode writes each query's results to.",
+    )
+    parser.add_argument("--rate", type=float, help="Maximum requests per second in batch mode.")
+    parser.add_argument(
+        "--refresh",
+        nargs="*",
+        metavar="QUERY",
+        help="Update the stored results of the named queries (or all queries), "
+        "re-executing only those whose inputs changed.",
+    )
+    parser.add_argument("--force", action="store_true", help="Re-execute every query in refresh mode.")
+    parser.add_argument(
+        "--aggregate",
+        metavar="DATASET",
+        help="Group and count a dataset from the query file locally instead of on the endpoint.",
+    )
+    parser.add_argument("--by", action="append", metavar="COLUMN", help="Grouping column for --aggregate.")
+    parser.add_argument(
+        "--distinct",
+        action="append",
+        metavar="NAME=COLUMN",
+        help="Count the distinct values of COLUMN per group as NAME.",
+    )
+    parser.add_argument(
+        "--contains",
+        action="append",
+        metavar="COLUMN=TEXT",
+        help="Only aggregate rows whose COLUMN contains TEXT, ignoring case.",
+    )
+    parser.add_argument("--sort", metavar="COLUMN", help="Order the groups by COLUMN.")
+    parser.add_argument("--ascending", action="store_true", help="Sort the groups in ascending order.")
+    parser.add_argument("--limit", type=int, help="Maximum number of groups shown.")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the result cache configured in config.json.",
+    )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Re-execute the selected query and replace its cached result.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write timing spans as JSON lines to PATH and log a profile report.",
+    )
+    return parser.parse_args()
+
+
 def main():
     """
     Main entry point for the application.
     """
+    args = parse_args()
+    get_tracer().enabled = bool(args.trace)
     try:
-        # Select query file
-        query_file_path = select_query_file("files")
+        # Select query file; only the interactive mode prompts for one.
+        interactive = args.aggregate is None and args.refresh is None and args.batch is None
+        if args.query_file:
+            query_file_path = Path(args.query_file).resolve()
+        elif interactive:
+            query_file_path = select_query_file("files")
+        else:
+            query_file_path = Path(DEFAULT_QUERY_FILE).resolve()
         logger.info(f"Using query file: {query_file_path}")
 
         # Initialize components
-        endpoint = "https://nfdi4culture.de/sparql"
+        config = load_config()
+        backend = create_backend(config)
         query_manager = QueryManager(query_file_path)
-        sparql_executor = SPARQLQueryExecutor(endpoint)
+        sparql_executor = SPARQLQueryExecutor(
+            backend.endpoint, cache=None if args.no_cache else create_cache(config), backend=backend
+        )
 
         # Execute query and display results
-        execute_and_display_query(query_manager, sparql_executor)
+        if args.aggregate is not None:
+            execute_aggregate(query_manager, sparql_executor, args)
+        elif args.refresh is not None:
+            execute_refresh(query_manager, sparql_executor, args.refresh, args.force)
+        elif args.batch is not None:
+            execute_batch(
+                query_manager, sparql_executor, args.batch, args.workers, args.rate, args.output
+            )
+        else:
+            execute_and_display_query(query_manager, sparql_executor, args.refresh_cache)
+        if sparql_executor.cache is not None:
+            logger.info(f"Result cache statistics: {sparql_executor.cache.stats()}")
 
     except Exception as e:
         logger.error("Critical error in main execution:")
         logger.error(traceback.format_exc())
+    finally:
+        if args.trace:
+            report_trace(args.trace)
+
+
+def report_trace(path: str):
+    """
+    Exports the recorded spans and logs the session profile.
+
+    Args:
+        path (str): JSON lines file the spans are written to.
+    """
+    tracer = get_tracer()
+    count = tracer.export_jsonl(path)
+    logger.info(f"Wrote {count} spans to {path}.")
+    logger.info(f"Profile by stage:\n{tracer.report()}")
+    logger.info(f"Profile by query:\n{tracer.report('query_name')}")
 
 
 if __name__ == "__main__":
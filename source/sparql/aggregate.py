@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+
+from .executor import SPARQLQueryExecutor
+from .manager import QueryManager
+from .paginate import projected_variables
+from .process import convert_bindings_to_columns
+from .store import ResultStore
+from .tracing import span
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+_YEAR = r"(-?\d{4})"
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    return series.astype("string")
+
+
+def contains_mask(series: pd.Series, text: str) -> np.ndarray:
+    """
+    Tests which values of a column contain a substring, ignoring case.
+
+    Categorical columns are tested once per category instead of once per row.
+
+    Args:
+        series (pd.Series): The column.
+        text (str): The substring.
+
+    Returns:
+        np.ndarray: A boolean mask, False for missing values.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        matches = _as_text(pd.Series(series.cat.categories)).str.contains(text, case=False, regex=False)
+        matches = np.append(matches.fillna(False).to_numpy(dtype=bool), False)
+        # Missing values have code -1, which picks the trailing False.
+        return matches[series.cat.codes.to_numpy()]
+    return _as_text(series).str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+
+
+def year_of(series: pd.Series) -> pd.Series:
+    """
+    Extracts the year from dates or from the first four-digit number in a text.
+
+    Args:
+        series (pd.Series): A datetime column or a column of date strings.
+
+    Returns:
+        pd.Series: The years as nullable integers.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.year.astype("Int64")
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype("Int64")
+    return pd.to_numeric(_as_text(series).str.extract(_YEAR, expand=False), errors="coerce").astype("Int64")
+
+
+def decade_of(series: pd.Series) -> pd.Series:
+    """
+    Rounds years down to their decade.
+
+    Args:
+        series (pd.Series): Years as integers.
+
+    Returns:
+        pd.Series: The decades, e.g. 1820 for 1827.
+    """
+    return (series // 10) * 10
+
+
+def derive_columns(df: pd.DataFrame, derived: Dict[str, Dict[str, str]]) -> pd.DataFrame:
+    """
+    Adds computed columns to a dataset, in the order they are defined.
+
+    Each definition has one of the forms `{"year_of": column}`,
+    `{"decade_of": column}` or `{"match": column, "pattern": regex}`, the
+    latter taking the regex's first group.
+
+    Args:
+        df (pd.DataFrame): The raw bindings as columns.
+        derived (Dict[str, Dict[str, str]]): Column names and their definitions.
+
+    Returns:
+        pd.DataFrame: The dataset with the derived columns added.
+
+    Raises:
+        ValueError: If a definition is not understood.
+    """
+    for name, definition in derived.items():
+        if "year_of" in definition:
+            df[name] = year_of(df[definition["year_of"]])
+        elif "decade_of" in definition:
+            df[name] = decade_of(df[definition["decade_of"]])
+        elif "match" in definition:
+            df[name] = _as_text(df[definition["match"]]).str.extract(definition["pattern"], expand=False)
+        else:
+            raise ValueError(f"Unknown definition of derived column '{name}': {definition}")
+    return df
+
+
+class AggregationEngine:
+    """Answers group-bys, distinct counts and filters locally over raw datasets fetched once.
+
+    A dataset is a query for the raw triple pattern behind several
+    aggregate queries (see "datasets" in the query file). Its bindings are
+    fetched once, converted to typed columns and kept in memory, so that
+    each new slicing is a vectorized pandas operation instead of another
+    GROUP BY on the endpoint.
+    """
+
+    def __init__(
+        self,
+        query_manager: QueryManager,
+        executor: SPARQLQueryExecutor,
+        store: Optional[ResultStore] = None,
+        max_age: Optional[float] = 24 * 60 * 60,
+        page_size: int = 10_000,
+        debug: bool = False,
+    ):
+        """
+        Initializes the AggregationEngine.
+
+        Args:
+            query_manager (QueryManager): Source of the dataset definitions.
+            executor (SPARQLQueryExecutor): Executor used to fetch the raw bindings.
+            store (Optional[ResultStore]): Store the columnar datasets are kept
+                in between sessions. Requires pyarrow.
+            max_age (Optional[float]): Seconds a stored dataset is reused before
+                it is fetched again. None reuses it until `refresh` is requested.
+            page_size (int): Rows fetched per request, so that large datasets are
+                not cut off by the endpoint's result limit.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.query_manager = query_manager
+        self.executor = executor
+        self.store = store
+        self.max_age = max_age
+        self.page_size = page_size
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _load_stored(self, name: str) -> Optional[pd.DataFrame]:
+        if self.store is None:
+            return None
+        try:
+            path = self.store.latest(name)
+            if path is None:
+                return None
+            if self.max_age is not None and time.time() - path.stat().st_mtime > self.max_age:
+                self.logger.debug(f"Stored dataset '{name}' is older than {self.max_age}s.")
+                return None
+            return self.store.load_dataframe(str(path))
+        except RuntimeError as e:
+            self.logger.debug(f"Not using stored dataset '{name}': {e}")
+            return None
+
+    def _fetch(self, name: str, refresh: bool) -> pd.DataFrame:
+        dataset = self.query_manager.get_dataset(name)
+        df = None if refresh else self._load_stored(name)
+        if df is None:
+            self.logger.info(f"Fetching dataset '{name}'...")
+            # The raw bindings are kept in the store, so they are not cached as well.
+            pages = self.executor.iter_pages(dataset["query"], self.page_size, use_cache=False)
+            bindings = [binding for page in pages for binding in page]
+            variables = projected_variables(dataset["query"])
+            df = convert_bindings_to_columns(bindings, variables)
+            if self.store is not None:
+                try:
+                    self.store.save(name, bindings, variables, endpoint=self.executor.endpoint)
+                except RuntimeError as e:
+                    self.logger.debug(f"Not storing dataset '{name}': {e}")
+        return derive_columns(df, dataset["derived"])
+
+    def frame(self, name: str, refresh: bool = False) -> pd.DataFrame:
+        """
+        Returns a dataset as typed columns, fetching it on first use.
+
+        Args:
+            name (str): The dataset name.
+            refresh (bool): Fetches the dataset again, bypassing all caches.
+
+        Returns:
+            pd.DataFrame: One row per binding of the raw pattern, plus the
+            dataset's derived columns. Callers must not modify it.
+
+        Raises:
+            ValueError: If the dataset does not exist.
+            RuntimeError: If fetching the dataset fails.
+        """
+        with self._lock:
+            if refresh or name not in self._frames:
+                with span("aggregate.fetch", dataset=name) as fetch_span:
+                    self._frames[name] = self._fetch(name, refresh)
+                    fetch_span.set(rows=len(self._frames[name]))
+            return self._frames[name]
+
+    def _mask(
+        self,
+        df: pd.DataFrame,
+        where: Optional[Dict[str, Any]],
+        contains: Optional[Dict[str, str]],
+    ) -> Optional[np.ndarray]:
+        mask = None
+        for column, value in (where or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                condition = df[column].isin(list(value)).to_numpy(dtype=bool)
+            else:
+                condition = (df[column] == value).fillna(False).to_numpy(dtype=bool)
+            mask = condition if mask is None else mask & condition
+        for column, text in (contains or {}).items():
+            condition = contains_mask(df[column], text)
+            mask = condition if mask is None else mask & condition
+        return mask
+
+    def filter(
+        self,
+        name: str,
+        where: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, str]] = None,
+        columns: Optional[List[str]] = None,
+        distinct: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Selects the rows of a dataset matching all conditions.
+
+        Args:
+            name (str): The dataset name.
+            where (Optional[Dict[str, Any]]): Columns and the value (or list of
+                values) they must equal.
+            contains (Optional[Dict[str, str]]): Columns and a substring they
+                must contain, ignoring case.
+            columns (Optional[List[str]]): Columns to return. All by default.
+            distinct (bool): Drops duplicate rows, like SELECT DISTINCT.
+
+        Returns:
+            pd.DataFrame: The matching rows.
+        """
+        with span("aggregate.filter", dataset=name) as filter_span:
+            df = self.frame(name)
+            mask = self._mask(df, where, contains)
+            result = df[mask] if mask is not None else df
+            if columns is not None:
+                result = result[columns]
+            if distinct:
+                result = result.drop_duplicates()
+            filter_span.set(rows=len(result))
+            return result.reset_index(drop=True)
+
+    def group_by(
+        self,
+        name: str,
+        by: Union[str, List[str]],
+        count_distinct: Optional[Dict[str, str]] = None,
+        count: Optional[Dict[str, str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, str]] = None,
+        sort: Optional[str] = None,
+        ascending: bool = False,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Groups the rows of a dataset and counts per group, like a SPARQL GROUP BY.
+
+        Rows with a missing grouping value are left out.
+
+        Args:
+            name (str): The dataset name.
+            by (Union[str, List[str]]): The grouping column(s), e.g. "decade".
+            count_distinct (Optional[Dict[str, str]]): Output names and the
+                column whose distinct values are counted, like COUNT(DISTINCT ?x).
+            count (Optional[Dict[str, str]]): Output names and the column whose
+                bound values are counted, like COUNT(?x).
+            where (Optional[Dict[str, Any]]): Row conditions, see `filter`.
+            contains (Optional[Dict[str, str]]): Substring conditions, see `filter`.
+            sort (Optional[str]): Column to order the groups by, e.g. "decade".
+                Defaults to the first count.
+            ascending (bool): Sorts in ascending order.
+            limit (Optional[int]): Maximum number of groups returned.
+
+        Returns:
+            pd.DataFrame: One row per group with the grouping columns and counts.
+            Without any counts given, the number of rows per group is returned
+            as "count".
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        aggregations = {
+            **{output: (column, "nunique") for output, column in (count_distinct or {}).items()},
+            **{output: (column, "count") for output, column in (count or {}).items()},
+        }
+        with span("aggregate.group_by", dataset=name, by=",".join(by)) as group_span:
+            df = self.frame(name)
+            mask = self._mask(df, where, contains)
+            rows = df[mask] if mask is not None else df
+            groups = rows.groupby(by, observed=True, dropna=True, sort=False)
+            if aggregations:
+                result = groups.agg(**aggregations).reset_index()
+            else:
+                result = groups.size().rename("count").reset_index()
+
+            sort = sort or next(iter(aggregations), "count")
+            result = result.sort_values(sort, ascending=ascending, kind="stable")
+            if limit is not None:
+                result = result.head(limit)
+            group_span.set(rows=len(result))
+            return result.reset_index(drop=True)
+
+    def loaded_datasets(self) -> List[str]:
+        """Returns the names of the datasets held in memory."""
+        with self._lock:
+            return sorted(self._frames)
+
+    def clear(self) -> None:
+        """Forgets the datasets held in memory."""
+        with self._lock:
+            self._frames.clear()
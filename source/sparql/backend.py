@@ -0,0 +1,185 @@
+import io
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .tracing import span
+
+
+class SPARQLBackend(ABC):
+    """Interface of anything that can answer SPARQL queries with SPARQL JSON results."""
+
+    endpoint: str
+
+    @abstractmethod
+    def query(self, query: str) -> Dict[str, Any]:
+        """
+        Executes a query and returns the decoded SPARQL JSON results.
+
+        Args:
+            query (str): The SPARQL query string.
+
+        Returns:
+            Dict[str, Any]: The query results in JSON format.
+        """
+
+    @abstractmethod
+    @contextmanager
+    def stream(self, query: str) -> Iterator[BinaryIO]:
+        """
+        Executes a query and yields the SPARQL JSON results as a readable stream.
+
+        Args:
+            query (str): The SPARQL query string.
+
+        Yields:
+            BinaryIO: The serialized SPARQL JSON results.
+        """
+
+    def close(self) -> None:
+        """Releases any resources held by the backend."""
+
+
+# rdflib store plugins that keep the graph in memory only.
+_MEMORY_STORES = {"default", "Memory", "SimpleMemory"}
+
+
+class LocalRDFBackend(SPARQLBackend):
+    """Answers SPARQL queries from a local rdflib graph, optionally kept in a persistent store."""
+
+    def __init__(
+        self,
+        sources: Optional[List[str]] = None,
+        store: str = "default",
+        store_path: Optional[str] = None,
+        debug: bool = False,
+    ):
+        """
+        Initializes the LocalRDFBackend.
+
+        Args:
+            sources (Optional[List[str]]): RDF dump files (N-Triples, Turtle, ...)
+                loaded into the graph on start-up.
+            store (str): Name of the rdflib store plugin, e.g. "BerkeleyDB" or
+                "Oxigraph" for an on-disk store. "default" keeps the graph in memory.
+            store_path (Optional[str]): Location of the persistent store. Required
+                for on-disk stores; existing contents are reused.
+            debug (bool): Enables debug-level logging if True.
+        """
+        from rdflib import Graph
+        from rdflib.plugin import PluginException
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.store_path = store_path
+        # In-memory stores accept a path but keep nothing there.
+        self.persistent = bool(store_path) and store not in _MEMORY_STORES
+        self.endpoint = f"local:{Path(store_path).resolve()}" if store_path else "local:memory"
+        self._lock = threading.RLock()
+
+        try:
+            self.graph = Graph(store=store)
+        except PluginException as e:
+            raise RuntimeError(
+                f"rdflib store '{store}' is not available; install its plugin: {e}"
+            ) from e
+        if store_path:
+            Path(store_path).parent.mkdir(parents=True, exist_ok=True)
+            self.graph.open(store_path, create=True)
+            self.logger.info(f"Opened {store} store at {store_path} ({len(self.graph)} triples).")
+
+        for source in sources or []:
+            self.load(source)
+
+    def load(self, path: str, format: Optional[str] = None) -> int:
+        """
+        Parses an RDF file into the graph.
+
+        Args:
+            path (str): Path of the RDF file.
+            format (Optional[str]): rdflib parser name. Guessed from the file extension if None.
+
+        Returns:
+            int: The number of triples in the graph after loading.
+        """
+        from rdflib.util import guess_format
+
+        format = format or guess_format(path) or "nt"
+        with self._lock:
+            self.logger.info(f"Loading {path} ({format})...")
+            self.graph.parse(path, format=format)
+            self.logger.info(f"Graph now holds {len(self.graph)} triples.")
+            return len(self.graph)
+
+    def add_triples(self, triples: Iterable[Tuple[Any, Any, Any]]) -> None:
+        """
+        Adds triples to the graph and commits them if the store is persistent.
+
+        Args:
+            triples (Iterable[Tuple[Any, Any, Any]]): rdflib (subject, predicate, object) terms.
+        """
+        with self._lock:
+            self.graph.addN((s, p, o, self.graph) for s, p, o in triples)
+            if self.store_path:
+                self.graph.commit()
+
+    def _serialize(self, query: str) -> bytes:
+        with self._lock:
+            return self.graph.query(query).serialize(format="json")
+
+    def query(self, query: str) -> Dict[str, Any]:
+        with span("local.query", endpoint=self.endpoint) as query_span:
+            body = self._serialize(query)
+            query_span.set(bytes=len(body))
+        with span("json.decode", bytes=len(body)):
+            return json.loads(body)
+
+    @contextmanager
+    def stream(self, query: str) -> Iterator[BinaryIO]:
+        yield io.BytesIO(self._serialize(query))
+
+    def close(self) -> None:
+        with self._lock:
+            self.graph.close(commit_pending_transaction=True)
+
+
+def create_backend(config: Dict[str, Any]) -> SPARQLBackend:
+    """
+    Creates the backend selected by the application configuration.
+
+    Args:
+        config (Dict[str, Any]): The configuration, see `source/config/config.json`.
+            `backend` is "remote" (default) to query `endpoint` over HTTP, or
+            "local" to query the graph described by `local_store`. A remote
+            backend is wrapped with retries, adaptive timeouts and a circuit
+            breaker configured by `resilience`, unless it is set to null.
+
+    Returns:
+        SPARQLBackend: The configured backend.
+
+    Raises:
+        ValueError: If the backend type is unknown.
+    """
+    backend_type = config.get("backend", "remote")
+    if backend_type == "remote":
+        from .transport import get_transport
+
+        transport = get_transport(config["endpoint"], **config.get("transport", {}))
+        resilience = config.get("resilience", {})
+        if resilience is None:
+            return transport
+        from .resilience import ResilientBackend
+
+        return ResilientBackend(transport, **resilience)
+    if backend_type == "local":
+        local = config.get("local_store", {})
+        return LocalRDFBackend(
+            sources=local.get("sources"),
+            store=local.get("store", "default"),
+            store_path=local.get("path"),
+        )
+    raise ValueError(f"Unknown backend type: {backend_type}")
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .executor import SPARQLQueryExecutor
+from .manager import QueryManager
+from .tracing import span
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one query in a batch run."""
+
+    name: str
+    results: Optional[Dict[str, Any]]
+    elapsed: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RateLimiter:
+    """Spaces out calls so that at most `rate` of them start per second."""
+
+    def __init__(self, rate: float):
+        """
+        Initializes the RateLimiter.
+
+        Args:
+            rate (float): Maximum number of calls per second.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Blocks until the caller may start its next call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BatchQueryRunner:
+    """Runs many queries from a query file concurrently against one endpoint."""
+
+    def __init__(
+        self,
+        query_manager: QueryManager,
+        executor: SPARQLQueryExecutor,
+        max_workers: int = 4,
+        rate_limit: Optional[float] = None,
+        debug: bool = False,
+    ):
+        """
+        Initializes the BatchQueryRunner.
+
+        Args:
+            query_manager (QueryManager): Source of the queries to run.
+            executor (SPARQLQueryExecutor): Executor used to run each query.
+            max_workers (int): Maximum number of queries in flight at once.
+            rate_limit (Optional[float]): Maximum number of requests started
+                per second against the endpoint. Unlimited if None.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.query_manager = query_manager
+        self.executor = executor
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    def _run_one(self, name: str) -> BatchResult:
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        start = time.perf_counter()
+        try:
+            with span("batch.query", query_name=name):
+                results = self.executor.execute_query(self.query_manager.get_query(name))
+            elapsed = time.perf_counter() - start
+            self.logger.info(f"Query '{name}' finished in {elapsed:.2f}s.")
+            return BatchResult(name, results, elapsed)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            self.logger.error(f"Query '{name}' failed after {elapsed:.2f}s: {e}")
+            return BatchResult(name, None, elapsed, error=str(e))
+
+    def run(self, query_names: Optional[List[str]] = None) -> List[BatchResult]:
+        """
+        Runs the given queries concurrently.
+
+        Args:
+            query_names (Optional[List[str]]): Names of the queries to run.
+                Runs every query in the file if None.
+
+        Returns:
+            List[BatchResult]: One result per query, in the order requested.
+        """
+        names = list(query_names) if query_names else list(self.query_manager.list_queries())
+        self.logger.info(f"Running {len(names)} queries with {self.max_workers} workers...")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            batch = list(pool.map(self._run_one, names))
+        failed = sum(not result.ok for result in batch)
+        self.logger.info(
+            f"Batch finished in {time.perf_counter() - start:.2f}s "
+            f"({len(batch) - failed} succeeded, {failed} failed)."
+        )
+        return batch
@@ -0,0 +1,407 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .normalize import canonicalize_query
+
+# Passed as `ttl` to use the cache-wide time-to-live; None means "never expires".
+DEFAULT_TTL: Any = object()
+
+
+class ResultCache:
+    """Persistent, size-bounded cache of SPARQL query results backed by SQLite."""
+
+    def __init__(
+        self,
+        path: str = "files/results/cache.sqlite",
+        ttl: Optional[float] = 24 * 60 * 60,
+        max_bytes: int = 256 * 1024 * 1024,
+        stale_for: Optional[float] = 7 * 24 * 60 * 60,
+        debug: bool = False,
+    ):
+        """
+        Initializes the ResultCache.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            ttl (Optional[float]): Default time-to-live of an entry in seconds.
+                None keeps entries until they are evicted.
+            max_bytes (int): Upper bound for the total size of the stored
+                (compressed) results. Least recently used entries are evicted
+                once it is exceeded.
+            stale_for (Optional[float]): Seconds an expired entry is kept so
+                that it can still be served while the endpoint is unavailable,
+                see `get(allow_stale=True)`. None keeps expired entries until
+                they are evicted for size.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_for = stale_for
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                query TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                expires REAL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(endpoint: str, query: str) -> str:
+        """
+        Builds the cache key for a query sent to an endpoint.
+
+        Queries that differ only in whitespace, prefix declarations, keyword
+        case or variable names share a key.
+
+        Args:
+            endpoint (str): The SPARQL endpoint URL.
+            query (str): The SPARQL query string.
+
+        Returns:
+            str: A hex digest identifying the canonical query and endpoint.
+        """
+        digest = hashlib.sha256()
+        digest.update(endpoint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(canonicalize_query(query).key.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _stale_deadline(self, expires: float) -> Optional[float]:
+        """Returns when an entry that expired at `expires` may no longer be served stale."""
+        return None if self.stale_for is None else expires + self.stale_for
+
+    def get(self, endpoint: str, query: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Looks up the cached results of a query.
+
+        Args:
+            endpoint (str): The SPARQL endpoint URL.
+            query (str): The SPARQL query string.
+            allow_stale (bool): Also returns an expired entry that is still
+                within its `stale_for` period, e.g. when the endpoint cannot
+                be reached.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached results, or None on a miss.
+        """
+        key = self.make_key(endpoint, query)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT expires, payload FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            expires, payload = row
+            if expires is not None and expires <= now:
+                deadline = self._stale_deadline(expires)
+                if deadline is not None and deadline <= now:
+                    self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._connection.commit()
+                    self.expirations += 1
+                    self.misses += 1
+                    self.logger.debug(f"Cache entry expired: {key}")
+                    return None
+                if not allow_stale:
+                    self.misses += 1
+                    self.logger.debug(f"Cache entry is stale: {key}")
+                    return None
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            self._connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._connection.commit()
+        self.logger.debug(f"Cache hit: {key}")
+        results = json.loads(zlib.decompress(payload).decode("utf-8"))
+        return canonicalize_query(query).from_canonical(results)
+
+    def set(
+        self,
+        endpoint: str,
+        query: str,
+        results: Dict[str, Any],
+        ttl: Optional[float] = DEFAULT_TTL,
+    ) -> None:
+        """
+        Stores the results of a query and evicts old entries if necessary.
+
+        Args:
+            endpoint (str): The SPARQL endpoint URL.
+            query (str): The SPARQL query string.
+            results (Dict[str, Any]): The query results in JSON format.
+            ttl (Optional[float]): Time-to-live of this entry in seconds.
+                Defaults to the cache-wide TTL; None keeps the entry until it
+                is evicted.
+        """
+        key = self.make_key(endpoint, query)
+        canonical = canonicalize_query(query)
+        # Stored under canonical variable names so that renamed variants can share the entry.
+        payload = zlib.compress(
+            json.dumps(canonical.to_canonical(results), separators=(",", ":")).encode("utf-8")
+        )
+        if len(payload) > self.max_bytes:
+            self.logger.warning(
+                f"Result of {len(payload)} bytes exceeds the cache size limit; not cached."
+            )
+            return
+
+        now = time.time()
+        ttl = self.ttl if ttl is DEFAULT_TTL else ttl
+        expires = now + ttl if ttl is not None else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, canonical.text, now, now, expires, len(payload), payload),
+            )
+            self._evict()
+            self._connection.commit()
+        self.logger.debug(f"Cached {len(payload)} bytes under {key}")
+
+    def _evict(self) -> None:
+        """Drops entries past their stale period, then least recently used ones until under the size cap."""
+        if self.stale_for is not None:
+            cursor = self._connection.execute(
+                "DELETE FROM results WHERE expires IS NOT NULL AND expires <= ?",
+                (time.time() - self.stale_for,),
+            )
+            self.expirations += max(cursor.rowcount, 0)
+
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM results ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+            self.logger.debug(f"Evicted cache entry: {key}")
+
+    def invalidate(self, endpoint: str, query: str) -> None:
+        """
+        Removes the cached results of a query, if present.
+
+        Args:
+            endpoint (str): The SPARQL endpoint URL.
+            query (str): The SPARQL query string.
+        """
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM results WHERE key = ?", (self.make_key(endpoint, query),)
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        """Removes all cached results."""
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss statistics and the current cache footprint.
+
+        Returns:
+            Dict[str, Any]: Counters, entry count and total stored bytes.
+        """
+        with self._lock:
+            entries, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def create_cache(config: Dict[str, Any]) -> Optional[ResultCache]:
+    """
+    Creates the result cache configured by the application configuration.
+
+    Args:
+        config (Dict[str, Any]): The configuration, see `source/config/config.json`.
+            Its `cache` section holds the `ResultCache` arguments, e.g. `path`,
+            `ttl` (null never expires entries) and `max_bytes`. Setting it to null
+            or `enabled` to false disables the cache.
+
+    Returns:
+        Optional[ResultCache]: The cache, or None if it is disabled.
+    """
+    settings = config.get("cache", {})
+    if settings is None:
+        return None
+    settings = dict(settings)
+    if not settings.pop("enabled", True):
+        return None
+    return ResultCache(**settings)
+
+
+def _approximate_size(obj: Any) -> int:
+    """
+    Estimates the memory footprint of a JSON-like object in bytes.
+
+    Args:
+        obj (Any): A nested structure of dicts, lists and scalars.
+
+    Returns:
+        int: The approximate size in bytes, including contained objects.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approximate_size(k) + _approximate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_approximate_size(item) for item in obj)
+    return size
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache bounded by the approximate byte size of its values."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: Optional[int] = None):
+        """
+        Initializes the LRUCache.
+
+        Args:
+            max_bytes (int): Upper bound for the approximate size of all stored values.
+            max_entries (Optional[int]): Optional upper bound for the number of entries.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the value stored under a key and marks it as recently used.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """
+        Stores a value, evicting least recently used entries to stay within bounds.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            size (Optional[int]): The size of the value in bytes. Estimated if omitted.
+        """
+        size = _approximate_size(value) if size is None else size
+        if size > self.max_bytes:
+            self.logger.warning(
+                f"Value of ~{size} bytes exceeds the cache size limit; not cached."
+            )
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes or (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/eviction counters and the current footprint.
+
+        Returns:
+            Dict[str, Any]: Counters, entry count and approximate stored bytes.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,365 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+# This module is imported by short-lived clients, so it only depends on the
+# standard library; the executor, explorer and pandas are imported by the
+# daemon process itself when it starts.
+
+DEFAULT_QUERY_FILE = "files/queries.json"
+
+# Explorer methods the daemon answers; all of them only read.
+EXPLORE_METHODS = {"fetch_types", "fetch_properties", "fetch_values", "get_max_types", "get_max_properties"}
+
+
+def default_socket_path() -> str:
+    """Returns the per-user socket path used when none is configured."""
+    return os.path.join(tempfile.gettempdir(), f"sparql-daemon-{os.getuid()}.sock")
+
+
+def _write(wfile: BinaryIO, message: Dict[str, Any]) -> None:
+    wfile.write(json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+
+
+class DaemonClient:
+    """Submits requests to a running QueryDaemon over its Unix socket.
+
+    Requests and responses are JSON lines. A query response starts with a
+    header holding the result variables, continues with one binding per line
+    and ends with `{"done": true, "rows": n}`, so results are printed while
+    they arrive. The daemon relays a SELECT query's bindings while the
+    endpoint sends them, unless they come from its result cache or the
+    request asks for a refresh.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Initializes the DaemonClient.
+
+        Args:
+            socket_path (Optional[str]): The daemon's socket. Defaults to `default_socket_path()`.
+            timeout (Optional[float]): Seconds to wait for the daemon to respond.
+                None waits as long as the query runs.
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def _connect(self) -> socket.socket:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        try:
+            connection.connect(self.socket_path)
+        except OSError as e:
+            connection.close()
+            raise RuntimeError(f"No daemon is listening on {self.socket_path}: {e}") from e
+        return connection
+
+    def is_running(self) -> bool:
+        """
+        Tells whether a daemon answers on the socket.
+
+        Returns:
+            bool: True if the daemon responded to a ping.
+        """
+        try:
+            self.call("ping")
+            return True
+        except RuntimeError:
+            return False
+
+    def _request(self, message: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        with self._connect() as connection, connection.makefile("rwb") as stream:
+            _write(stream, message)
+            stream.flush()
+            for line in stream:
+                yield json.loads(line)
+
+    def call(self, op: str, **arguments: Any) -> Any:
+        """
+        Sends a request whose response is a single value.
+
+        Args:
+            op (str): The operation, e.g. "stats" or "explore".
+            **arguments: The operation's arguments.
+
+        Returns:
+            Any: The operation's result.
+
+        Raises:
+            RuntimeError: If the daemon is not running or the operation fails.
+        """
+        for response in self._request({"op": op, **arguments}):
+            if not response.get("ok"):
+                raise RuntimeError(response.get("error", "The daemon closed the connection."))
+            return response.get("result")
+        raise RuntimeError("The daemon closed the connection without a response.")
+
+    def stream(self, op: str, **arguments: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Sends a request whose response is a sequence of rows and yields them as they arrive.
+
+        The first item yielded is the header, e.g. `{"ok": true, "vars": [...]}`.
+
+        Args:
+            op (str): The operation, e.g. "query", "sparql" or "aggregate".
+            **arguments: The operation's arguments.
+
+        Yields:
+            Dict[str, Any]: The header, then one row at a time.
+
+        Raises:
+            RuntimeError: If the daemon is not running or the operation fails.
+        """
+        responses = self._request({"op": op, **arguments})
+        header = next(responses, None)
+        if header is None or not header.get("ok"):
+            raise RuntimeError((header or {}).get("error", "The daemon closed the connection."))
+        yield header
+        for response in responses:
+            if response.get("done") is True and set(response) <= {"done", "rows", "error"}:
+                if "error" in response:
+                    raise RuntimeError(response["error"])
+                return
+            yield response
+        raise RuntimeError("The daemon closed the connection before the results were complete.")
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            _write(self.wfile, {"ok": False, "error": f"Invalid request: {e}"})
+            return
+        self.server.query_daemon.handle(message, self.wfile)
+
+
+class QueryDaemon:
+    """Long-lived local process that keeps the executor, caches and schema index warm.
+
+    Each CLI invocation otherwise pays for importing pandas, opening the
+    result cache, connecting to the endpoint and loading the schema index,
+    and forgets the circuit breaker state and observed latencies when it
+    exits. The daemon holds all of these for its lifetime and serves
+    requests from short-lived `DaemonClient`s over a Unix socket.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        socket_path: Optional[str] = None,
+        query_file: str = DEFAULT_QUERY_FILE,
+        debug: bool = False,
+    ):
+        """
+        Initializes the QueryDaemon and the components it keeps warm.
+
+        Args:
+            config (Dict[str, Any]): Application configuration, see `load_config`.
+            socket_path (Optional[str]): Socket to listen on. Defaults to
+                `default_socket_path()`.
+            query_file (str): Query file used by requests that name none.
+            debug (bool): Enables debug-level logging if True.
+        """
+        from source.explorer.explorer import KnowledgeGraphExplorer
+
+        from .aggregate import AggregationEngine
+        from .backend import create_backend
+        from .cache import create_cache
+        from .executor import SPARQLQueryExecutor
+        from .store import ResultStore
+
+        self.socket_path = socket_path or default_socket_path()
+        self.query_file = query_file
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+        self.backend = create_backend(config)
+        self.executor = SPARQLQueryExecutor(self.backend.endpoint, cache=create_cache(config), backend=self.backend)
+        self.explorer = KnowledgeGraphExplorer(
+            endpoint_url=self.backend.endpoint, cache_enabled=True, backend=self.backend, use_schema_index=True
+        )
+        self._store = ResultStore("files/results/datasets")
+        self._engines: Dict[str, AggregationEngine] = {}
+        self._engines_lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self._server: Optional[_Server] = None
+
+    def _manager(self, query_file: Optional[str]):
+        from .manager import QueryManager
+
+        return QueryManager(query_file or self.query_file)
+
+    def _engine(self, query_file: Optional[str]):
+        from .aggregate import AggregationEngine
+
+        path = os.path.abspath(query_file or self.query_file)
+        with self._engines_lock:
+            if path not in self._engines:
+                self._engines[path] = AggregationEngine(self._manager(path), self.executor, store=self._store)
+            return self._engines[path]
+
+    def _stream_rows(self, wfile: BinaryIO, variables: List[str], rows: Iterable[Dict[str, Any]]) -> None:
+        _write(wfile, {"ok": True, "vars": variables})
+        count = 0
+        try:
+            for row in rows:
+                _write(wfile, row)
+                count += 1
+        except Exception as e:
+            # The header is already sent, so the failure ends the stream instead.
+            self.logger.error(f"Request failed after {count} rows: {e}")
+            _write(wfile, {"done": True, "rows": count, "error": str(e)})
+            return
+        _write(wfile, {"done": True, "rows": count})
+
+    def _execute(self, wfile: BinaryIO, query: str, refresh: bool) -> None:
+        from .paginate import projected_variables
+
+        try:
+            variables = projected_variables(query)
+        except ValueError:
+            variables = None
+        if refresh or variables is None:
+            # A refresh replaces the cached result, and only SELECT results can be streamed.
+            results = self.executor.execute_query(query, refresh=refresh)
+            variables = self.executor.extract_head(results).get("vars", [])
+            self._stream_rows(wfile, variables, self.executor.extract_bindings(results))
+            return
+        # Cached results are served from the cache; others are relayed while
+        # they are downloaded and, to bound the daemon's memory, not cached.
+        self._stream_rows(wfile, variables, self.executor.iter_bindings(query))
+
+    def _aggregate(self, wfile: BinaryIO, message: Dict[str, Any]) -> None:
+        df = self._engine(message.get("file")).group_by(
+            message["dataset"],
+            message["by"],
+            count_distinct=message.get("count_distinct"),
+            count=message.get("count"),
+            where=message.get("where"),
+            contains=message.get("contains"),
+            sort=message.get("sort"),
+            ascending=message.get("ascending", False),
+            limit=message.get("limit"),
+        )
+        # to_json turns nullable integers and timestamps into plain JSON values.
+        self._stream_rows(wfile, list(df.columns), json.loads(df.to_json(orient="records")))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns what the daemon holds and how much it has served.
+
+        Returns:
+            Dict[str, Any]: Uptime, requests served, result cache statistics and,
+            for a resilient backend, the endpoint's health.
+        """
+        with self._engines_lock:
+            engines = list(self._engines.values())
+        with self._requests_lock:
+            requests = self.requests
+        stats = {
+            "pid": os.getpid(),
+            "endpoint": self.backend.endpoint,
+            "uptime": time.time() - self.started,
+            "requests": requests,
+            "result_cache": self.executor.cache.stats() if self.executor.cache is not None else None,
+            "datasets": sorted(name for engine in engines for name in engine.loaded_datasets()),
+        }
+        if hasattr(self.backend, "health"):
+            stats["health"] = self.backend.health()
+        return stats
+
+    def handle(self, message: Dict[str, Any], wfile: BinaryIO) -> None:
+        """
+        Answers one request, writing the response as JSON lines.
+
+        Args:
+            message (Dict[str, Any]): The request; "op" names the operation.
+            wfile (BinaryIO): The client connection.
+        """
+        with self._requests_lock:
+            self.requests += 1
+        op = message.get("op")
+        try:
+            if op == "ping":
+                _write(wfile, {"ok": True, "result": {"pid": os.getpid()}})
+            elif op == "query":
+                manager = self._manager(message.get("file"))
+                query = manager.get_query(message["name"], **message.get("parameters", {}))
+                self._execute(wfile, query, message.get("refresh", False))
+            elif op == "sparql":
+                self._execute(wfile, message["query"], message.get("refresh", False))
+            elif op == "aggregate":
+                self._aggregate(wfile, message)
+            elif op == "explore":
+                method = message["method"]
+                if method not in EXPLORE_METHODS:
+                    raise ValueError(f"Unknown explorer method '{method}'.")
+                result = getattr(self.explorer, method)(*message.get("args", []), **message.get("kwargs", {}))
+                _write(wfile, {"ok": True, "result": result})
+            elif op == "stats":
+                _write(wfile, {"ok": True, "result": self.stats()})
+            elif op == "shutdown":
+                _write(wfile, {"ok": True, "result": "Shutting down."})
+                # shutdown() waits for serve_forever, which runs in another thread.
+                threading.Thread(target=self.shutdown, daemon=True).start()
+            else:
+                raise ValueError(f"Unknown operation '{op}'.")
+        except (BrokenPipeError, ConnectionResetError):
+            self.logger.debug(f"Client disconnected during '{op}'.")
+        except Exception as e:
+            # Any failure, e.g. an open circuit or a store error, is reported to
+            # the client instead of just closing its connection.
+            expected = isinstance(e, (KeyError, ValueError, RuntimeError))
+            self.logger.error(f"Request '{op}' failed: {e!r}", exc_info=not expected)
+            try:
+                _write(wfile, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+            except OSError:
+                self.logger.debug(f"Client disconnected during '{op}'.")
+
+    def serve_forever(self) -> None:
+        """
+        Listens on the socket and answers requests until shut down.
+
+        Raises:
+            RuntimeError: If another daemon already listens on the socket.
+        """
+        if os.path.exists(self.socket_path):
+            if DaemonClient(self.socket_path, timeout=2.0).is_running():
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}.")
+            os.unlink(self.socket_path)  # Left behind by a daemon that did not exit cleanly.
+
+        self._server = _Server(self.socket_path, _Handler)
+        self._server.query_daemon = self
+        os.chmod(self.socket_path, 0o600)
+        self.logger.info(f"Serving {self.backend.endpoint} on {self.socket_path}.")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            if self.executor.cache is not None:
+                self.executor.cache.close()
+            self.backend.close()
+            self.logger.info("Daemon stopped.")
+
+    def shutdown(self) -> None:
+        """Stops `serve_forever` after the running requests."""
+        if self._server is not None:
+            self._server.shutdown()
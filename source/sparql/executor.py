@@ -1,164 +1,313 @@
-import json
+from __future__ import annotations
+
 import logging
-from typing import Any, Dict, List, Optional
-import pandas as pd
-from SPARQLWrapper import SPARQLWrapper, JSON
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from .backend import SPARQLBackend
+from .cache import DEFAULT_TTL, ResultCache
+from .lazy import lazy_import
+from .manager import QueryManager
+from .normalize import canonicalize_query
+from .paginate import paginate, split_limit_offset, stable_order
+from .process import convert_bindings_to_columns, convert_bindings_to_dataframe
+from .resilience import CircuitOpenError, is_transient
+from .singleflight import shared_flight
+from .stream import chunk_bindings, iter_bindings
+from .templates import QueryTemplate
+from .tracing import span
+from .transport import get_transport
+from .values import ValuesBatcher
+
+pd = lazy_import("pandas")
+
+# QueryManager and convert_bindings_to_dataframe are re-exported for code that
+# imported them from here before they moved to manager.py and process.py.
+__all__ = ["QueryManager", "SPARQLQueryExecutor", "convert_bindings_to_dataframe"]
 
 
 class SPARQLQueryExecutor:
     """Handles SPARQL queries and processes results."""
 
-    def __init__(self, endpoint: str, debug: bool = False):
+    def __init__(
+        self,
+        endpoint: str,
+        debug: bool = False,
+        cache: Optional[ResultCache] = None,
+        backend: Optional[SPARQLBackend] = None,
+    ):
         """
         Initializes the SPARQLQueryExecutor.
 
         Args:
             endpoint (str): The SPARQL endpoint URL.
             debug (bool): Enables debug-level logging if True.
+            cache (Optional[ResultCache]): Persistent result cache consulted
+                before the endpoint is queried.
+            backend (Optional[SPARQLBackend]): Backend that answers the queries, e.g.
+                a local RDF store. Defaults to the HTTP connection pool shared for
+                this endpoint.
         """
         self.endpoint = endpoint
+        self.cache = cache
+        self.backend = backend if backend is not None else get_transport(endpoint)
+        # Identical queries issued concurrently (also by explorers) share one request.
+        self.in_flight = shared_flight()
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
-    def execute_query(self, query: str) -> Dict[str, Any]:
+    def execute_query(
+        self,
+        query: str,
+        ttl: Optional[float] = DEFAULT_TTL,
+        refresh: bool = False,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
         """
         Executes a SPARQL query and returns the results.
 
         Args:
             query (str): The SPARQL query string.
+            ttl (Optional[float]): Time-to-live in seconds for the cached
+                result. Defaults to the cache-wide TTL; None never expires it.
+            refresh (bool): Skips the cache lookup and replaces the cached
+                result with a fresh one.
+            use_cache (bool): Neither reads nor writes the result cache if False,
+                e.g. for results the caller persists itself.
+
+        If the endpoint is unavailable, an expired cached result is returned
+        instead, unless `refresh` is set.
 
         Returns:
             Dict[str, Any]: The query results in JSON format.
 
+        Raises:
+            RuntimeError: If the query execution fails and no stale result is cached.
+        """
+        cache = self.cache if use_cache else None
+        with span("execute_query", endpoint=self.endpoint) as query_span:
+            if cache is not None and not refresh:
+                cached = cache.get(self.endpoint, query)
+                if cached is not None:
+                    self.logger.info("Returning cached results.")
+                    query_span.set(cache_hit=True, rows=len(self.extract_bindings(cached)))
+                    return cached
+
+            query_span.set(cache_hit=False)
+            try:
+                self.logger.info("Executing SPARQL query...")
+                text = canonicalize_query(query).text
+                results = self.in_flight.do(
+                    (self.backend.endpoint, text), lambda: self.backend.query(text)
+                )
+                self.logger.info("Query executed successfully.")
+            except Exception as e:
+                stale = None if refresh or cache is None else self._stale_results(query, e)
+                if stale is not None:
+                    query_span.set(stale=True, rows=len(self.extract_bindings(stale)))
+                    return stale
+                self.logger.error(f"Error executing SPARQL query: {e}")
+                raise RuntimeError(f"Failed to execute SPARQL query: {e}") from e
+            query_span.set(rows=len(self.extract_bindings(results)))
+
+            if cache is not None:
+                cache.set(self.endpoint, query, results, ttl=ttl)
+            return results
+
+    def _stale_results(self, query: str, error: Exception) -> Optional[Dict[str, Any]]:
+        """Returns expired cached results of a query if `error` means the endpoint is unavailable."""
+        if self.cache is None or not (isinstance(error, CircuitOpenError) or is_transient(error)):
+            return None
+        stale = self.cache.get(self.endpoint, query, allow_stale=True)
+        if stale is not None:
+            self.logger.warning(f"Endpoint unavailable ({error}); returning stale cached results.")
+        return stale
+
+    def iter_bindings(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Executes a SPARQL query and yields its bindings while the response is downloaded.
+
+        Cached results are served from the cache; streamed results are not
+        written to it, so peak memory does not grow with the result size.
+
+        Args:
+            query (str): The SPARQL query string.
+
+        Yields:
+            Dict[str, Any]: One binding dictionary at a time.
+
         Raises:
             RuntimeError: If the query execution fails.
         """
-        sparql = SPARQLWrapper(self.endpoint)
-        sparql.setReturnFormat(JSON)
-        sparql.setQuery(query)
+        if self.cache is not None:
+            cached = self.cache.get(self.endpoint, query)
+            if cached is not None:
+                self.logger.info("Returning cached results.")
+                yield from self.extract_bindings(cached)
+                return
+
+        rows = 0
         try:
-            self.logger.info("Executing SPARQL query...")
-            results = sparql.queryAndConvert()
-            self.logger.info("Query executed successfully.")
-            return results
+            self.logger.info("Streaming SPARQL query results...")
+            with span("execute_query.stream", activate=False, endpoint=self.endpoint) as stream_span:
+                with self.backend.stream(canonicalize_query(query).text) as stream:
+                    for binding in iter_bindings(stream):
+                        rows += 1
+                        yield binding
+                stream_span.set(rows=rows)
+            self.logger.info("Query results streamed successfully.")
         except Exception as e:
-            self.logger.error(f"Error executing SPARQL query: {e}")
-            raise RuntimeError(f"Failed to execute SPARQL query: {e}") from e
+            stale = self._stale_results(query, e) if rows == 0 else None
+            if stale is not None:
+                yield from self.extract_bindings(stale)
+                return
+            self.logger.error(f"Error streaming SPARQL query results: {e}")
+            raise RuntimeError(f"Failed to stream SPARQL query results: {e}") from e
 
-    @staticmethod
-    def extract_head(results: Dict[str, Any]) -> Dict[str, Any]:
+    def iter_binding_chunks(
+        self, query: str, chunk_size: int = 10_000
+    ) -> Iterator[List[Dict[str, Any]]]:
         """
-        Extracts the head from SPARQL query results.
+        Executes a SPARQL query and yields its bindings in fixed-size lists.
 
         Args:
-            results (Dict[str, Any]): The SPARQL results.
+            query (str): The SPARQL query string.
+            chunk_size (int): Number of bindings per yielded list.
 
         Returns:
-            Dict[str, Any]: The "head" part of the results.
+            List[Dict[str, Any]]: Consecutive chunks of binding dictionaries.
         """
-        return results.get("head", {})
+        return chunk_bindings(self.iter_bindings(query), chunk_size)
 
-    @staticmethod
-    def extract_bindings(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def iter_pages(
+        self,
+        query: str,
+        page_size: int = 10_000,
+        parallel: int = 1,
+        refresh: bool = False,
+        use_cache: bool = True,
+    ) -> Iterator[List[Dict[str, Any]]]:
         """
-        Extracts bindings from SPARQL query results.
+        Executes a SELECT query page by page using a stable ORDER BY with LIMIT/OFFSET.
+
+        A LIMIT/OFFSET already present in the query bounds the rows fetched
+        in total. Pages are requested `parallel` at a time and yielded in order;
+        paging stops at the first page shorter than `page_size`.
 
         Args:
-            results (Dict[str, Any]): The SPARQL results.
+            query (str): The SPARQL query string.
+            page_size (int): Number of rows per page.
+            parallel (int): Number of pages fetched concurrently.
+            refresh (bool): Bypasses cached pages, see `execute_query`.
+            use_cache (bool): Neither reads nor writes cached pages if False.
 
-        Returns:
-            List[Dict[str, Any]]: A list of binding dictionaries.
+        Yields:
+            List[Dict[str, Any]]: The bindings of each page.
+
+        Raises:
+            RuntimeError: If a page fails to execute.
         """
-        return results.get("results", {}).get("bindings", [])
+        base_query, limit, offset = split_limit_offset(query)
+        ordered_query = stable_order(base_query)
+        end = offset + limit if limit is not None else None
+
+        def page_rows(page_offset: int) -> int:
+            return page_size if end is None else min(page_size, end - page_offset)
 
+        def fetch(page_offset: int) -> List[Dict[str, Any]]:
+            self.logger.debug(f"Fetching page at offset {page_offset}")
+            page_query = paginate(ordered_query, page_rows(page_offset), page_offset)
+            return self.extract_bindings(
+                self.execute_query(page_query, refresh=refresh, use_cache=use_cache)
+            )
 
-class QueryManager:
-    """Manages SPARQL query loading and retrieval."""
+        with ThreadPoolExecutor(max_workers=max(parallel, 1)) as pool:
+            while end is None or offset < end:
+                offsets = [
+                    offset + i * page_size
+                    for i in range(max(parallel, 1))
+                    if end is None or offset + i * page_size < end
+                ]
+                for page_offset, page in zip(offsets, pool.map(fetch, offsets)):
+                    if page:
+                        yield page
+                    if len(page) < page_rows(page_offset):
+                        return
+                offset = offsets[-1] + page_size
 
-    def __init__(self, query_file_path: str, debug: bool = False):
+    def execute_paginated(
+        self, query: str, page_size: int = 10_000, parallel: int = 1
+    ) -> pd.DataFrame:
         """
-        Initializes the QueryManager.
+        Executes a SELECT query page by page and returns all rows as one DataFrame.
 
         Args:
-            query_file_path (str): Path to the JSON file containing queries.
-            debug (bool): Enables debug-level logging if True.
+            query (str): The SPARQL query string.
+            page_size (int): Number of rows per page.
+            parallel (int): Number of pages fetched concurrently.
+
+        Returns:
+            pd.DataFrame: The complete result set, one column per variable.
         """
-        self.query_file_path = query_file_path
-        self.logger = logging.getLogger(self.__class__.__name__)
-        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
-        self._queries = None  # Caching loaded queries
+        bindings = [
+            binding for page in self.iter_pages(query, page_size, parallel) for binding in page
+        ]
+        self.logger.info(f"Fetched {len(bindings)} rows in pages of {page_size}.")
+        return convert_bindings_to_columns(bindings)
 
-    def _load_queries(self) -> Dict[str, str]:
+    def execute_many(
+        self,
+        template: QueryTemplate,
+        parameter_sets: List[Dict[str, Any]],
+        chunk_size: int = 100,
+        parallel: int = 1,
+        refresh: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
         """
-        Loads SPARQL queries from a JSON file.
+        Executes a query template for many parameter sets with VALUES-batched queries.
+
+        Args:
+            template (QueryTemplate): The query template, e.g. from `QueryManager.get_template`.
+            parameter_sets (List[Dict[str, Any]]): The parameter values of each invocation.
+            chunk_size (int): Maximum number of invocations merged into one query.
+            parallel (int): Number of batched queries run concurrently.
+            refresh (bool): Bypasses cached results, see `execute_query`.
 
         Returns:
-            Dict[str, str]: A dictionary of queries.
+            List[List[Dict[str, Any]]]: The bindings of each invocation, in order.
 
         Raises:
-            RuntimeError: If the file is not found or contains invalid JSON.
+            RuntimeError: If a batched query fails to execute.
         """
-        if self._queries is None:
-            try:
-                with open(self.query_file_path, "r", encoding="utf-8") as file:
-                    self.logger.info("Loading SPARQL queries from file...")
-                    self._queries = json.load(file)
-                    self.logger.info("Queries loaded successfully.")
-            except FileNotFoundError:
-                self.logger.error(f"Query file not found: {self.query_file_path}")
-                raise RuntimeError(f"Query file not found: {self.query_file_path}")
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Error decoding JSON file: {e}")
-                raise RuntimeError(f"Invalid JSON in query file: {e}") from e
-        return self._queries
-
-    def get_query(self, query_name: str) -> str:
-        """
-        Retrieves a specific SPARQL query by name.
+        batcher = ValuesBatcher(
+            lambda query: self.extract_bindings(self.execute_query(query, refresh=refresh)),
+            chunk_size=chunk_size,
+            parallel=parallel,
+        )
+        return batcher.run(template, parameter_sets)
+
+    @staticmethod
+    def extract_head(results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extracts the head from SPARQL query results.
 
         Args:
-            query_name (str): The name of the query to retrieve.
+            results (Dict[str, Any]): The SPARQL results.
 
         Returns:
-            str: The query string.
+            Dict[str, Any]: The "head" part of the results.
+        """
+        return results.get("head", {})
 
-        Raises:
-            ValueError: If the query is not found.
-        """
-        queries = self._load_queries()
-        if query_name not in queries:
-            self.logger.error(f"Query '{query_name}' not found.")
-            raise ValueError(f"Query '{query_name}' not found.")
-        self.logger.debug(f"Retrieved query: {query_name}")
-        return queries[query_name]
-
-
-def convert_bindings_to_dataframe(
-    bindings: List[Dict[str, Any]], flatten: bool = True
-) -> pd.DataFrame:
-    """
-    Converts SPARQL query bindings into a Pandas DataFrame.
-
-    Args:
-        bindings (List[Dict[str, Any]]): A list of binding dictionaries.
-        flatten (bool): Whether to flatten nested structures.
-
-    Returns:
-        pd.DataFrame: A DataFrame containing the query results.
-
-    Raises:
-        ValueError: If bindings are empty or invalid.
-    """
-    logger = logging.getLogger("convert_bindings_to_dataframe")
-    try:
-        logger.info("Converting bindings to DataFrame...")
-        if not bindings:
-            raise ValueError("Bindings are empty or invalid.")
-        
-        # Normalize JSON bindings to a flat DataFrame
-        df = pd.json_normalize(bindings) if flatten else pd.DataFrame(bindings)
-        logger.info("Conversion successful.")
-        return df
-    except Exception as e:
-        logger.error(f"Error converting bindings to DataFrame: {e}")
-        raise RuntimeError(f"Failed to convert bindings to DataFrame: {e}") from e
+    @staticmethod
+    def extract_bindings(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Extracts bindings from SPARQL query results.
+
+        Args:
+            results (Dict[str, Any]): The SPARQL results.
+
+        Returns:
+            List[Dict[str, Any]]: A list of binding dictionaries.
+        """
+        return results.get("results", {}).get("bindings", [])
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .backend import LocalRDFBackend
+
+
+def split_ntriples(path: str, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Splits an N-Triples file into byte ranges that start and end on line boundaries.
+
+    Args:
+        path (str): Path of the N-Triples file.
+        chunk_bytes (int): Approximate size of each range in bytes.
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) byte offsets of each chunk.
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    with open(path, "rb") as file:
+        start = 0
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            end = min(file.tell(), size)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+class _FileBNodeIds(dict):
+    """Maps blank node labels to ids derived from the label, so every chunk of a file agrees."""
+
+    def __init__(self, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+
+    def get(self, label: str, default: Any = None) -> str:
+        return f"{self.prefix}{label}"
+
+
+def _parse_chunk(
+    path: str, start: int, end: int, bnode_prefix: str
+) -> List[Tuple[Any, Any, Any]]:
+    """Parses one byte range of an N-Triples file in a worker process."""
+    from rdflib import Graph
+
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    graph = Graph()
+    graph.parse(
+        data=data.decode("utf-8"), format="nt", bnode_context=_FileBNodeIds(bnode_prefix)
+    )
+    return list(graph)
+
+
+class DumpIngester:
+    """Loads large N-Triples dumps into a local RDF store using parallel parsing."""
+
+    def __init__(
+        self,
+        backend: LocalRDFBackend,
+        max_workers: Optional[int] = None,
+        chunk_bytes: int = 32 * 1024 * 1024,
+        state_path: Optional[str] = None,
+        debug: bool = False,
+    ):
+        """
+        Initializes the DumpIngester.
+
+        Args:
+            backend (LocalRDFBackend): The backend whose graph receives the triples.
+            max_workers (Optional[int]): Number of parser processes. Defaults to the CPU count.
+            chunk_bytes (int): Approximate size of the chunks handed to each parser.
+            state_path (Optional[str]): File recording which chunks were loaded into
+                which store, so an interrupted run can resume. Defaults to a file
+                next to the store.
+            debug (bool): Enables debug-level logging if True.
+
+        Raises:
+            ValueError: If the backend's store is not persistent, so that the
+                triples would be lost when the process exits.
+        """
+        if not backend.persistent:
+            raise ValueError(
+                f"{backend.endpoint} does not persist its graph; configure an on-disk store "
+                f"with local_store.store and local_store.path to ingest dumps."
+            )
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        if state_path is None:
+            base = Path(backend.store_path) if backend.store_path else Path("files/store")
+            state_path = str(base.with_name(base.name + ".ingest.json"))
+        self.state_path = Path(state_path)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        return {}
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.state_path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(state, file, indent=4)
+        os.replace(temporary, self.state_path)
+
+    @staticmethod
+    def _file_key(path: str) -> str:
+        stat = os.stat(path)
+        return f"{Path(path).resolve()}:{stat.st_size}:{int(stat.st_mtime)}"
+
+    def ingest(self, path: str) -> int:
+        """
+        Loads an N-Triples file, skipping chunks loaded by a previous run.
+
+        Files in other formats cannot be split and are loaded in one piece.
+
+        Args:
+            path (str): Path of the dump file.
+
+        Returns:
+            int: The number of triples written during this call.
+        """
+        if not path.endswith(".nt"):
+            self.logger.info(f"{path} is not N-Triples; loading it without splitting.")
+            before = len(self.backend.graph)
+            return self.backend.load(path) - before
+
+        state = self._load_state()
+        file_key = self._file_key(path)
+        bnode_prefix = hashlib.sha1(file_key.encode("utf-8")).hexdigest()[:12]
+        # Progress is recorded per store, so loading the file into another store starts over.
+        key = f"{self.backend.endpoint} {file_key}"
+        done: Set[int] = set(state.get(key, []))
+        chunks = split_ntriples(path, self.chunk_bytes)
+        pending = [index for index in range(len(chunks)) if index not in done]
+        if done:
+            self.logger.info(f"Resuming {path}: {len(done)}/{len(chunks)} chunks already loaded.")
+
+        written = 0
+        total_bytes = sum(chunks[index][1] - chunks[index][0] for index in pending)
+        loaded_bytes = 0
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            queue = iter(pending)
+            in_flight = {}
+
+            def submit_next() -> None:
+                index = next(queue, None)
+                if index is not None:
+                    future = pool.submit(_parse_chunk, path, *chunks[index], bnode_prefix)
+                    in_flight[future] = index
+
+            # Keep at most two chunks per worker in memory at once.
+            for _ in range(2 * self.max_workers):
+                submit_next()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = in_flight.pop(future)
+                    triples = future.result()
+                    self.backend.add_triples(triples)
+                    written += len(triples)
+                    done.add(index)
+                    state[key] = sorted(done)
+                    self._save_state(state)
+
+                    loaded_bytes += chunks[index][1] - chunks[index][0]
+                    elapsed = time.perf_counter() - start_time
+                    self.logger.info(
+                        f"{path}: {len(done)}/{len(chunks)} chunks, {written} triples, "
+                        f"{loaded_bytes / total_bytes:.0%} at "
+                        f"{loaded_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s"
+                    )
+                    submit_next()
+        return written
+
+    def ingest_all(self, paths: List[str]) -> int:
+        """
+        Loads several dump files one after another.
+
+        Args:
+            paths (List[str]): Paths of the dump files.
+
+        Returns:
+            int: The number of triples written.
+        """
+        return sum(self.ingest(path) for path in paths)
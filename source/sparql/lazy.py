@@ -0,0 +1,30 @@
+import importlib
+import types
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module that is only imported when one of its attributes is used.
+
+    Keeps heavy dependencies such as pandas out of the start-up time of
+    command line invocations that never touch them.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(importlib.import_module(self.__name__), name)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns a module that is imported on first attribute access.
+
+    Modules using it for names in annotations need `from __future__ import
+    annotations`, so that the annotations are not evaluated at import time.
+
+    Args:
+        name (str): The module name, e.g. "pandas".
+
+    Returns:
+        types.ModuleType: A stand-in that forwards to the imported module.
+    """
+    return LazyModule(name)
@@ -1,38 +1,38 @@
-import json
 import logging
-from typing import Dict, Union
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .registry import QueryFile, QueryRegistry, get_registry
+from .templates import QueryTemplate
+from .tracing import span
 
 
 class QueryManager:
-    def __init__(self, query_file_path: str, debug: bool = False):
+    def __init__(
+        self, query_file_path: str, debug: bool = False, registry: Optional[QueryRegistry] = None
+    ):
         """
         Initializes the QueryManager.
 
         Args:
             query_file_path (str): Path to the JSON file containing SPARQL queries and prefixes.
             debug (bool): Enable debug-level logging if True.
+            registry (Optional[QueryRegistry]): Registry the compiled file is taken
+                from. Defaults to the registry shared for the file's directory, so
+                managers of the same file load and validate it only once.
         """
         self.query_file_path = query_file_path
-        self._data = None  # Cache for loaded JSON data
-        
+        self.registry = (
+            registry if registry is not None else get_registry(str(Path(query_file_path).parent))
+        )
+
         # Set logging level
         logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def _load_queries(self) -> Dict[str, Union[str, Dict[str, str]]]:
-        """Loads SPARQL queries and prefixes from the JSON file."""
-        if self._data is None:
-            try:
-                with open(self.query_file_path, "r", encoding="utf-8") as file:
-                    self.logger.info(f"Loading SPARQL queries from {self.query_file_path}...")
-                    self._data = json.load(file)
-            except FileNotFoundError:
-                self.logger.error(f"Query file not found: {self.query_file_path}")
-                raise
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Error decoding JSON file: {e}")
-                raise
-        return self._data
+    def _load_queries(self) -> QueryFile:
+        """Returns the compiled query file, reloaded if it changed on disk."""
+        return self.registry.get(self.query_file_path)
 
     @property
     def prefixes(self) -> str:
@@ -42,17 +42,76 @@ class QueryManager:
         Returns:
             str: The SPARQL prefixes.
         """
-        return self._load_queries().get("prefixes", "")
+        return self._load_queries().prefixes
+
+    @property
+    def prefix_map(self) -> Dict[str, str]:
+        """
+        Retrieves the prefix declarations as a mapping, e.g. for compacting URIs.
+
+        Returns:
+            Dict[str, str]: Prefix names and their namespaces.
+        """
+        return self._load_queries().prefix_map
 
     @property
     def queries(self) -> Dict[str, str]:
         """
         Retrieves the SPARQL queries from the JSON data.
 
+        Entries are either a query string or an object with the query string
+        under "query" and its parameter declarations under "parameters".
+
         Returns:
             Dict[str, str]: A dictionary of SPARQL query names and their query strings.
         """
-        return self._load_queries().get("queries", {})
+        return self._load_queries().queries
+
+    @property
+    def templates(self) -> Dict[str, QueryTemplate]:
+        """
+        Retrieves the compiled queries. Each template declares only the
+        prefixes its query uses.
+
+        Returns:
+            Dict[str, QueryTemplate]: A dictionary of query names and their templates.
+
+        Raises:
+            ValueError: If a query declares invalid parameters or is not valid SPARQL.
+        """
+        return self._load_queries().templates
+
+    @property
+    def datasets(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieves the raw-pattern datasets that aggregations are computed from locally.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Dataset names and their definitions, each
+            with the query string, used prefixes included, under "query" and
+            derived columns under "derived".
+        """
+        return self._load_queries().datasets
+
+    def get_dataset(self, name: str) -> Dict[str, Any]:
+        """
+        Retrieves a dataset definition by name.
+
+        Args:
+            name (str): The name of the dataset.
+
+        Returns:
+            Dict[str, Any]: The full query under "query" and the derived column
+            definitions under "derived".
+
+        Raises:
+            ValueError: If the dataset does not exist.
+        """
+        datasets = self.datasets
+        if name not in datasets:
+            self.logger.error(f"Dataset '{name}' not found.")
+            raise ValueError(f"Dataset '{name}' not found.")
+        return datasets[name]
 
     def list_queries(self) -> Dict[str, str]:
         """
@@ -63,22 +122,41 @@ class QueryManager:
         """
         return self.queries
 
-    def get_query(self, query_name: str) -> str:
+    def get_template(self, query_name: str) -> QueryTemplate:
         """
-        Retrieves a specific SPARQL query by name, including the prefixes.
+        Retrieves the compiled template of a query by name.
 
         Args:
             query_name (str): The name of the query to retrieve.
 
         Returns:
-            str: The full SPARQL query (prefixes + query).
+            QueryTemplate: The template, used prefixes included.
 
         Raises:
             ValueError: If the query name does not exist.
         """
-        queries = self.queries
-        if query_name not in queries:
+        templates = self.templates
+        if query_name not in templates:
             self.logger.error(f"Query '{query_name}' not found.")
             raise ValueError(f"Query '{query_name}' not found.")
+        return templates[query_name]
+
+    def get_query(self, query_name: str, **parameters: Any) -> str:
+        """
+        Retrieves a specific SPARQL query by name, including the prefixes it uses.
+
+        Args:
+            query_name (str): The name of the query to retrieve.
+            **parameters: Values for the query's declared parameters. Omitted
+                parameters take their declared defaults.
+
+        Returns:
+            str: The full SPARQL query (used prefixes + query).
+
+        Raises:
+            ValueError: If the query name does not exist or a parameter value is invalid.
+        """
+        with span("query.build", query_name=query_name):
+            query = self.get_template(query_name).bind(**parameters)
         self.logger.debug(f"Retrieved query: {query_name}")
-        return self.prefixes + "\n\n" + queries[query_name]
+        return query
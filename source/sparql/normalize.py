@@ -0,0 +1,225 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+# Tokens that must be copied verbatim: string literals (long and short forms)
+# and IRIs. Everything else is free to have its whitespace collapsed.
+_STRING = (
+    r'"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+)
+_IRI = r"<[^<>\"{}|^`\\\s]*>"
+VERBATIM_PATTERN = re.compile(f"{_STRING}|{_IRI}")
+_COMMENT_PATTERN = re.compile(r"#[^\n]*")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def _normalize_segment(segment: str) -> str:
+    segment = _COMMENT_PATTERN.sub(" ", segment)
+    return _WHITESPACE_PATTERN.sub(" ", segment)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a SPARQL query string for use as a cache key.
+
+    Comments are removed and runs of whitespace are collapsed to a single
+    space, while string literals and IRIs are left untouched.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Returns:
+        str: The normalized query string.
+    """
+    parts = []
+    position = 0
+    for match in VERBATIM_PATTERN.finditer(query):
+        parts.append(_normalize_segment(query[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_normalize_segment(query[position:]))
+    return "".join(parts).strip()
+
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<comment>#[^\n]*)"
+    rf"|(?P<string>{_STRING})"
+    rf"|(?P<iri>{_IRI})"
+    r"|(?P<var>[?$]\w+)"
+    r"|(?P<pname>(?:[A-Za-z][\w.-]*)?:(?:[\w\-.:%]*[\w\-:%])?)"
+    r"|(?P<word>\w+)"
+    r"|(?P<ws>\s+)"
+    r"|(?P<other>.)",
+    re.DOTALL,
+)
+
+
+_RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+
+
+def used_prefixes(query: str) -> List[str]:
+    """
+    Lists the prefixes a query's prefixed names refer to.
+
+    Prefixed names in PREFIX declarations, string literals and IRIs are not counted.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Returns:
+        List[str]: The prefix names in order of first use; "" for the default prefix.
+    """
+    used: Dict[str, None] = {}
+    declaration = False
+    for match in _TOKEN_PATTERN.finditer(query):
+        kind, value = match.lastgroup, match.group(0)
+        if kind in ("ws", "comment"):
+            continue
+        if kind == "pname" and not declaration:
+            used[value.partition(":")[0]] = None
+        declaration = kind == "word" and value.upper() == "PREFIX"
+    return list(used)
+
+
+@dataclass(frozen=True)
+class CanonicalQuery:
+    """A query in canonical form.
+
+    `text` is the query to send: comments, surplus whitespace and unused
+    PREFIX declarations are removed. `key` identifies the query up to
+    whitespace, prefix declarations, keyword case and variable names, and is
+    meant for cache lookups. Results cached under `key` use the canonical
+    variable names, see `to_canonical` and `from_canonical`.
+    """
+
+    text: str
+    key: str
+    variables: Tuple[Tuple[str, str], ...]
+
+    def to_canonical(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Renames the variables of SPARQL JSON results to their canonical names."""
+        return _rename_results(results, dict(self.variables))
+
+    def from_canonical(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Renames the variables of canonically named results back to this query's names."""
+        return _rename_results(results, {canonical: name for name, canonical in self.variables})
+
+    def bindings_to_canonical(self, bindings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Renames the variables of a list of bindings to their canonical names."""
+        return _rename_bindings(bindings, dict(self.variables))
+
+    def bindings_from_canonical(self, bindings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Renames canonically named bindings back to this query's variable names."""
+        return _rename_bindings(bindings, {canonical: name for name, canonical in self.variables})
+
+
+def _rename_bindings(bindings: List[Dict[str, Any]], mapping: Dict[str, str]) -> List[Dict[str, Any]]:
+    if all(name == new for name, new in mapping.items()):
+        return bindings
+    return [{mapping.get(name, name): cell for name, cell in binding.items()} for binding in bindings]
+
+
+def _rename_results(results: Dict[str, Any], mapping: Dict[str, str]) -> Dict[str, Any]:
+    if all(name == new for name, new in mapping.items()):
+        return results
+    renamed = dict(results)
+    head = dict(results.get("head", {}))
+    if "vars" in head:
+        head["vars"] = [mapping.get(name, name) for name in head["vars"]]
+    renamed["head"] = head
+    if "results" in results:
+        renamed["results"] = dict(results["results"])
+        renamed["results"]["bindings"] = _rename_bindings(
+            results["results"].get("bindings", []), mapping
+        )
+    return renamed
+
+
+@lru_cache(maxsize=1024)
+def canonicalize_query(query: str) -> CanonicalQuery:
+    """
+    Brings a SPARQL query into canonical form.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Returns:
+        CanonicalQuery: The compact query text, its cache key and the variable renaming.
+    """
+    tokens = [(match.lastgroup, match.group(0)) for match in _TOKEN_PATTERN.finditer(query)]
+    significant = [i for i, (kind, _) in enumerate(tokens) if kind not in ("ws", "comment")]
+
+    # Collect "PREFIX p: <iri>" declarations and remove them from the body.
+    prefixes: Dict[str, str] = {}
+    declarations: Dict[str, str] = {}
+    removed = set()
+    for position, index in enumerate(significant[:-2]):
+        kind, value = tokens[index]
+        if kind == "word" and value.upper() == "PREFIX":
+            name_index, iri_index = significant[position + 1], significant[position + 2]
+            if tokens[name_index][0] == "pname" and tokens[iri_index][0] == "iri":
+                name = tokens[name_index][1][:-1]
+                prefixes[name] = tokens[iri_index][1][1:-1]
+                declarations[name] = f"PREFIX {name}: {tokens[iri_index][1]}"
+                removed.update(range(index, iri_index + 1))
+
+    body_text: List[str] = []
+    body_key: List[str] = []
+    used_prefixes: Dict[str, None] = {}
+    variables: Dict[str, str] = {}
+    for index, (kind, value) in enumerate(tokens):
+        if index in removed:
+            continue
+        if kind in ("ws", "comment"):
+            if body_text and body_text[-1] != " ":
+                body_text.append(" ")
+                body_key.append(" ")
+            continue
+        body_text.append(value)
+        if kind == "var":
+            name = value[1:]
+            canonical = variables.setdefault(name, f"v{len(variables)}")
+            body_key.append("?" + canonical)
+        elif kind == "pname":
+            prefix, _, local = value.partition(":")
+            if prefix in prefixes:
+                used_prefixes[prefix] = None
+                body_key.append(f"<{prefixes[prefix]}{local}>")
+            else:
+                body_key.append(value)
+        elif kind == "word":
+            body_key.append(_RDF_TYPE if value == "a" else value.upper())
+        else:
+            body_key.append(value)
+
+    body = "".join(body_text).strip()
+    header = "\n".join(declarations[prefix] for prefix in declarations if prefix in used_prefixes)
+    return CanonicalQuery(
+        text=f"{header}\n{body}" if header else body,
+        key="".join(body_key).strip(),
+        variables=tuple(variables.items()),
+    )
+
+
+def validate_query(query: str) -> None:
+    """
+    Checks the syntax of a query with rdflib's SPARQL parser, if rdflib is installed.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Raises:
+        ValueError: If the query is not valid SPARQL.
+    """
+    try:
+        from rdflib.plugins.sparql import prepareQuery
+    except ImportError:
+        return
+    try:
+        prepareQuery(query)
+    except Exception as e:
+        raise ValueError(f"Invalid SPARQL query: {e}") from e
@@ -0,0 +1,122 @@
+import re
+from typing import List, Optional, Tuple
+
+from .normalize import normalize_query
+
+_TRAILING_MODIFIERS = re.compile(
+    r"(?:\s+(?:LIMIT|OFFSET)\s+\d+)+\s*$", re.IGNORECASE
+)
+_LIMIT = re.compile(r"\bLIMIT\s+(\d+)", re.IGNORECASE)
+_OFFSET = re.compile(r"\bOFFSET\s+(\d+)", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_SELECT_CLAUSE = re.compile(
+    r"\bSELECT\s+(?:DISTINCT\s+|REDUCED\s+)?(.*?)\s*(?:\bWHERE\b|\{)",
+    re.IGNORECASE | re.DOTALL,
+)
+_AS_VARIABLE = re.compile(r"\bAS\s+([?$]\w+)\s*\)", re.IGNORECASE)
+_VARIABLE = re.compile(r"[?$](\w+)")
+
+
+def split_limit_offset(query: str) -> Tuple[str, Optional[int], int]:
+    """
+    Removes a trailing LIMIT/OFFSET from a query.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Returns:
+        Tuple[str, Optional[int], int]: The query without the modifiers, its
+        LIMIT (None if absent) and its OFFSET (0 if absent).
+    """
+    query = normalize_query(query)
+    match = _TRAILING_MODIFIERS.search(query)
+    if not match:
+        return query, None, 0
+    modifiers = match.group(0)
+    limit = _LIMIT.search(modifiers)
+    offset = _OFFSET.search(modifiers)
+    return (
+        query[: match.start()],
+        int(limit.group(1)) if limit else None,
+        int(offset.group(1)) if offset else 0,
+    )
+
+
+def projected_variables(query: str) -> List[str]:
+    """
+    Returns the variables projected by a SELECT query.
+
+    For `SELECT *` every variable in the query is returned.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Returns:
+        List[str]: Variable names without the leading `?`, in projection order.
+    """
+    match = _SELECT_CLAUSE.search(query)
+    if not match:
+        raise ValueError("Only SELECT queries can be paginated.")
+    clause = match.group(1)
+    if clause.strip() == "*":
+        return list(dict.fromkeys(_VARIABLE.findall(query[match.end():])))
+
+    names = []
+    depth = 0
+    expression_start = 0
+    position = 0
+    while position < len(clause):
+        char = clause[position]
+        if char == "(":
+            if depth == 0:
+                expression_start = position
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                alias = _AS_VARIABLE.search(clause[expression_start:position + 1])
+                if alias:
+                    names.append(alias.group(1)[1:])
+        elif depth == 0 and char in "?$":
+            variable = _VARIABLE.match(clause, position)
+            if variable:
+                names.append(variable.group(1))
+                position = variable.end()
+                continue
+        position += 1
+    return list(dict.fromkeys(names))
+
+
+def stable_order(query: str) -> str:
+    """
+    Makes the solution order of a query total so that pages do not overlap.
+
+    The projected variables are appended to an existing ORDER BY as tie
+    breakers, or added as a new ORDER BY clause.
+
+    Args:
+        query (str): The SPARQL query string without LIMIT/OFFSET.
+
+    Returns:
+        str: The query with a total ORDER BY clause.
+    """
+    tie_breakers = " ".join(f"?{name}" for name in projected_variables(query))
+    # Only an ORDER BY after the outermost group pattern belongs to the query itself.
+    if _ORDER_BY.search(query, query.rfind("}") + 1):
+        return f"{query} {tie_breakers}"
+    return f"{query}\nORDER BY {tie_breakers}"
+
+
+def paginate(query: str, page_size: int, offset: int) -> str:
+    """
+    Builds the query for one page of results.
+
+    Args:
+        query (str): A query prepared with `stable_order`.
+        page_size (int): Number of rows per page.
+        offset (int): Number of rows to skip.
+
+    Returns:
+        str: The query restricted to the requested page.
+    """
+    return f"{query}\nLIMIT {page_size}\nOFFSET {offset}"
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import functools
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+_PREFIX = re.compile(r"PREFIX\s+([A-Za-z][\w.-]*)?:\s*<([^>]*)>", re.IGNORECASE)
+
+
+def parse_prefixes(text: str) -> Dict[str, str]:
+    """
+    Reads the PREFIX declarations of a SPARQL prologue.
+
+    Args:
+        text (str): SPARQL text containing `PREFIX name: <namespace>` lines.
+
+    Returns:
+        Dict[str, str]: Prefix names and their namespaces; the default prefix is "".
+    """
+    return {name or "": namespace for name, namespace in _PREFIX.findall(text)}
+
+
+class URICompactor:
+    """Shortens URIs to CURIEs such as `cto:relatedLocation` using a prefix map.
+
+    Results are memoized in a bounded LRU, since the same type and property
+    URIs repeat throughout a result set. Whole columns are compacted by
+    shortening each distinct value once.
+    """
+
+    def __init__(
+        self,
+        prefixes: Dict[str, str],
+        fallback: Optional[Callable[[str], str]] = None,
+        cache_size: int = 65536,
+    ):
+        """
+        Initializes the URICompactor.
+
+        Args:
+            prefixes (Dict[str, str]): Prefix names and their namespaces.
+            fallback (Optional[Callable[[str], str]]): Applied to URIs outside
+                every namespace. They are kept unchanged by default.
+            cache_size (int): Maximum number of memoized URIs.
+        """
+        # Preferring the longest namespace makes nested namespaces compact correctly.
+        self.namespaces = sorted(
+            ((namespace, name) for name, namespace in prefixes.items() if namespace),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self._by_namespace = {namespace: name for namespace, name in self.namespaces}
+        self.fallback = fallback
+        self.compact = functools.lru_cache(maxsize=cache_size)(self._compact)
+
+    def _compact(self, uri: str) -> str:
+        # Most namespaces end at the last "#" or "/", which is a single lookup.
+        split = max(uri.rfind("#"), uri.rfind("/")) + 1
+        name = self._by_namespace.get(uri[:split]) if split else None
+        if name is not None:
+            return f"{name}:{uri[split:]}"
+        for namespace, name in self.namespaces:
+            if uri.startswith(namespace):
+                return f"{name}:{uri[len(namespace):]}"
+        if self.fallback is not None and "://" in uri:
+            return self.fallback(uri)
+        return uri
+
+    def compact_many(self, values: Iterable[Any]) -> List[Any]:
+        """
+        Compacts a sequence of values; values that are not strings are kept.
+
+        Args:
+            values (Iterable[Any]): URIs, literals or missing values.
+
+        Returns:
+            List[Any]: The compacted values, in order.
+        """
+        compact = self.compact
+        return [compact(value) if isinstance(value, str) else value for value in values]
+
+    def compact_series(self, series: pd.Series) -> pd.Series:
+        """
+        Compacts a column, shortening each distinct value once.
+
+        Args:
+            series (pd.Series): A column of URIs, e.g. a categorical from
+                `convert_bindings_to_columns`.
+
+        Returns:
+            pd.Series: The compacted column, categorical if the input was.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = self.compact_many(series.cat.categories)
+            if len(set(categories)) == len(categories):
+                return series.cat.rename_categories(categories)
+            # Distinct URIs compacted to the same text (e.g. by the fallback)
+            # must share one category.
+            codes = series.cat.codes.to_numpy()
+            values = np.asarray(categories, dtype=object)[np.maximum(codes, 0)]
+            values[codes == -1] = None
+            return pd.Series(pd.Categorical(values), index=series.index, name=series.name)
+        if series.dtype != object and not pd.api.types.is_string_dtype(series):
+            return series
+        codes, uniques = pd.factorize(series)
+        if len(uniques) == 0:
+            return series
+        values = np.asarray(self.compact_many(uniques), dtype=object)[np.maximum(codes, 0)]
+        values[codes == -1] = None
+        return pd.Series(values, index=series.index, name=series.name, dtype=series.dtype)
+
+    def compact_frame(self, df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Compacts the URI columns of a DataFrame.
+
+        Args:
+            df (pd.DataFrame): Results with one column per variable.
+            columns (Optional[List[str]]): The columns to compact. Defaults to
+                the categorical columns, which is what `convert_bindings_to_columns`
+                makes of variables bound only to URIs.
+
+        Returns:
+            pd.DataFrame: A copy with the columns compacted.
+        """
+        df = df.copy(deep=False)
+        if columns is None:
+            columns = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+        for column in columns:
+            df[column] = self.compact_series(df[column])
+        return df
+
@@ -1,14 +1,137 @@
-import pandas as pd
+from __future__ import annotations
+
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from .tracing import span
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+def convert_bindings_to_dataframe(bindings: List[Dict[str, Any]], flatten: bool = True) -> pd.DataFrame:
+    """
+    Converts SPARQL query bindings into a Pandas DataFrame.
+
+    Args:
+        bindings (List[Dict[str, Any]]): A list of binding dictionaries.
+        flatten (bool): Flattens each term into `<var>.type`, `<var>.value`, ...
+            columns. Otherwise each column holds the term dictionaries.
 
-def convert_bindings_to_dataframe(bindings: List[Dict[str, Any]]) -> pd.DataFrame:
-    """Converts SPARQL query bindings into a Pandas DataFrame."""
+    Returns:
+        pd.DataFrame: A DataFrame containing the query results; empty without bindings.
+    """
     try:
         logging.info("Converting bindings to DataFrame...")
-        df = pd.json_normalize(bindings)
+        with span("convert.json_normalize", rows=len(bindings)):
+            df = pd.json_normalize(bindings) if flatten else pd.DataFrame(bindings)
         logging.info("Conversion successful.")
         return df
     except Exception as e:
         logging.error(f"Error converting bindings to DataFrame: {e}")
         raise
+
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+INTEGER_DATATYPES = {
+    XSD + name
+    for name in (
+        "integer", "int", "long", "short", "byte", "nonNegativeInteger", "positiveInteger",
+        "nonPositiveInteger", "negativeInteger", "unsignedLong", "unsignedInt",
+        "unsignedShort", "unsignedByte", "gYear",
+    )
+}
+FLOAT_DATATYPES = {XSD + "decimal", XSD + "double", XSD + "float"}
+DATETIME_DATATYPES = {XSD + "dateTime", XSD + "date", XSD + "dateTimeStamp"}
+BOOLEAN_DATATYPE = XSD + "boolean"
+
+
+def _typed_column(values: List[Optional[str]], term_types: set, datatypes: set) -> pd.Series:
+    """Converts the string values of one variable to the best matching dtype."""
+    series = pd.Series(values, dtype=object)
+    if term_types == {"uri"}:
+        return series.astype("category")
+    if len(datatypes) != 1 or not term_types <= {"literal", "typed-literal"}:
+        return series
+
+    datatype = next(iter(datatypes))
+    try:
+        if datatype in INTEGER_DATATYPES:
+            numbers = pd.to_numeric(series)
+            return numbers.astype("int64") if not numbers.isna().any() else numbers.astype("Int64")
+        if datatype in FLOAT_DATATYPES:
+            return pd.to_numeric(series).astype("float64")
+        if datatype == BOOLEAN_DATATYPE:
+            return series.map({"true": True, "1": True, "false": False, "0": False}).astype("boolean")
+        if datatype in DATETIME_DATATYPES:
+            dates = pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601")
+            # Dates outside the representable range become NaT; keep the text instead.
+            if dates.isna().sum() == series.isna().sum():
+                return dates
+    except (ValueError, TypeError, OverflowError) as e:
+        logging.debug(f"Keeping literal values as strings ({datatype}): {e}")
+    return series
+
+
+def convert_bindings_to_columns(
+    bindings: List[Dict[str, Any]],
+    variables: Optional[List[str]] = None,
+    typed: bool = True,
+    keep_metadata: bool = False,
+) -> pd.DataFrame:
+    """
+    Converts SPARQL query bindings into a DataFrame with one column per variable.
+
+    Columns are built directly from the SPARQL JSON structure instead of
+    flattening every binding. With `typed`, integer, decimal, boolean and
+    dateTime literals become native dtypes and URIs become categoricals.
+
+    Args:
+        bindings (List[Dict[str, Any]]): A list of binding dictionaries.
+        variables (Optional[List[str]]): The variables to convert, in column order,
+            e.g. from the "head" of the results. Defaults to all bound variables.
+        typed (bool): Converts literal values to dtypes matching their datatype.
+        keep_metadata (bool): Adds `<var>.type`, `<var>.datatype` and
+            `<var>.xml:lang` columns next to each value column.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the query results.
+    """
+    with span("convert.columns", rows=len(bindings)):
+        return _convert_bindings_to_columns(bindings, variables, typed, keep_metadata)
+
+
+def _convert_bindings_to_columns(
+    bindings: List[Dict[str, Any]],
+    variables: Optional[List[str]],
+    typed: bool,
+    keep_metadata: bool,
+) -> pd.DataFrame:
+    if variables is None:
+        variables = list(dict.fromkeys(var for binding in bindings for var in binding))
+
+    columns = {}
+    for var in variables:
+        cells = [binding.get(var) for binding in bindings]
+        values = [cell["value"] if cell is not None else None for cell in cells]
+        term_types = {cell["type"] for cell in cells if cell is not None}
+        datatypes = {cell.get("datatype") for cell in cells if cell is not None}
+
+        if typed:
+            columns[var] = _typed_column(values, term_types, datatypes)
+        else:
+            columns[var] = pd.Series(values, dtype=object)
+        if keep_metadata:
+            columns[f"{var}.type"] = pd.Series(
+                [cell["type"] if cell is not None else None for cell in cells], dtype="category"
+            )
+            if datatypes - {None}:
+                columns[f"{var}.datatype"] = pd.Series(
+                    [cell.get("datatype") if cell is not None else None for cell in cells],
+                    dtype="category",
+                )
+            if any(cell is not None and "xml:lang" in cell for cell in cells):
+                columns[f"{var}.xml:lang"] = pd.Series(
+                    [cell.get("xml:lang") if cell is not None else None for cell in cells],
+                    dtype="category",
+                )
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(bindings)))
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .executor import SPARQLQueryExecutor
+from .manager import QueryManager
+from .templates import QueryTemplate
+
+_RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+# Fingerprint entry standing for "any triple", used when a query's inputs cannot be narrowed down.
+_ALL = "*"
+
+PREDICATE_COUNT_TEMPLATE = QueryTemplate(
+    "SELECT (COUNT(*) AS ?count) WHERE { ?s {{predicate}} ?o }",
+    {"predicate": {"type": "iri"}},
+)
+TYPE_COUNT_TEMPLATE = QueryTemplate(
+    "SELECT (COUNT(?s) AS ?count) WHERE { ?s a {{type}} }",
+    {"type": {"type": "iri"}},
+)
+TOTAL_COUNT_QUERY = "SELECT (COUNT(*) AS ?count) WHERE { ?s ?p ?o }"
+
+
+def query_dependencies(query: str) -> Set[str]:
+    """
+    Determines which parts of the graph a query reads.
+
+    Every triple pattern with a constant predicate depends on the triples of
+    that predicate, written "p <iri>"; `?s a <Type>` patterns depend on the
+    instances of the type, written "t <iri>". A pattern with a variable
+    predicate or a property path makes the query depend on the whole graph.
+
+    Args:
+        query (str): The SPARQL query string.
+
+    Returns:
+        Set[str]: The dependencies. Contains "*" for the whole graph, which is
+        also the answer when rdflib is not installed to parse the query.
+    """
+    try:
+        from rdflib import URIRef
+        from rdflib.plugins.sparql import prepareQuery
+        from rdflib.plugins.sparql.parserutils import CompValue
+    except ImportError:
+        return {_ALL}
+
+    dependencies: Set[str] = set()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, CompValue):
+            if node.name == "BGP":
+                for _, predicate, obj in node.triples:
+                    if not isinstance(predicate, URIRef):
+                        dependencies.add(_ALL)
+                    elif str(predicate) == _RDF_TYPE and isinstance(obj, URIRef):
+                        dependencies.add(f"t {obj}")
+                    else:
+                        dependencies.add(f"p {predicate}")
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, (list, tuple)):
+            for value in node:
+                walk(value)
+
+    walk(prepareQuery(query).algebra)
+    return dependencies or {_ALL}
+
+
+@dataclass
+class RefreshResult:
+    """Outcome of refreshing one query."""
+
+    name: str
+    results: Dict[str, Any]
+    recomputed: bool
+    reason: str
+
+
+class IncrementalRefresher:
+    """Re-executes stored queries only when the parts of the graph they read have changed."""
+
+    def __init__(
+        self,
+        query_manager: QueryManager,
+        executor: SPARQLQueryExecutor,
+        directory: str = "files/results/refresh",
+        chunk_size: int = 100,
+        debug: bool = False,
+    ):
+        """
+        Initializes the IncrementalRefresher.
+
+        Args:
+            query_manager (QueryManager): Source of the queries to refresh.
+            executor (SPARQLQueryExecutor): Executor used to run the queries.
+            directory (str): Directory the previous results and their fingerprints are kept in.
+            chunk_size (int): Maximum number of counts fetched by one fingerprint query.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.query_manager = query_manager
+        self.executor = executor
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.state_path = self.directory / "state.json"
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self._state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {"endpoint": self.executor.endpoint, "queries": {}}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable refresh state {self.state_path}: {e}")
+            return {"endpoint": self.executor.endpoint, "queries": {}}
+        if state.get("endpoint") != self.executor.endpoint:
+            self.logger.warning("Refresh state belongs to another endpoint; recomputing everything.")
+            return {"endpoint": self.executor.endpoint, "queries": {}}
+        return state
+
+    def _write_json(self, path: Path, data: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+
+    def _results_path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    def _load_results(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._results_path(name), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _count(self, template: QueryTemplate, parameter: str, iris: List[str]) -> Dict[str, int]:
+        results = self.executor.execute_many(
+            template, [{parameter: iri} for iri in iris], chunk_size=self.chunk_size, refresh=True
+        )
+        return {
+            iri: int(bindings[0]["count"]["value"]) if bindings else 0
+            for iri, bindings in zip(iris, results)
+        }
+
+    def fingerprint(self, dependencies: Set[str]) -> Dict[str, int]:
+        """
+        Counts the triples behind each dependency, batching the counts into few queries.
+
+        The counts bypass the result cache so that they reflect the current
+        state of the graph.
+
+        Args:
+            dependencies (Set[str]): Dependencies as returned by `query_dependencies`.
+
+        Returns:
+            Dict[str, int]: The triple count of each dependency.
+        """
+        predicates = sorted(d[2:] for d in dependencies if d.startswith("p "))
+        types = sorted(d[2:] for d in dependencies if d.startswith("t "))
+        counts: Dict[str, int] = {}
+        for iri, count in self._count(PREDICATE_COUNT_TEMPLATE, "predicate", predicates).items():
+            counts[f"p {iri}"] = count
+        for iri, count in self._count(TYPE_COUNT_TEMPLATE, "type", types).items():
+            counts[f"t {iri}"] = count
+        if _ALL in dependencies:
+            results = self.executor.execute_query(TOTAL_COUNT_QUERY, refresh=True)
+            bindings = self.executor.extract_bindings(results)
+            counts[_ALL] = int(bindings[0]["count"]["value"]) if bindings else 0
+        return counts
+
+    def refresh(self, query_names: Optional[List[str]] = None, force: bool = False) -> List[RefreshResult]:
+        """
+        Brings the stored results of the given queries up to date.
+
+        A query is re-executed when its text changed, its stored results are
+        missing, or the triple count behind any of its dependencies changed.
+        Otherwise its previous results are returned without querying. Edits
+        that keep every count the same are not detected; use `force` to
+        recompute unconditionally.
+
+        Args:
+            query_names (Optional[List[str]]): Names of the queries to refresh. All if None.
+            force (bool): Re-executes every query.
+
+        Returns:
+            List[RefreshResult]: One result per query, in the order requested.
+
+        Raises:
+            RuntimeError: If a query or a fingerprint query fails.
+        """
+        names = list(query_names) if query_names else list(self.query_manager.list_queries())
+        queries = {name: self.query_manager.get_query(name) for name in names}
+        dependencies = {name: query_dependencies(query) for name, query in queries.items()}
+        start = time.perf_counter()
+        counts = self.fingerprint(set().union(*dependencies.values())) if names else {}
+        self.logger.info(f"Fingerprinted {len(counts)} dependencies in {time.perf_counter() - start:.2f}s.")
+
+        refreshed = []
+        for name, query in queries.items():
+            digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+            fingerprint = {dependency: counts[dependency] for dependency in sorted(dependencies[name])}
+            previous = self._state["queries"].get(name)
+            results = None
+            if force:
+                reason = "forced"
+            elif previous is None:
+                reason = "no previous results"
+            elif previous["query"] != digest:
+                reason = "query changed"
+            elif previous["fingerprint"] != fingerprint:
+                changed = [d for d in fingerprint if previous["fingerprint"].get(d) != fingerprint[d]]
+                reason = f"inputs changed: {', '.join(changed)}"
+            else:
+                results = self._load_results(name)
+                reason = "unchanged" if results is not None else "stored results missing"
+
+            if results is not None:
+                self.logger.info(f"Query '{name}' is up to date.")
+                refreshed.append(RefreshResult(name, results, False, reason))
+                continue
+
+            self.logger.info(f"Recomputing query '{name}' ({reason}).")
+            results = self.executor.execute_query(query, refresh=True)
+            self._write_json(self._results_path(name), results)
+            self._state["queries"][name] = {
+                "query": digest,
+                "fingerprint": fingerprint,
+                "updated": time.time(),
+            }
+            self._write_json(self.state_path, self._state)
+            refreshed.append(RefreshResult(name, results, True, reason))
+        return refreshed
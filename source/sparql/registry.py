@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .normalize import used_prefixes
+from .prefixes import parse_prefixes
+from .templates import QueryTemplate
+
+
+def with_prefixes(text: str, prefix_map: Dict[str, str]) -> str:
+    """
+    Prepends the PREFIX declarations a query uses, and only those.
+
+    Args:
+        text (str): The query without its prologue.
+        prefix_map (Dict[str, str]): All available prefixes and namespaces.
+
+    Returns:
+        str: The query with its prologue.
+    """
+    declarations = [
+        f"PREFIX {name}: <{prefix_map[name]}>" for name in used_prefixes(text) if name in prefix_map
+    ]
+    return "\n".join(declarations) + "\n\n" + text if declarations else text
+
+
+@dataclass
+class QueryFile:
+    """The compiled contents of one query file."""
+
+    path: Path
+    mtime_ns: int
+    prefixes: str
+    prefix_map: Dict[str, str]
+    queries: Dict[str, str]
+    templates: Dict[str, QueryTemplate]
+    datasets: Dict[str, Dict[str, Any]]
+    checked: float = field(default_factory=time.monotonic)
+
+
+def compile_query_file(path: Path) -> QueryFile:
+    """
+    Loads a query file and compiles its queries into validated templates.
+
+    Each template carries only the PREFIX declarations its query uses.
+
+    Args:
+        path (Path): The query file.
+
+    Returns:
+        QueryFile: The compiled file.
+
+    Raises:
+        RuntimeError: If the file cannot be read or is not valid JSON.
+        ValueError: If a query declares invalid parameters or is not valid SPARQL.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError as e:
+        raise RuntimeError(f"Query file not found: {path}") from e
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuntimeError(f"Invalid query file {path}: {e}") from e
+
+    prefixes = data.get("prefixes", "")
+    prefix_map = parse_prefixes(prefixes)
+    queries = {}
+    templates = {}
+    for name, entry in data.get("queries", {}).items():
+        if isinstance(entry, dict):
+            text, parameters = entry["query"], entry.get("parameters", {})
+        else:
+            text, parameters = entry, {}
+        queries[name] = text
+        try:
+            templates[name] = QueryTemplate(with_prefixes(text, prefix_map), parameters, validate=True)
+        except ValueError as e:
+            raise ValueError(f"Invalid query '{name}' in {path}: {e}") from e
+    datasets = {
+        name: {"query": with_prefixes(entry["query"], prefix_map), "derived": entry.get("derived", {})}
+        for name, entry in data.get("datasets", {}).items()
+    }
+    return QueryFile(path, mtime_ns, prefixes, prefix_map, queries, templates, datasets)
+
+
+class QueryRegistry:
+    """Process-wide store of compiled query files, reloaded when a file changes on disk.
+
+    Every query file is read, parsed and validated once, however many
+    QueryManagers (e.g. one per batch worker) use it.
+    """
+
+    def __init__(self, directory: str = "files", check_interval: float = 1.0, debug: bool = False):
+        """
+        Initializes the QueryRegistry.
+
+        Args:
+            directory (str): Directory whose `*.json` query files are loaded by `load_all`.
+            check_interval (float): Minimum seconds between two checks of a file's
+                modification time. 0 checks on every access.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self._files: Dict[Path, QueryFile] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> QueryFile:
+        """
+        Returns a compiled query file, loading it on first use and reloading it if it changed.
+
+        If a changed file fails to load, the previously compiled version is kept.
+
+        Args:
+            path (str): The query file.
+
+        Returns:
+            QueryFile: The compiled file.
+
+        Raises:
+            RuntimeError: If the file cannot be loaded the first time.
+            ValueError: If a query in it is invalid the first time it is loaded.
+        """
+        path = Path(path).resolve()
+        with self._lock:
+            compiled = self._files.get(path)
+            now = time.monotonic()
+            if compiled is not None and now - compiled.checked < self.check_interval:
+                return compiled
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if compiled is not None and compiled.mtime_ns == mtime_ns:
+                compiled.checked = now
+                return compiled
+            try:
+                start = time.perf_counter()
+                fresh = compile_query_file(path)
+            except (RuntimeError, ValueError) as e:
+                if compiled is None:
+                    self.logger.error(str(e))
+                    raise
+                self.logger.error(f"Keeping the previous version of {path}: {e}")
+                compiled.checked = now
+                return compiled
+            self.logger.info(
+                f"{'Reloaded' if compiled is not None else 'Loaded'} {len(fresh.templates)} queries "
+                f"from {path} in {time.perf_counter() - start:.2f}s."
+            )
+            self._files[path] = fresh
+            return fresh
+
+    def paths(self) -> List[Path]:
+        """Returns the query files in the registry's directory."""
+        return sorted(self.directory.glob("*.json"))
+
+    def load_all(self) -> Dict[Path, QueryFile]:
+        """
+        Loads and validates every query file in the directory.
+
+        Returns:
+            Dict[Path, QueryFile]: The compiled files by path.
+
+        Raises:
+            RuntimeError: If a file cannot be loaded.
+            ValueError: If a query is invalid.
+        """
+        return {path: self.get(str(path)) for path in self.paths()}
+
+    def clear(self) -> None:
+        """Forgets all compiled files."""
+        with self._lock:
+            self._files.clear()
+
+
+_registries: Dict[Path, QueryRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(directory: str = "files") -> QueryRegistry:
+    """
+    Returns the shared registry for a directory of query files, creating it on first use.
+
+    Args:
+        directory (str): The directory holding the query files.
+
+    Returns:
+        QueryRegistry: The registry shared by all QueryManagers of this directory.
+    """
+    key = Path(directory).resolve()
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = QueryRegistry(str(key))
+            _registries[key] = registry
+        return registry
+
+
+def load_prefix_map(path: str = "files/queries.json") -> Dict[str, str]:
+    """
+    Returns the prefix map of a query file, as currently compiled by the shared registry.
+
+    Args:
+        path (str): The query file.
+
+    Returns:
+        Dict[str, str]: Prefix names and namespaces; empty if the file cannot be loaded.
+    """
+    try:
+        return get_registry(str(Path(path).parent)).get(path).prefix_map
+    except (RuntimeError, ValueError) as e:
+        logging.debug(f"No prefixes loaded from {path}: {e}")
+        return {}
@@ -0,0 +1,335 @@
+import http.client
+import logging
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional
+
+from .backend import SPARQLBackend
+from .normalize import canonicalize_query
+from .tracing import span
+from .transport import EndpointError
+
+# HTTP statuses that signal an overloaded or briefly unavailable endpoint.
+TRANSIENT_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """The endpoint is considered unhealthy and requests are not sent."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Tells whether a failed request is worth retrying.
+
+    Args:
+        error (BaseException): The error raised by the request.
+
+    Returns:
+        bool: True for timeouts, connection failures and overload statuses.
+    """
+    if isinstance(error, EndpointError):
+        return error.status in TRANSIENT_STATUSES
+    return isinstance(error, (socket.timeout, TimeoutError, ConnectionError, http.client.HTTPException))
+
+
+class LatencyTracker:
+    """Derives request timeouts from recently observed latencies.
+
+    Latencies are kept per query key as well as overall, since a quick
+    lookup and a full aggregation over the same endpoint differ by orders of
+    magnitude; a timeout derived from one would cut the other short.
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        percentile: float = 0.99,
+        multiplier: float = 3.0,
+        min_timeout: float = 5.0,
+        max_timeout: float = 60.0,
+        max_keys: int = 256,
+    ):
+        """
+        Initializes the LatencyTracker.
+
+        Args:
+            window (int): Number of most recent latencies considered per key.
+            min_samples (int): Latencies of a key needed before `max_timeout` is tightened.
+            percentile (float): Latency percentile the timeout is based on.
+            multiplier (float): Factor applied to that percentile.
+            min_timeout (float): Lower bound of the timeout in seconds.
+            max_timeout (float): Upper bound of the timeout in seconds.
+            max_keys (int): Number of query keys tracked; the least recently used is dropped.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_keys = max_keys
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._by_key: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _samples(self, key: Optional[str]) -> List[float]:
+        with self._lock:
+            if key is None:
+                return list(self._latencies)
+            latencies = self._by_key.get(key)
+            if latencies is None:
+                return []
+            self._by_key.move_to_end(key)
+            return list(latencies)
+
+    def record(self, seconds: float, key: Optional[str] = None) -> None:
+        """
+        Records the latency of a successful request.
+
+        Args:
+            seconds (float): The request's latency.
+            key (Optional[str]): The query key, e.g. the canonical query. None
+                only adds to the overall latencies.
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+            if key is None:
+                return
+            latencies = self._by_key.get(key)
+            if latencies is None:
+                latencies = self._by_key[key] = deque(maxlen=self.window)
+                if len(self._by_key) > self.max_keys:
+                    self._by_key.popitem(last=False)
+            self._by_key.move_to_end(key)
+            latencies.append(seconds)
+
+    def quantile(self, q: float, key: Optional[str] = None) -> Optional[float]:
+        """Returns a latency quantile in seconds of a key or overall, or None without samples."""
+        latencies = sorted(self._samples(key))
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+
+    def timeout(self, key: Optional[str] = None) -> float:
+        """
+        Returns the timeout for the next request.
+
+        Args:
+            key (Optional[str]): The query key. None uses the overall latencies.
+
+        Returns:
+            float: `multiplier` times the latency percentile, clamped to
+            [min_timeout, max_timeout]; `max_timeout` until the key has enough samples.
+        """
+        latencies = self._samples(key)
+        if len(latencies) < self.min_samples:
+            return self.max_timeout
+        latencies.sort()
+        percentile = latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile))]
+        return min(self.max_timeout, max(self.min_timeout, percentile * self.multiplier))
+
+
+class CircuitBreaker:
+    """Stops sending requests to an endpoint after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail immediately. Once `reset_timeout` has passed, one trial
+    request is let through; its success closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initializes the CircuitBreaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds to wait before a trial request.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Returns "closed", "open" or "half-open"."""
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """
+        Tells whether a request may be sent now.
+
+        Returns:
+            bool: False while the circuit is open or a trial request is running.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self) -> None:
+        """Ends a trial request whose outcome says nothing about the endpoint's health."""
+        with self._lock:
+            self._trial_running = False
+
+
+class ResilientBackend(SPARQLBackend):
+    """Wraps a backend with adaptive timeouts, jittered retries and a circuit breaker."""
+
+    def __init__(
+        self,
+        backend: SPARQLBackend,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        min_timeout: float = 5.0,
+        max_timeout: Optional[float] = None,
+        timeout_multiplier: float = 3.0,
+        debug: bool = False,
+    ):
+        """
+        Initializes the ResilientBackend.
+
+        Args:
+            backend (SPARQLBackend): The backend to protect, usually a SPARQLTransport.
+            max_attempts (int): Attempts per query, including the first one.
+            base_delay (float): Upper bound of the first retry delay in seconds;
+                it doubles with every further retry ("full jitter").
+            max_delay (float): Upper bound of any retry delay in seconds.
+            failure_threshold (int): Consecutive failed queries that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial query.
+            min_timeout (float): Lower bound of the adaptive timeout in seconds.
+            max_timeout (Optional[float]): Upper bound of the adaptive timeout.
+                Defaults to the backend's own timeout.
+            timeout_multiplier (float): Factor applied to the p99 latency.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.backend = backend
+        self.endpoint = backend.endpoint
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyTracker(
+            multiplier=timeout_multiplier,
+            min_timeout=min_timeout,
+            max_timeout=max_timeout or getattr(backend, "timeout", 60.0),
+        )
+        # Only backends that accept a per-request timeout get an adaptive one.
+        self._supports_timeout = hasattr(backend, "timeout")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _check_circuit(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"Endpoint {self.endpoint} is unavailable after {self.breaker.failures} "
+                f"consecutive failures; not sending the query."
+            )
+
+    def _record_error(self, error: BaseException) -> None:
+        # Only overload and connection failures count against the endpoint; an
+        # invalid query (HTTP 4xx) or the caller's own error leaves the circuit as it is.
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def _call(self, function: Callable[..., Any], query: str) -> Any:
+        self._check_circuit()
+        key = canonicalize_query(query).key
+        attempt = 1
+        while True:
+            timeout = self.latency.timeout(key)
+            kwargs = {"timeout": timeout} if self._supports_timeout else {}
+            start = time.monotonic()
+            try:
+                with span("resilience.attempt", attempt=attempt, timeout=timeout):
+                    result = function(query, **kwargs)
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_attempts:
+                    self._record_error(e)
+                    raise
+                delay = self._delay(attempt)
+                self.logger.warning(
+                    f"Transient error from {self.endpoint} (attempt {attempt}/{self.max_attempts}): "
+                    f"{e}; retrying in {delay:.1f}s."
+                )
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.latency.record(time.monotonic() - start, key)
+            self.breaker.record_success()
+            return result
+
+    def query(self, query: str) -> Dict[str, Any]:
+        return self._call(self.backend.query, query)
+
+    @contextmanager
+    def stream(self, query: str) -> Iterator[BinaryIO]:
+        # A stream cannot be replayed once the caller has read from it, so
+        # only the circuit breaker and the timeout apply. Errors raised while
+        # opening or reading the stream are transient ones; errors of the
+        # caller's processing (e.g. invalid JSON) are not counted.
+        self._check_circuit()
+        timeout = self.latency.timeout(canonicalize_query(query).key)
+        kwargs = {"timeout": timeout} if self._supports_timeout else {}
+        try:
+            with self.backend.stream(query, **kwargs) as stream:
+                yield stream
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Returns the circuit state and the observed latencies.
+
+        Returns:
+            Dict[str, Any]: Circuit state, consecutive failures, p50/p99 latency
+            and the timeout derived from them, all over every query.
+        """
+        return {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "p50": self.latency.quantile(0.5),
+            "p99": self.latency.quantile(0.99),
+            "timeout": self.latency.timeout(),
+        }
+
+    def close(self) -> None:
+        self.backend.close()
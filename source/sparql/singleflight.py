@@ -0,0 +1,94 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """A call in progress whose outcome is shared with every waiter."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        """
+        Initializes the SingleFlight.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Runs `function` unless a call with the same key is already in flight,
+        in which case its result is awaited and returned instead.
+
+        Every caller receives the same result object, which must therefore
+        be treated as read-only.
+
+        Args:
+            key (Hashable): Identifies calls that produce the same result.
+            function (Callable[[], Any]): The call to execute.
+
+        Returns:
+            Any: The result of the (shared) call.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            self.logger.debug("Waiting for identical request in flight.")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns how many calls were executed and how many were coalesced.
+
+        Returns:
+            Dict[str, int]: The counters.
+        """
+        return {"executed": self.executed, "coalesced": self.coalesced}
+
+
+_shared = SingleFlight()
+
+
+def shared_flight() -> SingleFlight:
+    """
+    Returns the process-wide SingleFlight used by the executor and the explorer.
+
+    Returns:
+        SingleFlight: The shared instance.
+    """
+    return _shared
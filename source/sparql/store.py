@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+from .prefixes import URICompactor
+from .process import convert_bindings_to_columns
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+# Schema metadata keys are prefixed so they do not collide with pandas' own.
+_METADATA_PREFIX = "sparql."
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "The columnar result store requires pyarrow. Install it with `pip install pyarrow`."
+        ) from e
+    return pyarrow
+
+
+def write_results(
+    bindings: List[Dict[str, Any]],
+    path: str,
+    variables: Optional[List[str]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    file_format: Optional[str] = None,
+    compression: Optional[str] = None,
+    compactor: Optional[URICompactor] = None,
+) -> Path:
+    """
+    Writes SPARQL bindings to an Arrow IPC or Parquet file with typed columns.
+
+    Args:
+        bindings (List[Dict[str, Any]]): A list of binding dictionaries.
+        path (str): The output file. The format is taken from its extension
+            unless `file_format` is given.
+        variables (Optional[List[str]]): The variables to store, in column order.
+        metadata (Optional[Dict[str, Any]]): Values stored in the file's schema
+            metadata, e.g. query name, endpoint and query text. A UTC timestamp
+            is added unless one is given.
+        file_format (Optional[str]): "arrow" or "parquet".
+        compression (Optional[str]): Compression codec. Arrow files are written
+            uncompressed by default so that they can be memory-mapped without
+            copying; Parquet files default to zstd.
+        compactor (Optional[URICompactor]): Shortens the URIs to CURIEs before
+            they are stored.
+
+    Returns:
+        Path: The written file.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+        ValueError: If the format is unknown.
+    """
+    pa = _require_pyarrow()
+    path = Path(path)
+    file_format = file_format or next(
+        (name for name, suffix in FORMATS.items() if path.suffix == suffix), "arrow"
+    )
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown result format: {file_format}")
+    if path.suffix != FORMATS[file_format]:
+        path = path.with_name(path.name + FORMATS[file_format])
+
+    df = convert_bindings_to_columns(bindings, variables)
+    if compactor is not None:
+        df = compactor.compact_frame(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {"timestamp": datetime.now(timezone.utc).isoformat(), **(metadata or {})}
+    schema_metadata = dict(table.schema.metadata or {})
+    for key, value in metadata.items():
+        schema_metadata[(_METADATA_PREFIX + key).encode("utf-8")] = (
+            value if isinstance(value, str) else json.dumps(value)
+        ).encode("utf-8")
+    table = table.replace_schema_metadata(schema_metadata)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if file_format == "arrow":
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+    else:
+        pa.parquet.write_table(table, str(path), compression=compression or "zstd")
+    return path
+
+
+def read_table(path: str):
+    """
+    Opens a stored result as a pyarrow Table.
+
+    Arrow files are memory-mapped, so columns are backed by the page cache
+    and only the parts that are accessed are read from disk.
+
+    Args:
+        path (str): The result file.
+
+    Returns:
+        pyarrow.Table: The stored columns.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    pa = _require_pyarrow()
+    if str(path).endswith(FORMATS["parquet"]):
+        return pa.parquet.read_table(str(path), memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """
+    Reads the metadata of a stored result without loading its columns.
+
+    Args:
+        path (str): The result file.
+
+    Returns:
+        Dict[str, Any]: The metadata given when the file was written.
+    """
+    pa = _require_pyarrow()
+    if str(path).endswith(FORMATS["parquet"]):
+        schema = pa.parquet.read_schema(str(path))
+    else:
+        schema = pa.ipc.open_file(pa.memory_map(str(path), "r")).schema
+    metadata = {}
+    for key, value in (schema.metadata or {}).items():
+        key = key.decode("utf-8")
+        if key.startswith(_METADATA_PREFIX):
+            value = value.decode("utf-8")
+            try:
+                value = json.loads(value) if value[:1] in "[{" else value
+            except json.JSONDecodeError:
+                pass
+            metadata[key[len(_METADATA_PREFIX):]] = value
+    return metadata
+
+
+class ResultStore:
+    """Archive of query results as columnar files."""
+
+    def __init__(self, directory: str = "files/results", file_format: str = "arrow", debug: bool = False):
+        """
+        Initializes the ResultStore.
+
+        Args:
+            directory (str): Directory the result files are kept in.
+            file_format (str): "arrow" for memory-mappable files or "parquet" for compact ones.
+            debug (bool): Enables debug-level logging if True.
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown result format: {file_format}")
+        self.directory = Path(directory)
+        self.file_format = file_format
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    def save(
+        self,
+        name: str,
+        bindings: List[Dict[str, Any]],
+        variables: Optional[List[str]] = None,
+        **metadata: Any,
+    ) -> Path:
+        """
+        Stores the results of a query as a new snapshot.
+
+        Args:
+            name (str): The query name, used in the file name and metadata.
+            bindings (List[Dict[str, Any]]): A list of binding dictionaries.
+            variables (Optional[List[str]]): The variables to store, in column order.
+            **metadata: Further metadata, e.g. endpoint and query.
+
+        Returns:
+            Path: The written file.
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = self.directory / f"{name}_{timestamp}{FORMATS[self.file_format]}"
+        path = write_results(
+            bindings, str(path), variables, {"query_name": name, **metadata}, self.file_format
+        )
+        self.logger.info(f"Stored {len(bindings)} rows of '{name}' in {path}")
+        return path
+
+    def snapshots(self, name: Optional[str] = None) -> List[Path]:
+        """
+        Lists the stored result files, oldest first.
+
+        Args:
+            name (Optional[str]): Only lists snapshots of this query.
+
+        Returns:
+            List[Path]: The result files.
+        """
+        paths = [
+            path
+            for suffix in FORMATS.values()
+            for path in self.directory.glob(f"{name or ''}*{suffix}")
+            if name is None or read_metadata(str(path)).get("query_name") == name
+        ]
+        return sorted(paths, key=lambda path: path.stat().st_mtime)
+
+    def latest(self, name: str) -> Optional[Path]:
+        """Returns the newest snapshot of a query, or None."""
+        snapshots = self.snapshots(name)
+        return snapshots[-1] if snapshots else None
+
+    def load(self, path: str):
+        """Opens a snapshot as a pyarrow Table, see `read_table`."""
+        return read_table(path)
+
+    def load_dataframe(self, path: str) -> pd.DataFrame:
+        """
+        Opens a snapshot as a DataFrame with the dtypes it was stored with.
+
+        Args:
+            path (str): The result file.
+
+        Returns:
+            pd.DataFrame: The stored results.
+        """
+        return read_table(path).to_pandas()
@@ -0,0 +1,93 @@
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
+
+_BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+_SEPARATOR = re.compile(r"[\s,]*")
+_decoder = json.JSONDecoder()
+
+
+def iter_bindings(stream: BinaryIO, read_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parses the bindings of a SPARQL JSON results document.
+
+    Only the `results.bindings` array is decoded; each binding is yielded as
+    soon as it has been read, so memory use is bounded by the size of a single
+    binding plus one read buffer rather than by the size of the response.
+
+    Args:
+        stream (BinaryIO): A readable binary stream with the SPARQL JSON results.
+        read_size (int): Number of bytes read from the stream at a time.
+
+    Yields:
+        Dict[str, Any]: One binding dictionary at a time.
+
+    Raises:
+        ValueError: If the stream ends before the bindings array is closed.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    exhausted = False
+    in_bindings = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, exhausted
+        if exhausted:
+            return False
+        data = stream.read(read_size)
+        if not data:
+            exhausted = True
+            buffer = buffer[position:] + text_decoder.decode(b"", final=True)
+        else:
+            buffer = buffer[position:] + text_decoder.decode(data)
+        position = 0
+        return True
+
+    while not in_bindings:
+        match = _BINDINGS_START.search(buffer, position)
+        if match:
+            position = match.end()
+            in_bindings = True
+            break
+        # Keep a tail long enough to contain a split `"bindings" : [` token.
+        position = max(position, len(buffer) - 64)
+        if not fill():
+            return
+
+    while True:
+        position = _SEPARATOR.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            binding, end = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not fill():
+                raise ValueError("Unexpected end of SPARQL results stream.")
+            continue
+        position = end
+        yield binding
+
+
+def chunk_bindings(
+    bindings: Iterable[Dict[str, Any]], chunk_size: int = 10_000
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Groups a stream of bindings into fixed-size lists.
+
+    Args:
+        bindings (Iterable[Dict[str, Any]]): The bindings to group.
+        chunk_size (int): Number of bindings per yielded list. The last list may be shorter.
+
+    Yields:
+        List[Dict[str, Any]]: Consecutive chunks of binding dictionaries.
+    """
+    chunk = []
+    for binding in bindings:
+        chunk.append(binding)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
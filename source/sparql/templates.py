@@ -0,0 +1,198 @@
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .normalize import validate_query
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_IRI_FORBIDDEN = re.compile(r'[<>"{}|^`\\\s]')
+
+
+def format_iri(value: Any) -> str:
+    """
+    Formats a value as a SPARQL IRI reference.
+
+    Args:
+        value (Any): The IRI.
+
+    Returns:
+        str: The IRI enclosed in angle brackets.
+
+    Raises:
+        ValueError: If the value contains characters not allowed in an IRI.
+    """
+    value = str(value)
+    if not value or _IRI_FORBIDDEN.search(value):
+        raise ValueError(f"Invalid IRI: {value!r}")
+    return f"<{value}>"
+
+
+def format_string(value: Any) -> str:
+    """
+    Formats a value as an escaped SPARQL string literal.
+
+    Args:
+        value (Any): The string.
+
+    Returns:
+        str: The quoted and escaped literal.
+    """
+    escaped = (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+    )
+    return f'"{escaped}"'
+
+
+def format_integer(value: Any) -> str:
+    if isinstance(value, bool) or int(value) != Decimal(str(value)):
+        raise ValueError(f"Invalid integer: {value!r}")
+    return str(int(value))
+
+
+def format_decimal(value: Any) -> str:
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation as e:
+        raise ValueError(f"Invalid decimal: {value!r}") from e
+    if not number.is_finite():
+        raise ValueError(f"Invalid decimal: {value!r}")
+    return str(number)
+
+
+def format_boolean(value: Any) -> str:
+    if not isinstance(value, bool):
+        raise ValueError(f"Invalid boolean: {value!r}")
+    return "true" if value else "false"
+
+
+FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "iri": format_iri,
+    "string": format_string,
+    "integer": format_integer,
+    "decimal": format_decimal,
+    "boolean": format_boolean,
+}
+
+# Values substituted when a template is validated at load time.
+_SAMPLES = {
+    "iri": "urn:x",
+    "string": "",
+    "integer": 0,
+    "decimal": 0,
+    "boolean": True,
+}
+
+
+class QueryTemplate:
+    """A SPARQL query with typed `{{name}}` placeholders, compiled once and bound many times."""
+
+    def __init__(
+        self,
+        text: str,
+        parameters: Optional[Dict[str, Dict[str, Any]]] = None,
+        validate: bool = False,
+        cache_size: int = 1024,
+    ):
+        """
+        Initializes and compiles the QueryTemplate.
+
+        Args:
+            text (str): The query text with `{{name}}` placeholders.
+            parameters (Optional[Dict[str, Dict[str, Any]]]): Parameter declarations,
+                e.g. {"location": {"type": "string", "default": "dresden"}}. The
+                type is one of "iri", "string", "integer", "decimal" and "boolean".
+            validate (bool): Checks the query syntax with sample values.
+            cache_size (int): Number of bound queries memoized.
+
+        Raises:
+            ValueError: If a placeholder is undeclared, a type is unknown or
+                the query is not valid SPARQL.
+        """
+        self.text = text
+        self.parameters = parameters or {}
+        for name, spec in self.parameters.items():
+            if spec.get("type") not in FORMATTERS:
+                raise ValueError(f"Unknown type for parameter '{name}': {spec.get('type')}")
+
+        # Split once into literal segments and placeholder names.
+        self._segments: List[str] = []
+        self._names: List[str] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            name = match.group(1)
+            if name not in self.parameters:
+                raise ValueError(f"Placeholder '{name}' has no parameter declaration.")
+            self._segments.append(text[position:match.start()])
+            self._names.append(name)
+            position = match.end()
+        self._segments.append(text[position:])
+        self._defaults = {
+            name: spec["default"] for name, spec in self.parameters.items() if "default" in spec
+        }
+
+        self._bind = lru_cache(maxsize=cache_size)(self._bind_uncached)
+        if validate:
+            validate_query(
+                self._render({name: _SAMPLES[spec["type"]] for name, spec in self.parameters.items()})
+            )
+
+    def _render(self, values: Dict[str, Any]) -> str:
+        parts = [self._segments[0]]
+        for name, segment in zip(self._names, self._segments[1:]):
+            parts.append(FORMATTERS[self.parameters[name]["type"]](values[name]))
+            parts.append(segment)
+        return "".join(parts)
+
+    def _bind_uncached(self, **values: Any) -> str:
+        unknown = set(values) - set(self.parameters)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        merged = {**self._defaults, **values}
+        missing = set(self._names) - set(merged)
+        if missing:
+            raise ValueError(f"Missing parameters: {', '.join(sorted(missing))}")
+        return self._render(merged)
+
+    def bind(self, **values: Any) -> str:
+        """
+        Substitutes parameter values into the template.
+
+        Results are memoized, so repeated bindings of the same values are free.
+
+        Args:
+            **values: Parameter values. Declared defaults fill in missing ones.
+
+        Returns:
+            str: The query with all placeholders replaced by escaped values.
+
+        Raises:
+            ValueError: If a value is missing, unknown or invalid for its type.
+        """
+        try:
+            return self._bind(**values)
+        except TypeError:
+            # Unhashable values cannot be memoized.
+            return self._bind_uncached(**values)
+
+    def bind_many(self, values: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """
+        Binds the template to many sets of parameter values.
+
+        Args:
+            values (Iterable[Dict[str, Any]]): One dictionary of values per query.
+
+        Yields:
+            str: The bound queries, in order.
+        """
+        for value_set in values:
+            yield self._bind_uncached(**value_set)
+
+    def placeholders(self) -> Tuple[str, ...]:
+        """Returns the parameter names in order of appearance."""
+        return tuple(self._names)
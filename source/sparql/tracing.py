@@ -0,0 +1,263 @@
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+_ids = itertools.count(1)
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("span", default=None)
+
+
+@dataclass
+class Span:
+    """A timed operation with attributes such as byte counts, row counts and cache hits."""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    trace_id: int
+    start: float
+    duration_ms: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    thread: str = ""
+
+    def set(self, **attributes: Any) -> None:
+        """Adds attributes to the span."""
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """Records spans of the query pipeline and summarizes them as a profile."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_spans: int = 100_000,
+        path: Optional[str] = None,
+        inherited: Tuple[str, ...] = ("query_name",),
+    ):
+        """
+        Initializes the Tracer.
+
+        Args:
+            enabled (bool): Records spans if True; otherwise `span` costs next to nothing.
+                Off by default, so that long-running processes do not keep spans
+                nobody reads; the `--trace` options turn it on.
+            max_spans (int): Number of finished spans kept in memory for the report.
+            path (Optional[str]): JSON lines file every finished span is appended to.
+            inherited (Tuple[str, ...]): Attributes copied from a span to its children,
+                so that e.g. HTTP transfers can be attributed to the named query.
+        """
+        self.enabled = enabled
+        self.inherited = inherited
+        self.path = path
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, activate: bool = True, **attributes: Any) -> Iterator[Span]:
+        """
+        Times the enclosed block as a child of the current span.
+
+        Args:
+            name (str): The operation, e.g. "http.request".
+            activate (bool): Makes the span the parent of spans started inside
+                the block. Pass False for blocks that yield to other code, such
+                as generators, so that the caller's spans are not attributed to it.
+            **attributes: Initial attributes of the span.
+
+        Yields:
+            Span: The span, to which further attributes can be added.
+        """
+        parent = _current.get()
+        span_id = next(_ids)
+        if parent is not None:
+            attributes = {
+                **{key: parent.attributes[key] for key in self.inherited if key in parent.attributes},
+                **attributes,
+            }
+        span = Span(
+            name=name,
+            span_id=span_id,
+            parent_id=parent.span_id if parent is not None else None,
+            trace_id=parent.trace_id if parent is not None else span_id,
+            start=time.time(),
+            attributes=attributes,
+            thread=threading.current_thread().name,
+        )
+        if not self.enabled:
+            yield span
+            return
+        token = _current.set(span) if activate else None
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            if token is not None:
+                _current.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if self.path is not None:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def spans(self) -> List[Span]:
+        """Returns the finished spans, oldest first."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """Forgets all finished spans."""
+        with self._lock:
+            self._spans.clear()
+
+    def export_jsonl(self, path: str) -> int:
+        """
+        Writes the finished spans to a JSON lines file.
+
+        Args:
+            path (str): The output file.
+
+        Returns:
+            int: The number of spans written.
+        """
+        spans = self.spans()
+        with open(path, "w", encoding="utf-8") as file:
+            for span in spans:
+                file.write(json.dumps(asdict(span), default=str) + "\n")
+        return len(spans)
+
+    def profile(self, group_by: str = "name") -> List[Dict[str, Any]]:
+        """
+        Aggregates the finished spans.
+
+        Grouped by name, every span counts once. Grouped by an attribute, the
+        spans of one trace that carry the same value count as one execution:
+        its duration is the outermost span's, and its bytes, rows and cache
+        hit are the largest found among its spans.
+
+        Args:
+            group_by (str): "name" to group by operation, or the name of an
+                attribute such as "query_name" to group the spans carrying it.
+
+        Returns:
+            List[Dict[str, Any]]: Per group: execution count, total, mean, p95
+            and max duration in ms, summed "bytes" and "rows" attributes, cache
+            hits and errors. Largest total first.
+        """
+        executions: Dict[Tuple[str, int], List[Span]] = {}
+        for span in self.spans():
+            if group_by == "name":
+                executions[(span.name, span.span_id)] = [span]
+            elif span.attributes.get(group_by) is not None:
+                executions.setdefault((str(span.attributes[group_by]), span.trace_id), []).append(span)
+
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for (key, _), spans in executions.items():
+            groups.setdefault(key, []).append(
+                {
+                    "duration_ms": max(span.duration_ms or 0.0 for span in spans),
+                    "bytes": max(span.attributes.get("bytes", 0) for span in spans),
+                    "rows": max(span.attributes.get("rows", 0) for span in spans),
+                    "cache_hit": any(span.attributes.get("cache_hit") for span in spans),
+                    "error": any(span.error is not None for span in spans),
+                }
+            )
+
+        profile = []
+        for key, entries in groups.items():
+            durations = sorted(entry["duration_ms"] for entry in entries)
+            profile.append(
+                {
+                    group_by: key,
+                    "count": len(entries),
+                    "total_ms": sum(durations),
+                    "mean_ms": sum(durations) / len(durations),
+                    "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                    "max_ms": durations[-1],
+                    "bytes": sum(entry["bytes"] for entry in entries),
+                    "rows": sum(entry["rows"] for entry in entries),
+                    "cache_hits": sum(entry["cache_hit"] for entry in entries),
+                    "errors": sum(entry["error"] for entry in entries),
+                }
+            )
+        return sorted(profile, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def report(self, group_by: str = "name") -> str:
+        """
+        Formats the profile as a table.
+
+        Args:
+            group_by (str): See `profile`.
+
+        Returns:
+            str: The profile report.
+        """
+        lines = [
+            f"{group_by:<40} {'count':>6} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} "
+            f"{'max ms':>9} {'bytes':>12} {'rows':>9} {'hits':>5} {'errors':>6}"
+        ]
+        for entry in self.profile(group_by):
+            lines.append(
+                f"{entry[group_by][:40]:<40} {entry['count']:>6} {entry['total_ms']:>10.1f} "
+                f"{entry['mean_ms']:>9.1f} {entry['p95_ms']:>9.1f} {entry['max_ms']:>9.1f} "
+                f"{entry['bytes']:>12} {entry['rows']:>9} {entry['cache_hits']:>5} {entry['errors']:>6}"
+            )
+        return "\n".join(lines)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide Tracer the pipeline records its spans with.
+
+    It is disabled until a caller sets `enabled`, e.g. for `--trace`.
+
+    Returns:
+        Tracer: The shared instance.
+    """
+    return _tracer
+
+
+def span(name: str, activate: bool = True, **attributes: Any):
+    """Shortcut for `get_tracer().span(name, activate, **attributes)`."""
+    return _tracer.span(name, activate, **attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator recording every call of a function as a span.
+
+    Args:
+        name (Optional[str]): The span name. Defaults to the function's name.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _tracer.span(name or function.__name__):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,268 @@
+import gzip
+import http.client
+import json
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+from .backend import SPARQLBackend
+from .tracing import span
+
+SPARQL_RESULTS_JSON = "application/sparql-results+json"
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+# between two requests; the request is retried once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class EndpointError(RuntimeError):
+    """The endpoint answered with an HTTP error status."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class SPARQLTransport(SPARQLBackend):
+    """Sends SPARQL queries over a pool of persistent HTTP connections."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        pool_size: int = 4,
+        timeout: float = 60.0,
+        compress: bool = True,
+        debug: bool = False,
+    ):
+        """
+        Initializes the SPARQLTransport.
+
+        Args:
+            endpoint (str): The SPARQL endpoint URL.
+            pool_size (int): Maximum number of idle connections kept open.
+            timeout (float): Socket timeout in seconds for connecting and reading.
+            compress (bool): Requests gzip-compressed responses if True.
+            debug (bool): Enables debug-level logging if True.
+        """
+        parsed = urlparse(endpoint)
+        if parsed.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported endpoint scheme: {endpoint}")
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.compress = compress
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+        self._connection_class = (
+            http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        )
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._path = parsed.path or "/"
+        if parsed.query:
+            self._path += "?" + parsed.query
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        """Returns an idle pooled connection, or a new one if none is available."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            self.logger.debug(f"Opening new connection to {self._host}")
+            return self._connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        """Returns a connection to the pool, closing it if the pool is full."""
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Accept": SPARQL_RESULTS_JSON,
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Connection": "keep-alive",
+        }
+        if self.compress:
+            headers["Accept-Encoding"] = "gzip"
+        return headers
+
+    def _send(self, connection: http.client.HTTPConnection, query: str) -> http.client.HTTPResponse:
+        body = urlencode({"query": query})
+        connection.request("POST", self._path, body=body, headers=self._headers())
+        return connection.getresponse()
+
+    @staticmethod
+    def _set_timeout(connection: http.client.HTTPConnection, timeout: float) -> None:
+        """Sets the timeout of a connection, whether or not it is already connected."""
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+
+    def _open(
+        self, query: str, timeout: Optional[float] = None
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Sends a query on a pooled connection and returns it with the pending response."""
+        connection = self._acquire()
+        self._set_timeout(connection, timeout if timeout is not None else self.timeout)
+        try:
+            try:
+                response = self._send(connection, query)
+            except _STALE_CONNECTION_ERRORS:
+                self.logger.debug("Pooled connection was closed by the server; reconnecting.")
+                connection.close()
+                response = self._send(connection, query)
+        except Exception:
+            connection.close()
+            raise
+        return connection, response
+
+    def _finish(
+        self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse
+    ) -> None:
+        """Returns a connection to the pool once its response has been fully read."""
+        if response.will_close or not response.isclosed():
+            connection.close()
+        else:
+            self._release(connection)
+
+    @staticmethod
+    def _check_status(response: http.client.HTTPResponse, body: bytes) -> None:
+        if response.status != 200:
+            raise EndpointError(
+                f"Endpoint returned HTTP {response.status} {response.reason}: "
+                f"{body[:200].decode('utf-8', 'replace')}",
+                response.status,
+            )
+
+    def request(self, query: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Sends a query and returns the raw (decompressed) response body.
+
+        Args:
+            query (str): The SPARQL query string.
+            timeout (Optional[float]): Socket timeout for this request. Defaults
+                to the transport's timeout.
+
+        Returns:
+            bytes: The response body.
+
+        Raises:
+            EndpointError: If the endpoint responds with a non-200 status.
+        """
+        with span("http.request", host=self._host) as request_span:
+            connection, response = self._open(query, timeout)
+            try:
+                body = response.read()
+            finally:
+                self._finish(connection, response)
+
+            request_span.set(status=response.status, bytes=len(body))
+            if response.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+                request_span.set(gzip=True, decompressed_bytes=len(body))
+            self._check_status(response, body)
+        self.logger.debug(f"Received {len(body)} bytes from {self._host}")
+        return body
+
+    @contextmanager
+    def stream(self, query: str, timeout: Optional[float] = None) -> Iterator[BinaryIO]:
+        """
+        Sends a query and yields the response body as a readable stream.
+
+        The connection is returned to the pool only if the body was read to
+        the end; otherwise it is closed when the context exits.
+
+        Args:
+            query (str): The SPARQL query string.
+            timeout (Optional[float]): Socket timeout for this request. Defaults
+                to the transport's timeout.
+
+        Yields:
+            BinaryIO: The (decompressed) response body.
+
+        Raises:
+            EndpointError: If the endpoint responds with a non-200 status.
+        """
+        connection, response = self._open(query, timeout)
+        try:
+            # The span covers the download, which happens while the caller reads.
+            with span("http.stream", activate=False, host=self._host, status=response.status):
+                if response.status != 200:
+                    self._check_status(response, response.read())
+                if response.getheader("Content-Encoding", "").lower() == "gzip":
+                    yield gzip.GzipFile(fileobj=response, mode="rb")
+                else:
+                    yield response
+        finally:
+            self._finish(connection, response)
+
+    def query(self, query: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Sends a query and returns the decoded SPARQL JSON results.
+
+        Args:
+            query (str): The SPARQL query string.
+            timeout (Optional[float]): Socket timeout for this request. Defaults
+                to the transport's timeout.
+
+        Returns:
+            Dict[str, Any]: The query results in JSON format.
+        """
+        body = self.request(query, timeout)
+        with span("json.decode", bytes=len(body)):
+            return json.loads(body)
+
+    def close(self) -> None:
+        """Closes all idle pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_transports: Dict[str, SPARQLTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(endpoint: str, **kwargs: Any) -> SPARQLTransport:
+    """
+    Returns the shared transport for an endpoint, creating it on first use.
+
+    Args:
+        endpoint (str): The SPARQL endpoint URL.
+        **kwargs: Options passed to SPARQLTransport when it is created. Later
+            calls may omit them, but must not ask for different ones.
+
+    Returns:
+        SPARQLTransport: The transport shared by all callers using this endpoint.
+
+    Raises:
+        ValueError: If the endpoint's transport exists with different options.
+    """
+    with _transports_lock:
+        transport = _transports.get(endpoint)
+        if transport is None:
+            transport = SPARQLTransport(endpoint, **kwargs)
+            _transports[endpoint] = transport
+            return transport
+        conflicts = {
+            name: (getattr(transport, name), value)
+            for name, value in kwargs.items()
+            if name != "debug" and getattr(transport, name) != value
+        }
+        if conflicts:
+            details = ", ".join(f"{name}={new!r} (has {old!r})" for name, (old, new) in conflicts.items())
+            raise ValueError(f"The transport for {endpoint} already exists with other options: {details}")
+        return transport
@@ -0,0 +1,323 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .normalize import VERBATIM_PATTERN
+from .paginate import split_limit_offset
+from .process import FLOAT_DATATYPES, INTEGER_DATATYPES
+from .templates import PLACEHOLDER_PATTERN, FORMATTERS, QueryTemplate
+
+_LIMIT_PLACEHOLDER = re.compile(r"\bLIMIT\s+\{\{\s*(\w+)\s*\}\}", re.IGNORECASE)
+_SELECT = re.compile(r"\bSELECT\s+(?:DISTINCT\s+|REDUCED\s+)?", re.IGNORECASE)
+_WHERE = re.compile(r"\bWHERE\s*\{", re.IGNORECASE)
+_GROUP_BY = re.compile(r"\bGROUP\s+BY\b", re.IGNORECASE)
+_PROLOGUE = re.compile(r"(?:\s*(?:PREFIX\s+[\w.-]*:\s*<[^>]*>|BASE\s*<[^>]*>))*\s*", re.IGNORECASE)
+_AGGREGATE = re.compile(r"\b(?:COUNT|SUM|AVG|MIN|MAX|SAMPLE|GROUP_CONCAT)\s*\(", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_CONDITION = re.compile(r"\s*(?:(ASC|DESC)\s*\(\s*[?$](\w+)\s*\)|[?$](\w+))", re.IGNORECASE)
+
+# Prefix of the variables that carry the batched parameter values.
+VARIABLE_PREFIX = "_batch_"
+
+# Turn a bound RDF term's value and a parameter value into comparable keys.
+_KEYS: Dict[str, Callable[[Any], Hashable]] = {
+    "iri": str,
+    "string": str,
+    "integer": int,
+    "decimal": lambda value: Decimal(str(value)),
+    "boolean": lambda value: value if isinstance(value, bool) else value in ("true", "1"),
+}
+
+
+def _closing_brace(text: str, start: int) -> int:
+    """Returns the index of the `}` closing the group opened just before `start`."""
+    depth = 1
+    position = start
+    while position < len(text):
+        char = text[position]
+        if char in "\"'<":
+            verbatim = VERBATIM_PATTERN.match(text, position)
+            if verbatim:
+                position = verbatim.end()
+                continue
+        elif char == "#":
+            end = text.find("\n", position)
+            position = len(text) if end == -1 else end
+            continue
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return position
+        position += 1
+    raise ValueError("Unbalanced braces in query.")
+
+
+def _order_conditions(text: str) -> Optional[List[Tuple[str, bool]]]:
+    """
+    Reads the ORDER BY clause of a query.
+
+    Returns:
+        Optional[List[Tuple[str, bool]]]: The variables and whether each is sorted
+        descending; empty without ORDER BY, None if a condition is an expression.
+    """
+    match = _ORDER_BY.search(text, text.rfind("}") + 1)
+    if match is None:
+        return []
+    clause = match.group(1).rstrip()
+    conditions = []
+    position = 0
+    while position < len(clause):
+        condition = _ORDER_CONDITION.match(clause, position)
+        if condition is None:
+            return None
+        direction, name, plain = condition.groups()
+        conditions.append((name or plain, (direction or "").upper() == "DESC"))
+        position = condition.end()
+    return conditions
+
+
+def _term_order(cell: Optional[Dict[str, Any]]) -> Tuple[int, int, Any]:
+    """Sort key of an RDF term: unbound, blank nodes, IRIs, then literals, numbers by value."""
+    if cell is None:
+        return (0, 0, "")
+    term_type = cell.get("type")
+    if term_type == "bnode":
+        return (1, 0, cell["value"])
+    if term_type == "uri":
+        return (2, 0, cell["value"])
+    if cell.get("datatype") in INTEGER_DATATYPES or cell.get("datatype") in FLOAT_DATATYPES:
+        try:
+            number = float(cell["value"])
+        except ValueError:
+            number = None
+        if number is not None and number == number:  # NaN cannot be ordered.
+            return (3, 0, number)
+    return (3, 1, cell["value"])
+
+
+def _sort_bindings(bindings: List[Dict], conditions: List[Tuple[str, bool]]) -> None:
+    """Sorts bindings in place by ORDER BY conditions, see `_order_conditions`."""
+    # Stable sorts from the last condition to the first give the combined order.
+    for name, descending in reversed(conditions):
+        bindings.sort(key=lambda binding: _term_order(binding.get(name)), reverse=descending)
+
+
+class ValuesBatcher:
+    """Runs one query template for many parameter values using VALUES blocks."""
+
+    def __init__(
+        self,
+        execute: Callable[[str], List[Dict]],
+        chunk_size: int = 100,
+        parallel: int = 1,
+        debug: bool = False,
+    ):
+        """
+        Initializes the ValuesBatcher.
+
+        Args:
+            execute (Callable[[str], List[Dict]]): Runs a query and returns its bindings.
+            chunk_size (int): Maximum number of value rows per VALUES block.
+            parallel (int): Number of chunk queries run concurrently.
+            debug (bool): Enables debug-level logging if True.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        self.execute = execute
+        self.chunk_size = chunk_size
+        self.parallel = max(parallel, 1)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    def _insert_values(
+        self, text: str, batched: List[str], types: Dict[str, str], rows: List[Tuple[Any, ...]]
+    ) -> str:
+        """Binds the batch variables of a SELECT query with a VALUES block and projects them."""
+        select = _SELECT.search(text)
+        where = _WHERE.search(text, select.end() if select else 0)
+        if select is None or where is None:
+            raise ValueError("Only SELECT ... WHERE { ... } queries can be batched.")
+        variables = " ".join(f"?{VARIABLE_PREFIX}{name}" for name in batched)
+
+        # Insert from the back so that earlier offsets stay valid.
+        end = _closing_brace(text, where.end())
+        group_by = _GROUP_BY.search(text, end)
+        projection = text[select.end():where.start()]
+        if group_by:
+            text = f"{text[:group_by.end()]} {variables}{text[group_by.end():]}"
+        elif _AGGREGATE.search(projection):
+            text = f"{text[:end + 1]}\nGROUP BY {variables}{text[end + 1:]}"
+        values = "\n".join(
+            "(" + " ".join(FORMATTERS[types[name]](value) for name, value in zip(batched, row)) + ")"
+            for row in rows
+        )
+        text = f"{text[:where.end()]}\nVALUES ({variables}) {{\n{values}\n}}{text[where.end():]}"
+        if not projection.lstrip().startswith("*"):
+            text = f"{text[:select.end()]}{variables} {text[select.end():]}"
+        return text
+
+    def build_query(
+        self,
+        template: QueryTemplate,
+        batched: List[str],
+        shared: Dict[str, Any],
+        rows: List[Tuple[Any, ...]],
+        limit: Optional[int] = None,
+    ) -> str:
+        """
+        Builds one query that answers the template for several value rows.
+
+        The batched placeholders become variables bound by a VALUES block at the
+        start of the WHERE clause. The variables are added to the projection and,
+        for aggregate queries, to the GROUP BY clause, so that every solution
+        states which row it belongs to.
+
+        A template with a `LIMIT {{...}}` clause is limited per row instead of
+        overall: each row gets its own sub-select with `LIMIT limit`, and the
+        sub-selects are joined with UNION. The sub-select's ORDER BY decides
+        which solutions are kept, but their order is not guaranteed to survive
+        the UNION, so `run` sorts each row's solutions again.
+
+        Args:
+            template (QueryTemplate): The query template.
+            batched (List[str]): Names of the parameters that vary between rows.
+            shared (Dict[str, Any]): Values of the remaining parameters.
+            rows (List[Tuple[Any, ...]]): Values of the batched parameters, in `batched` order.
+            limit (Optional[int]): Value of the template's LIMIT placeholder.
+
+        Returns:
+            str: The batched query.
+
+        Raises:
+            ValueError: If the query cannot be batched.
+        """
+        types = {name: spec["type"] for name, spec in template.parameters.items()}
+        limited = _LIMIT_PLACEHOLDER.search(template.text) is not None
+        if limited and limit is None:
+            raise ValueError("A limit is required to batch a template with a LIMIT placeholder.")
+        text = _LIMIT_PLACEHOLDER.sub(f"LIMIT {int(limit)}" if limited else "", template.text)
+        text = PLACEHOLDER_PATTERN.sub(
+            lambda match: (
+                f"?{VARIABLE_PREFIX}{match.group(1)}"
+                if match.group(1) in batched
+                else FORMATTERS[types[match.group(1)]](shared[match.group(1)])
+            ),
+            text,
+        )
+        if not limited:
+            if split_limit_offset(text)[1:] != (None, 0):
+                raise ValueError("Queries with a fixed LIMIT or OFFSET cannot be batched.")
+            return self._insert_values(text, batched, types, rows)
+
+        # Sub-selects cannot declare prefixes, so the prologue moves to the outer query.
+        prologue = _PROLOGUE.match(text).group(0)
+        body = text[len(prologue):].strip()
+        subqueries = "\nUNION\n".join(
+            f"{{\n{self._insert_values(body, batched, types, [row])}\n}}" for row in rows
+        )
+        return f"{prologue}SELECT * WHERE {{\n{subqueries}\n}}"
+
+    def run(self, template: QueryTemplate, parameter_sets: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """
+        Answers a template for every parameter set with as few queries as possible.
+
+        Parameters whose values are the same in every set are bound directly;
+        the others are sent in VALUES blocks of at most `chunk_size` rows.
+
+        Args:
+            template (QueryTemplate): The query template.
+            parameter_sets (List[Dict[str, Any]]): The parameter values of each invocation.
+
+        Returns:
+            List[List[Dict]]: The bindings of each invocation, in the order of `parameter_sets`.
+
+        Raises:
+            ValueError: If the template cannot be batched or a value is invalid.
+        """
+        if not parameter_sets:
+            return []
+        defaults = {
+            name: spec["default"] for name, spec in template.parameters.items() if "default" in spec
+        }
+        parameter_sets = [{**defaults, **parameters} for parameters in parameter_sets]
+        types = {name: spec["type"] for name, spec in template.parameters.items()}
+        limits = set(_LIMIT_PLACEHOLDER.findall(template.text))
+        names = [name for name in dict.fromkeys(template.placeholders()) if name not in limits]
+        for parameters in parameter_sets:
+            missing = (set(names) | limits) - set(parameters)
+            if missing:
+                raise ValueError(f"Missing parameters: {', '.join(sorted(missing))}")
+
+        batched = [
+            name for name in names
+            if any(parameters[name] != parameter_sets[0][name] for parameters in parameter_sets)
+        ]
+        shared = {name: parameter_sets[0][name] for name in names if name not in batched}
+
+        # Each row is limited on the endpoint to the largest limit requested;
+        # invocations asking for fewer solutions are cut below.
+        limit = max(
+            (int(parameters[name]) for parameters in parameter_sets for name in limits), default=None
+        )
+
+        def cut(bindings: List[Dict], parameters: Dict[str, Any]) -> List[Dict]:
+            row_limit = min((int(parameters[name]) for name in limits), default=None)
+            return bindings[:row_limit] if row_limit is not None else list(bindings)
+
+        if not batched:
+            widest = {**parameter_sets[0], **{name: limit for name in limits}}
+            bindings = self.execute(template.bind(**widest))
+            return [cut(bindings, parameters) for parameters in parameter_sets]
+
+        def key(values: List[Any]) -> Tuple[Hashable, ...]:
+            return tuple(_KEYS[types[name]](value) for name, value in zip(batched, values))
+
+        rows: Dict[Tuple[Hashable, ...], Tuple[Any, ...]] = {}
+        for parameters in parameter_sets:
+            row = tuple(parameters[name] for name in batched)
+            rows.setdefault(key(list(row)), row)
+        unique_rows = list(rows.values())
+        chunks = [
+            unique_rows[i:i + self.chunk_size] for i in range(0, len(unique_rows), self.chunk_size)
+        ]
+        self.logger.debug(
+            f"Batching {len(parameter_sets)} invocations into {len(chunks)} queries "
+            f"over {', '.join(batched) or 'no varying parameters'}."
+        )
+
+        # The order within each sub-select is lost in the UNION, see `build_query`.
+        order = _order_conditions(_LIMIT_PLACEHOLDER.sub("", template.text)) if limits else []
+        if order is None:
+            self.logger.debug("Cannot sort by an ORDER BY expression; keeping the endpoint's order.")
+
+        def fetch(chunk: List[Tuple[Any, ...]]) -> List[Dict]:
+            return self.execute(self.build_query(template, batched, shared, chunk, limit))
+
+        variables = [VARIABLE_PREFIX + name for name in batched]
+        groups: Dict[Tuple[Hashable, ...], List[Dict]] = {row_key: [] for row_key in rows}
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            for bindings in pool.map(fetch, chunks):
+                for binding in bindings:
+                    try:
+                        row_key = key([binding[variable]["value"] for variable in variables])
+                    except (KeyError, ValueError, ArithmeticError):
+                        self.logger.debug("Skipping solution without batch values.")
+                        continue
+                    group = groups.get(row_key)
+                    if group is not None:
+                        group.append(
+                            {name: cell for name, cell in binding.items() if name not in variables}
+                        )
+
+        if order:
+            for group in groups.values():
+                _sort_bindings(group, order)
+
+        return [
+            cut(groups[key([parameters[name] for name in batched])], parameters)
+            for parameters in parameter_sets
+        ]
@@ -0,0 +1,327 @@
+import contextlib
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+_LIMIT = re.compile(r"\bLIMIT\s+(\d+)", re.IGNORECASE)
+BENCHMARK_QUERY = "SELECT ?value ?count ?label WHERE {{ ?value ?p ?label }} LIMIT {rows}"
+
+
+def synthetic_results(rows: int, seed: int = 0) -> bytes:
+    """
+    Renders a SPARQL JSON result set with `rows` bindings.
+
+    Every binding has a URI (`value`), an xsd:integer literal (`count`) and
+    a language-tagged literal (`label`), mirroring the explorer's results.
+
+    Args:
+        rows (int): Number of bindings.
+        seed (int): Varies the generated values.
+
+    Returns:
+        bytes: The UTF-8 encoded response body.
+    """
+    head = b'{"head": {"vars": ["value", "count", "label"]}, "results": {"bindings": ['
+    binding = (
+        '{{"value": {{"type": "uri", "value": "http://example.org/resource/{0}"}}, '
+        '"count": {{"type": "literal", "datatype": "http://www.w3.org/2001/XMLSchema#integer", '
+        '"value": "{1}"}}, '
+        '"label": {{"type": "literal", "xml:lang": "en", "value": "Resource {0}"}}}}'
+    )
+    parts = [head]
+    batch = 10_000
+    for start in range(0, rows, batch):
+        chunk = ",".join(
+            binding.format(i, (i * 7919 + seed) % 100_003) for i in range(start, min(start + batch, rows))
+        )
+        parts.append((("," if start else "") + chunk).encode("utf-8"))
+    parts.append(b"]}}")
+    return b"".join(parts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body_cache: Dict[int, bytes] = {}
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        query = parse_qs(self.rfile.read(length).decode("utf-8")).get("query", [""])[0]
+        match = _LIMIT.search(query)
+        rows = int(match.group(1)) if match else 0
+        if rows not in self.body_cache:
+            # Keep only the most recent size to bound the server's memory.
+            self.body_cache.clear()
+            self.body_cache[rows] = synthetic_results(rows)
+        body = self.body_cache[rows]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/sparql-results+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def _serve(port: "multiprocessing.Value") -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    port.value = server.server_address[1]
+    server.serve_forever()
+
+
+class SyntheticEndpoint:
+    """Local stand-in SPARQL endpoint serving synthetic results of the size named by the query's LIMIT.
+
+    The server runs in its own process so that generating and sending results
+    does not compete with the measured client for the interpreter lock.
+    """
+
+    def __enter__(self) -> "SyntheticEndpoint":
+        port = multiprocessing.Value("i", 0)
+        self._process = multiprocessing.Process(target=_serve, args=(port,), daemon=True)
+        self._process.start()
+        deadline = time.monotonic() + 10
+        while port.value == 0:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Synthetic endpoint did not start.")
+            time.sleep(0.01)
+        self.url = f"http://127.0.0.1:{port.value}/sparql"
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._process.terminate()
+        self._process.join()
+
+
+@dataclass
+class StageResult:
+    """Measurements of one pipeline stage at one result size."""
+
+    stage: str
+    rows: int
+    seconds: float
+    min_seconds: float
+    rows_per_second: float
+    peak_mb: Optional[float]
+
+
+def measure(
+    function: Callable[[], Any], repeat: int = 3, memory: bool = True
+) -> Tuple[Any, List[float], Optional[float]]:
+    """
+    Times a function and measures its peak Python heap allocation.
+
+    The timed runs are done without tracing; the peak memory is measured in
+    one extra traced run, since tracing slows allocations down.
+
+    Args:
+        function (Callable[[], Any]): The stage to measure.
+        repeat (int): Number of timed runs.
+        memory (bool): Measures the peak allocation with tracemalloc.
+
+    Returns:
+        Tuple[Any, List[float], Optional[float]]: The last result, the run
+        times in seconds and the peak allocation in MiB (None if not measured).
+    """
+    timings = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = function()
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return result, timings, peak
+
+
+class PipelineBenchmark:
+    """Measures the query, conversion and display stages for growing result sizes."""
+
+    def __init__(self, endpoint: str, repeat: int = 3, memory: bool = True, debug: bool = False):
+        """
+        Initializes the PipelineBenchmark.
+
+        Args:
+            endpoint (str): URL of a synthetic endpoint, see `SyntheticEndpoint`.
+            repeat (int): Number of timed runs per stage.
+            memory (bool): Also measures the peak memory of each stage.
+            debug (bool): Enables debug-level logging if True.
+        """
+        self.endpoint = endpoint
+        self.repeat = repeat
+        self.memory = memory
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    def _stages(self, rows: int) -> List[Tuple[str, Callable[[Any], Any]]]:
+        from source.sparql.executor import SPARQLQueryExecutor
+        from source.sparql.process import convert_bindings_to_columns, convert_bindings_to_dataframe
+        from source.util.utils import display_results, sort_results, top_k
+
+        executor = SPARQLQueryExecutor(self.endpoint)
+        query = BENCHMARK_QUERY.format(rows=rows)
+
+        def display(sorted_bindings: List[Dict]) -> None:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                display_results(sorted_bindings, "value", "count")
+
+        # Each stage receives the output of the stage it depends on.
+        return [
+            ("execute_query", lambda _: executor.execute_query(query)),
+            ("extract_bindings", lambda results: executor.extract_bindings(results)),
+            ("convert_bindings_to_dataframe", lambda bindings: convert_bindings_to_dataframe(bindings)),
+            ("convert_bindings_to_columns", lambda bindings: convert_bindings_to_columns(bindings)),
+            ("sort_results", lambda bindings: sort_results(bindings, "count")),
+            ("top_k", lambda bindings: top_k(bindings, "count", 20)),
+            ("display_results", display),
+        ]
+
+    def run_size(self, rows: int) -> List[StageResult]:
+        """
+        Measures every stage for one result size.
+
+        Args:
+            rows (int): Number of bindings in the result set.
+
+        Returns:
+            List[StageResult]: One measurement per stage.
+        """
+        stages = self._stages(rows)
+        # Lets the endpoint render the result set before anything is timed.
+        stages[0][1](None)
+
+        outputs: Dict[str, Any] = {}
+        inputs = {
+            "execute_query": lambda: None,
+            "extract_bindings": lambda: outputs["execute_query"],
+            "convert_bindings_to_dataframe": lambda: outputs["extract_bindings"],
+            "convert_bindings_to_columns": lambda: outputs["extract_bindings"],
+            "sort_results": lambda: outputs["extract_bindings"],
+            "top_k": lambda: outputs["extract_bindings"],
+            "display_results": lambda: outputs["sort_results"],
+        }
+        measurements = []
+        logging.disable(logging.INFO)
+        try:
+            for name, stage in stages:
+                argument = inputs[name]()
+                outputs[name], timings, peak = measure(
+                    lambda: stage(argument), self.repeat, self.memory
+                )
+                median = statistics.median(timings)
+                measurements.append(
+                    StageResult(name, rows, median, min(timings), rows / median if median else 0.0, peak)
+                )
+        finally:
+            logging.disable(logging.NOTSET)
+        for result in measurements:
+            peak = f"{result.peak_mb:>9.1f} MiB" if result.peak_mb is not None else ""
+            self.logger.info(
+                f"{result.rows:>10} rows  {result.stage:<30} {result.seconds * 1000:>10.1f} ms "
+                f"{result.rows_per_second:>14,.0f} rows/s {peak}"
+            )
+        return measurements
+
+    def run(self, sizes: List[int]) -> List[StageResult]:
+        """
+        Measures every stage for every result size.
+
+        Args:
+            sizes (List[int]): Numbers of bindings, e.g. [1_000, 10_000, 100_000].
+
+        Returns:
+            List[StageResult]: All measurements.
+        """
+        results = []
+        for rows in sizes:
+            self.logger.info(f"Benchmarking {rows} rows...")
+            results.extend(self.run_size(rows))
+        return results
+
+
+def save_results(results: List[StageResult], directory: str = "files/benchmarks") -> Path:
+    """
+    Saves benchmark measurements with information about the machine they were taken on.
+
+    Args:
+        results (List[StageResult]): The measurements.
+        directory (str): Output directory.
+
+    Returns:
+        Path: The written file.
+    """
+    path = Path(directory) / f"benchmark_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": [asdict(result) for result in results],
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+    return path
+
+
+def compare_results(
+    results: List[StageResult], baseline_path: str, threshold: float = 0.10
+) -> List[Dict[str, Any]]:
+    """
+    Compares measurements with a saved baseline.
+
+    Args:
+        results (List[StageResult]): The new measurements.
+        baseline_path (str): A file written by `save_results`.
+        threshold (float): Relative slowdown above which a stage counts as regressed.
+
+    Returns:
+        List[Dict[str, Any]]: Per stage and size: baseline and new seconds,
+        their ratio and whether it regressed. Stages missing from the
+        baseline are skipped.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {
+            (entry["stage"], entry["rows"]): entry for entry in json.load(file)["results"]
+        }
+    comparison = []
+    for result in results:
+        before = baseline.get((result.stage, result.rows))
+        if before is None:
+            continue
+        ratio = result.seconds / before["seconds"] if before["seconds"] else float("inf")
+        comparison.append(
+            {
+                "stage": result.stage,
+                "rows": result.rows,
+                "baseline_seconds": before["seconds"],
+                "seconds": result.seconds,
+                "ratio": ratio,
+                "regressed": ratio > 1 + threshold,
+            }
+        )
+    return comparison
@@ -1,14 +1,22 @@
+from __future__ import annotations
+
 from genericpath import exists
 import logging
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Union
 from os import listdir
 from os.path import isfile, join
-import pandas as pd
 import json
 from pathlib import Path
 import os
 from datetime import datetime
 from urllib.parse import urlparse
+from source.sparql.prefixes import URICompactor
+from source.sparql.registry import load_prefix_map
+from source.sparql.tracing import span
+from source.sparql.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 def list_dir_files(directory: str) -> List[str]:
     """
@@ -86,27 +94,64 @@ def extract_relevant(uri: str) -> str:
     fragment = parsed.fragment  # Fragment after #
     return f"{domain} | {path} | {fragment}" if fragment else f"{domain} | {path}"
 
-def display_results(results: List[Dict], key: str, count_key: str) -> None:
+_display_compactor: Optional[URICompactor] = None
+_display_prefixes: Optional[Dict[str, str]] = None
+
+
+def get_display_compactor() -> URICompactor:
+    """
+    Returns the compactor used for displaying URIs.
+
+    It shortens URIs to CURIEs with the prefixes of `files/queries.json`, and
+    URIs outside those namespaces with `extract_relevant`. It is rebuilt when
+    the query registry reloads the file.
+
+    Returns:
+        URICompactor: The shared instance.
+    """
+    global _display_compactor, _display_prefixes
+    prefixes = load_prefix_map()
+    if _display_compactor is None or prefixes is not _display_prefixes:
+        _display_compactor = URICompactor(prefixes, fallback=extract_relevant)
+        _display_prefixes = prefixes
+    return _display_compactor
+
+
+def _column(results: Union[List[Dict], pd.DataFrame], key: str) -> List[Any]:
+    """Returns the plain values of one variable from bindings or a DataFrame."""
+    if isinstance(results, pd.DataFrame):
+        column = key if key in results.columns else f"{key}.value"
+        return results[column].tolist()
+    return [result[key]["value"] for result in results]
+
+
+def display_results(
+    results: Union[List[Dict], pd.DataFrame], key: str, count_key: str, start: int = 1
+) -> None:
     """
     Displays results in a readable format.
 
     Args:
-        results (List[Dict]): A list of result dictionaries.
+        results (Union[List[Dict], pd.DataFrame]): A list of result dictionaries,
+            or a DataFrame with one column per variable.
         key (str): The key for the main value to display.
         count_key (str): The key for the count value.
+        start (int): Number of the first displayed row.
     """
     logging.info("Displaying results.")
-    for i, result in enumerate(results, start=1):
-        # print(
-        #     # f"{i}: {key.capitalize()}: {result[key]['value'].stem if type(result[key]['value']) == Path else result[key]['value']}, Count: {result[count_key]['value']}"
-        #     f"{i}: {key.capitalize()}: {result[key]['value']}, Count: {result[count_key]['value']}"
-        # )
-        formatted_string = (
-            f"{i:<3} | {key.capitalize():<15} | "
-            f"Type: {extract_relevant(result[key]['value']):<50} | "
-            f"Count: {result[count_key]['value']:>10}"
-        )
-        print(formatted_string)
+    with span("display", rows=len(results)):
+        values = get_display_compactor().compact_many(_column(results, key))
+        _print_results(values, _column(results, count_key), key, start)
+
+
+def _print_results(values: List[Any], counts: List[Any], key: str, start: int = 1) -> None:
+    lines = [
+        f"{i:<3} | {key.capitalize():<15} | "
+        f"Type: {str(value):<50} | "
+        f"Count: {count:>10}"
+        for i, (value, count) in enumerate(zip(values, counts), start=start)
+    ]
+    print("\n".join(lines))
 
 def get_user_selection(results: List[Dict], key: str) -> Optional[str]:
     """
@@ -133,33 +178,108 @@ def get_user_selection(results: List[Dict], key: str) -> Optional[str]:
             print("Invalid input. Please enter a number.")
 
 
-def sort_results(results: List[Dict], count_key: str) -> List[Dict]:
+def parse_counts(results: Union[List[Dict], pd.DataFrame], count_key: str) -> np.ndarray:
+    """
+    Parses the count of every result once into an integer array.
+
+    Args:
+        results (Union[List[Dict], pd.DataFrame]): Bindings or a DataFrame.
+        count_key (str): The key of the count value.
+
+    Returns:
+        np.ndarray: The counts as int64, in result order.
+    """
+    if isinstance(results, pd.DataFrame):
+        column = count_key if count_key in results.columns else f"{count_key}.value"
+        return pd.to_numeric(results[column]).to_numpy(dtype=np.int64)
+    return np.fromiter(
+        (int(result[count_key]["value"]) for result in results), dtype=np.int64, count=len(results)
+    )
+
+
+def top_k_indices(counts: np.ndarray, k: int) -> np.ndarray:
+    """
+    Finds the positions of the k largest counts, largest first.
+
+    Only the selected positions are sorted; the rest is partitioned in
+    linear time. Equal counts keep their original order.
+
+    Args:
+        counts (np.ndarray): The counts.
+        k (int): Number of positions to return.
+
+    Returns:
+        np.ndarray: Up to k positions into `counts`.
+    """
+    k = max(min(k, len(counts)), 0)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(counts):
+        # Keep every position tied with the k-th largest count, so ties are
+        # broken by position below rather than by the partition.
+        threshold = counts[np.argpartition(-counts, k - 1)[k - 1]]
+        candidates = np.flatnonzero(counts >= threshold)
+    else:
+        candidates = np.arange(len(counts))
+    order = np.lexsort((candidates, -counts[candidates]))
+    return candidates[order[:k]]
+
+
+def _take(results: Union[List[Dict], pd.DataFrame], positions: np.ndarray) -> Union[List[Dict], pd.DataFrame]:
+    if isinstance(results, pd.DataFrame):
+        return results.iloc[positions]
+    return [results[i] for i in positions.tolist()]
+
+
+def top_k(
+    results: Union[List[Dict], pd.DataFrame], count_key: str, k: int
+) -> Union[List[Dict], pd.DataFrame]:
+    """
+    Selects the k results with the highest counts, in descending order.
+
+    Args:
+        results (Union[List[Dict], pd.DataFrame]): Bindings or a DataFrame.
+        count_key (str): The key to sort by.
+        k (int): Number of results to return.
+
+    Returns:
+        Union[List[Dict], pd.DataFrame]: The selected results, of the same kind as `results`.
+    """
+    with span("sort.top_k", rows=len(results), k=k):
+        return _take(results, top_k_indices(parse_counts(results, count_key), k))
+
+
+def sort_results(
+    results: Union[List[Dict], pd.DataFrame], count_key: str
+) -> Union[List[Dict], pd.DataFrame]:
     """
     Sorts results by count in descending order.
 
     Args:
-        results (List[Dict]): A list of result dictionaries.
+        results (Union[List[Dict], pd.DataFrame]): Bindings or a DataFrame.
         count_key (str): The key to sort by.
 
     Returns:
-        List[Dict]: The sorted results.
+        Union[List[Dict], pd.DataFrame]: The sorted results, of the same kind as `results`.
     """
     logging.info(f"Sorting results by key '{count_key}' in descending order.")
     try:
-        return sorted(results, key=lambda x: int(x[count_key]["value"]), reverse=True)
+        with span("sort", rows=len(results)):
+            counts = parse_counts(results, count_key)
+            return _take(results, np.argsort(-counts, kind="stable"))
     except Exception as e:
         logging.error(f"Error sorting results: {e}")
         raise
 
 
 def suggest_top_n(
-    results: List[Dict], key: str, count_key: str, top_n: int = 5
+    results: Union[List[Dict], pd.DataFrame], key: str, count_key: str, top_n: int = 5
 ) -> List[str]:
     """
     Returns the top N most common results.
 
     Args:
-        results (List[Dict]): A list of result dictionaries.
+        results (Union[List[Dict], pd.DataFrame]): Bindings or a DataFrame.
         key (str): The key to extract values.
         count_key (str): The key to sort by.
         top_n (int): The number of top results to return.
@@ -168,35 +288,68 @@ def suggest_top_n(
         List[str]: The top N result values.
     """
     logging.info(f"Suggesting the top {top_n} results.")
-    sorted_results = sort_results(results, count_key)
-    return [item[key]["value"] for item in sorted_results[:top_n]]
+    return _column(top_k(results, count_key, top_n), key)
 
 
-def display_sorted_results(results: List[Dict], key: str, count_key: str) -> None:
+def display_sorted_results(
+    results: Union[List[Dict], pd.DataFrame],
+    key: str,
+    count_key: str,
+    page_size: Optional[int] = 20,
+) -> None:
     """
-    Displays sorted results in a readable format.
+    Displays results by descending count, one page at a time.
+
+    Each page is selected with `top_k`, so results beyond the pages the
+    user looks at are never sorted.
 
     Args:
-        results (List[Dict]): A list of result dictionaries.
+        results (Union[List[Dict], pd.DataFrame]): Bindings or a DataFrame.
         key (str): The key for the main value to display.
         count_key (str): The key for the count value.
+        page_size (Optional[int]): Rows per page. None displays all rows at once.
     """
     logging.info("Displaying sorted results.")
-    sorted_results = sort_results(results, count_key)
-    display_results(sorted_results, key, count_key)
+    if page_size is None:
+        display_results(sort_results(results, count_key), key, count_key)
+        return
+
+    counts = parse_counts(results, count_key)
+    shown = 0
+    while shown < len(counts):
+        with span("sort.top_k", rows=len(counts), k=shown + page_size):
+            positions = top_k_indices(counts, shown + page_size)[shown:]
+        display_results(_take(results, positions), key, count_key, start=shown + 1)
+        shown += len(positions)
+        if shown >= len(counts):
+            break
+        try:
+            answer = input(f"Showing {shown} of {len(counts)}. Press Enter for more or 'q' to stop: ")
+        except EOFError:
+            break
+        if answer.strip().lower() == "q":
+            break
 
-def export_results_to_csv(results: List[Dict], filename: str):
+def export_results_to_csv(results: List[Dict], filename: str, compact_uris: bool = False):
     """
     Exports SPARQL query results to a CSV file.
 
     Args:
         results (List[Dict]): The query results to export.
         filename (str): The output file name.
+        compact_uris (bool): Writes one column per variable with URIs shortened
+            to CURIEs, instead of every field of the SPARQL JSON terms.
     """
     if not filename.endswith(".csv"):
         filename += ".csv"
     try:
-        df = pd.json_normalize(results)
+        if compact_uris:
+            from source.sparql.process import convert_bindings_to_columns
+
+            compactor = URICompactor(load_prefix_map())
+            df = compactor.compact_frame(convert_bindings_to_columns(results))
+        else:
+            df = pd.json_normalize(results)
         df.to_csv(filename, index=False)
         logging.info(f"Results exported to {filename}")
     except Exception as e:
@@ -224,6 +377,49 @@ def export_results_to_json(results: List[Dict], filename: str = "") -> None:
         logging.error(f"Error exporting results to JSON: {e}")
         raise
 
+def export_results_to_arrow(
+    results: List[Dict],
+    filename: str = "",
+    metadata: Optional[Dict] = None,
+    file_format: str = "arrow",
+    compact_uris: bool = False,
+) -> Path:
+    """
+    Exports SPARQL query results to a columnar Arrow or Parquet file.
+
+    Columns keep their datatypes and the file can be reopened memory-mapped
+    with `source.sparql.store.read_table`.
+
+    Args:
+        results (List[Dict]): The query results to export.
+        filename (str): The output file name. Defaults to an auto-generated name if not provided.
+        metadata (Optional[Dict]): Metadata stored with the results, e.g. query name and endpoint.
+        file_format (str): "arrow" or "parquet".
+        compact_uris (bool): Stores URIs shortened to CURIEs with the prefixes
+            of `files/queries.json`, which are added to the metadata.
+
+    Returns:
+        Path: The written file.
+    """
+    from source.sparql.store import write_results
+
+    if not filename:
+        filename = f"{get_dir('files/results/')}/results_{get_timestamp()}"
+    compactor = None
+    if compact_uris:
+        prefixes = load_prefix_map()
+        compactor = URICompactor(prefixes)
+        metadata = {**(metadata or {}), "prefixes": prefixes}
+    try:
+        path = write_results(
+            results, filename, metadata=metadata, file_format=file_format, compactor=compactor
+        )
+        logging.info(f"Results exported to {path}")
+        return path
+    except Exception as e:
+        logging.error(f"Error exporting results to {file_format}: {e}")
+        raise
+
 def get_timestamp() -> str:
     """
     Returns the current timestamp in a formatted string.